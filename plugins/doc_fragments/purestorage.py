@@ -19,6 +19,19 @@ notes:
   - Ansible modules are available for the following Pure Storage products: FlashArray, FlashBlade, Pure1
 """
 
+    # Documentation fragment for Pure1 modules returning a record per object
+    FIELDS = r"""
+options:
+  fields:
+    description:
+      - List of attributes to return for each object.
+      - If not provided, all attributes are returned.
+      - The Pure1 API does not support server-side attribute selection so
+        unrequested attributes are dropped as each record is built.
+    type: list
+    elements: str
+"""
+
     # Documentation fragment for Pure1
     P1 = r"""
 options:
@@ -40,11 +53,58 @@ options:
       - The password of the private key, if encrypted.
       - Defaults to the set environment variable under PURE1_PRIVATE_PASSWORD.
     type: str
+  timestamp_format:
+    description:
+      - Format used for timestamps returned by the module.
+      - C(epoch_ms) returns the raw Pure1 integer milliseconds since the epoch
+        and skips all string formatting.
+      - C(iso8601_utc) returns ISO 8601 strings in UTC, eg. C(2024-01-31T09:15:00.000Z).
+      - C(legacy) keeps the historic per-module string formats.
+      - Ignored by modules that do not return timestamps.
+    type: str
+    default: legacy
+    choices: [ epoch_ms, iso8601_utc, legacy ]
+  debug_metrics:
+    description:
+      - Time every request made to the Pure1 API and return a per endpoint
+        summary in the I(debug_metrics) key of the result.
+      - Each endpoint reports calls, requests, pages, retries, errors,
+        response statuses, response bytes and p50, p95, max and total latency.
+      - Also returned when the module fails.
+    type: bool
+    default: false
+  debug_metrics_trace:
+    description:
+      - Path of a file on the target to write the timed requests to as
+        Chrome trace events, for viewing in chrome://tracing or Perfetto.
+      - Only used when I(debug_metrics=true).
+    type: path
 notes:
   - This module requires the C(py-pure-client) Python library
   - You must set C(PURE1_APP_ID) and C(PURE1_PRIVATE_KEY_FILE) environment variables
     if I(app_id) and I(key_file) arguments are not passed to the module directly
   - C(PURE1_PRIVATE_PASSWORD) environmental variable | I(password) is optional
+  - Setting the C(PURE1_API_URL) environment variable sends all requests to that
+    URL instead of the Pure1 API, eg. the simulator in C(tests/perf)
+  - Setting the C(PURE1_CASSETTE) environment variable to a file path replays the
+    Pure1 API responses recorded in that file instead of calling the API. Set
+    C(PURE1_CASSETTE_MODE=record) to record the responses of a run into the file and
+    C(PURE1_CASSETTE_LATENCY) to scale the recorded latencies on replay, C(0) disables them
+  - Responses are requested gzip or deflate compressed. Setting the C(PURE1_RESPONSE_CACHE)
+    environment variable to a file path stores the responses that carry an ETag or
+    Last-Modified validator there and makes later requests for them conditional, so
+    unchanged responses, such as subscriptions or contracts, are not transferred again.
+    The file is only readable by its owner and is not changed in check mode. Use a
+    separate file per Pure1 account
+  - Large listings, such as volumes, drives and alerts, are read from the raw JSON of
+    the Pure1 API, parsed with C(orjson) when it is installed, instead of through the
+    C(py-pure-client) models. This relies on internals of C(py-pure-client), so the
+    models are used whenever the client does not provide them or a raw request fails.
+    Set the C(PURE1_RAW_JSON=0) environment variable to always use the models
+  - Setting the C(PURE1_PROFILE) environment variable to a directory profiles each module
+    run from client setup to the serialised result and writes one file per module and
+    gather_subset there. C(PURE1_PROFILER=pyinstrument) writes a pyinstrument HTML
+    report instead of C(cProfile) stats when pyinstrument is installed
 requirements:
   - python >= 3.4
   - py-pure-client >= 1.14.1
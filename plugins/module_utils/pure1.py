@@ -32,61 +32,588 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-HAS_PYPURECLIENT = True
+# pypureclient is only imported once a client is needed, modules that fail
+# argument validation or run from a cassette never pay for it
 try:
-    from pypureclient import pure1
+    from importlib.util import find_spec
+
+    HAS_PYPURECLIENT = find_spec("pypureclient") is not None
 except ImportError:
-    HAS_PYPURECLIENT = False
+    HAS_PYPURECLIENT = True
+    try:
+        import pypureclient  # noqa: F401
+    except ImportError:
+        HAS_PYPURECLIENT = False
 
 from os import environ
+import hashlib
+import importlib
+import itertools
+import json
+import os
 import platform
+import tempfile
+import threading
+import time
+
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
 
 TOKEN_EXCHANGE_URL = "https://api.pure1.purestorage.com/oauth2/1.0/token"
 VERSION = 1.0
 USER_AGENT_BASE = "Ansible"
+TIMESTAMP_FORMATS = ["epoch_ms", "iso8601_utc", "legacy"]
+LEGACY_TIME_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+OUTPUT_FORMATS = ["ndjson", "parquet", "arrow", "csv"]
+COLUMNAR_BATCH_SIZE = 10000
+# Resource names per request, keeps request URLs well under common limits
+RESOURCE_BATCH_SIZE = 100
+# Values per any_of_filter, whose filters are much longer per value
+FILTER_BATCH_SIZE = 50
+MAX_WORKERS = 8
+# Limits of a single get_metrics_history request
+METRIC_MAX_POINTS = 1440
+METRIC_MAX_SERIES = 32
+METRIC_RESOLUTIONS = [30000, 300000, 1800000, 7200000, 86400000]
+METRIC_AGGREGATIONS = ["avg", "max"]
+# Arrow type for each column type used by OutputFile columnar exports
+COLUMN_TYPES = {
+    "string": lambda pyarrow: pyarrow.string(),
+    "int64": lambda pyarrow: pyarrow.int64(),
+    "double": lambda pyarrow: pyarrow.float64(),
+    "bool": lambda pyarrow: pyarrow.bool_(),
+    "timestamp_ms": lambda pyarrow: pyarrow.timestamp("ms", tz="UTC"),
+}
+
+
+# urllib3 decodes these transparently, brotli and zstd need extra packages
+ACCEPT_ENCODING = "gzip, deflate"
+# Headers describing the encoded body, which no longer apply once decoded
+ENCODING_HEADERS = ["content-encoding", "content-length", "transfer-encoding"]
+RESPONSE_CACHE_RETENTION = 7
+
+
+def _pure1_versioned():
+    """Return the module of the most recent versioned Pure1 client"""
+    from pypureclient.pure1 import client as pure1_versions
+
+    version = sorted(
+        pure1_versions.pure1_modules_dict,
+        key=lambda version: [int(part) for part in version.split(".")],
+    )[-1]
+    return importlib.import_module(pure1_versions.pure1_modules_dict[version])
+
+
+def _pure1_configuration(api_url):
+    from pypureclient._helpers import create_transport_config
+
+    configuration = create_transport_config(
+        target=TOKEN_EXCHANGE_URL.split("/")[2],
+        configuration=None,
+        ssl_cert=None,
+        verify_ssl=None,
+    )
+    if api_url:
+        configuration.host = api_url.rstrip("/")
+    return configuration
+
+
+class CassetteError(Exception):
+    """A cassette that cannot be recorded or replayed, see pure1_cassette"""
+
+
+def pure1_client(check_mode=False, **kwargs):
+    """Return a Pure1 client for the Pure1 API or the PURE1_API_URL endpoint
+
+    PURE1_API_URL points the collection at a local Pure1 API stand-in, such
+    as tests/perf/pure1_simulator.py. pure1.Client() always targets the
+    public API so the versioned client is built directly in that case.
+
+    PURE1_CASSETTE records the responses of the client to, or replays them
+    from, a cassette file. See pure1_cassette.Cassette.
+
+    PURE1_RESPONSE_CACHE makes GET requests conditional on the responses
+    stored in that file, which is not changed in check_mode. See
+    ResponseCache.
+    """
+    api_url = environ.get("PURE1_API_URL")
+    cassette = None
+    if environ.get("PURE1_CASSETTE"):
+        from ansible_collections.purestorage.pure1.plugins.module_utils.pure1_cassette import (
+            Cassette,
+        )
+
+        cassette = Cassette(
+            environ["PURE1_CASSETTE"],
+            mode=environ.get("PURE1_CASSETTE_MODE", "replay"),
+            latency_scale=float(environ.get("PURE1_CASSETTE_LATENCY", "1.0")),
+        )
+        if cassette.mode == "replay":
+            return cassette.replay_client(_pure1_configuration(api_url))
+    if not api_url:
+        from pypureclient import pure1
+
+        pure_1 = pure1.Client(**kwargs)
+    else:
+        pure_1 = _pure1_versioned().Client(
+            configuration=_pure1_configuration(api_url),
+            retries=5,
+            timeout=15.0,
+            **kwargs
+        )
+    pure_1._api_client.set_default_header("Accept-Encoding", ACCEPT_ENCODING)
+    if environ.get("PURE1_RESPONSE_CACHE"):
+        ResponseCache.attach(environ["PURE1_RESPONSE_CACHE"], pure_1, check_mode)
+    if cassette:
+        cassette.record(pure_1)
+    return pure_1
+
+
+def decoded_headers(headers):
+    """Return the response headers that still apply to its decoded body"""
+    return dict(
+        (name, value)
+        for name, value in (headers or {}).items()
+        if name.lower() not in ENCODING_HEADERS
+    )
+
+
+def sqlite_connect(path, check_mode=False, **kwargs):
+    """Return a connection to the SQLite database file at path
+
+    A missing file is created readable and writable by its owner only. In
+    check mode the file is not written, or created, but copied into an
+    in-memory database whose changes are discarded when it is closed.
+    """
+    import sqlite3
+
+    if not check_mode:
+        os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+        return sqlite3.connect(path, **kwargs)
+    db = sqlite3.connect(":memory:", **kwargs)
+    if os.path.exists(path):
+        source = sqlite3.connect(path)
+        try:
+            db.executescript("\n".join(source.iterdump()))
+        finally:
+            source.close()
+    return db
+
+
+class ResponseCache(object):
+    """Conditional GET requests answered from locally stored responses
+
+    Responses to GET requests that carry an ETag or Last-Modified validator
+    are stored in an SQLite database by URL. Later requests for the URL send
+    the validators in If-None-Match and If-Modified-Since, and a 304 Not
+    Modified reply is answered with the stored body, so an unchanged
+    collection costs a round trip but no transfer. Responses not used for
+    RESPONSE_CACHE_RETENTION days are removed when the cache is opened. The
+    file is not changed in check mode, see sqlite_connect.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            headers TEXT NOT NULL,
+            data BLOB NOT NULL,
+            used INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path, check_mode=False):
+        self.path = path
+        self._lock = threading.Lock()
+        # Requests are made from the worker threads of run_concurrently
+        self.db = sqlite_connect(
+            path,
+            check_mode,
+            timeout=60,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.db.executescript(self.SCHEMA)
+        self.db.execute(
+            "DELETE FROM responses WHERE used < ?",
+            (int(time.time()) - RESPONSE_CACHE_RETENTION * 86400,),
+        )
+
+    @classmethod
+    def attach(cls, path, pure_1, check_mode=False):
+        """Make the GET requests of pure_1 conditional on the cache at path
+
+        A cache that cannot be opened is skipped, requests are then made
+        unconditionally.
+        """
+        import atexit
+
+        try:
+            cache = cls(path, check_mode)
+        except Exception:
+            return None
+        cache.wrap(pure_1)
+        atexit.register(cache.close)
+        return cache
+
+    def _get(self, url):
+        with self._lock:
+            return self.db.execute(
+                "SELECT etag, last_modified, headers, data FROM responses"
+                " WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _store(self, url, response):
+        etag = response.getheader("ETag")
+        last_modified = response.getheader("Last-Modified")
+        if not (etag or last_modified) or not isinstance(response.data, bytes):
+            return
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    json.dumps(decoded_headers(response.getheaders())),
+                    response.data,
+                    int(time.time()),
+                ),
+            )
+
+    def _touch(self, url):
+        with self._lock:
+            self.db.execute(
+                "UPDATE responses SET used = ? WHERE url = ?", (int(time.time()), url)
+            )
+
+    def wrap(self, pure_1):
+        from pypureclient._transport.exceptions import ApiException
+        from pypureclient._transport.rest import RESTResponse
+        from urllib3 import HTTPResponse
+
+        api_client = pure_1._api_client
+        request = api_client.request
+
+        def conditional_request(method, url, query_params=None, headers=None, **kwargs):
+            if method != "GET":
+                return request(
+                    method, url, query_params=query_params, headers=headers, **kwargs
+                )
+            cached = self._get(url)
+            headers = dict(headers or {})
+            if cached:
+                if cached[0]:
+                    headers["If-None-Match"] = cached[0]
+                if cached[1]:
+                    headers["If-Modified-Since"] = cached[1]
+            try:
+                response = request(
+                    method, url, query_params=query_params, headers=headers, **kwargs
+                )
+            except ApiException as err:
+                if not cached or err.status != 304:
+                    raise
+                self._touch(url)
+                response = RESTResponse(
+                    HTTPResponse(
+                        body=cached[3],
+                        headers=json.loads(cached[2]),
+                        status=200,
+                        reason="OK",
+                        preload_content=True,
+                    )
+                )
+                # Lets ApiMetrics report the 304 and the bytes actually received
+                response.not_modified = True
+                return response
+            if response.status == 200:
+                self._store(url, response)
+            return response
+
+        api_client.request = conditional_request
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+class ApiMetrics(object):
+    """Per-request timings of the Pure1 API calls made by a module
+
+    Wraps the HTTP request method of a client, so every page and every
+    retry made by py-pure-client is recorded individually. Retries made by
+    urllib3 itself, eg. on 429 or 503 with Retry-After, are counted from the
+    retry history of the response and included in its latency.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.client_setup = None
+        self._failed = set()
+        self._lock = threading.Lock()
+        self.epoch = time.time()
+
+    def instrument(self, pure_1):
+        api_client = pure_1._api_client
+        request = api_client.request
+
+        def timed_request(method, url, *args, **kwargs):
+            start = time.time()
+            status = None
+            size = 0
+            retries = 0
+            try:
+                response = request(method, url, *args, **kwargs)
+                status = response.status
+                size = len(response.data or b"")
+                if getattr(response, "not_modified", False):
+                    status, size = 304, 0
+                history = getattr(
+                    getattr(response, "urllib3_response", response), "retries", None
+                )
+                retries = len(getattr(history, "history", None) or ())
+                return response
+            except Exception as err:
+                status = getattr(err, "status", None) or 0
+                size = len(getattr(err, "body", None) or b"")
+                raise
+            finally:
+                self.record(method, url, status, start, time.time(), size, retries)
+
+        api_client.request = timed_request
+
+    def record(self, method, url, status, start, end, size, retries=0):
+        parts = urlsplit(url)
+        path = parts.path
+        if path.startswith("/api/"):
+            path = "/" + path.split("/", 3)[-1]
+        query = parse_qs(parts.query)
+        with self._lock:
+            retry = url in self._failed
+            if 200 <= status < 400:
+                self._failed.discard(url)
+            else:
+                self._failed.add(url)
+            self.requests.append(
+                {
+                    "endpoint": method + " " + path,
+                    "status": status,
+                    "start": start,
+                    "duration": end - start,
+                    "bytes": size,
+                    "page": "continuation_token" in query,
+                    "retry": retry,
+                    "retries": retries + (1 if retry else 0),
+                    "thread": threading.current_thread().ident,
+                }
+            )
+
+    def summary(self):
+        """Return the aggregated per endpoint table"""
+        endpoints = {}
+        with self._lock:
+            requests = list(self.requests)
+        for request in requests:
+            endpoint = endpoints.setdefault(
+                request["endpoint"],
+                {
+                    "calls": 0,
+                    "requests": 0,
+                    "pages": 0,
+                    "retries": 0,
+                    "errors": 0,
+                    "statuses": {},
+                    "bytes": 0,
+                    "durations": [],
+                },
+            )
+            endpoint["requests"] += 1
+            endpoint["bytes"] += request["bytes"]
+            endpoint["durations"].append(request["duration"])
+            status = str(request["status"])
+            endpoint["statuses"][status] = endpoint["statuses"].get(status, 0) + 1
+            endpoint["retries"] += request["retries"]
+            if not request["retry"] and not request["page"]:
+                endpoint["calls"] += 1
+            if 200 <= request["status"] < 400:
+                endpoint["pages"] += 1
+            else:
+                endpoint["errors"] += 1
+        for endpoint in endpoints.values():
+            durations = sorted(endpoint.pop("durations"))
+            endpoint["total_ms"] = round(sum(durations) * 1000, 3)
+            endpoint["p50_ms"] = round(_percentile(durations, 50) * 1000, 3)
+            endpoint["p95_ms"] = round(_percentile(durations, 95) * 1000, 3)
+            endpoint["max_ms"] = round(durations[-1] * 1000, 3)
+        return {
+            "client_setup_ms": (
+                None
+                if self.client_setup is None
+                else round(self.client_setup * 1000, 3)
+            ),
+            "elapsed_ms": round((time.time() - self.epoch) * 1000, 3),
+            "requests": len(requests),
+            "bytes": sum(request["bytes"] for request in requests),
+            "endpoints": endpoints,
+        }
+
+    def write_trace(self, path):
+        """Write the requests as Chrome trace events, eg. for chrome://tracing"""
+        with self._lock:
+            requests = list(self.requests)
+        events = [
+            {
+                "name": request["endpoint"],
+                "cat": "pure1",
+                "ph": "X",
+                "ts": int((request["start"] - self.epoch) * 1000000),
+                "dur": int(request["duration"] * 1000000),
+                "pid": os.getpid(),
+                "tid": request["thread"],
+                "args": {
+                    "status": request["status"],
+                    "bytes": request["bytes"],
+                    "page": request["page"],
+                    "retries": request["retries"],
+                },
+            }
+            for request in requests
+        ]
+        if self.client_setup is not None:
+            events.insert(
+                0,
+                {
+                    "name": "client setup",
+                    "cat": "pure1",
+                    "ph": "X",
+                    "ts": 0,
+                    "dur": int(self.client_setup * 1000000),
+                    "pid": os.getpid(),
+                    "tid": threading.current_thread().ident,
+                },
+            )
+        with open(path, "w") as trace:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace)
+
+
+def _percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values"""
+    rank = int(-(-len(values) * percent // 100))
+    return values[max(rank, 1) - 1]
+
+
+def report_api_metrics(module, metrics):
+    """Add the API metrics of metrics to every result of module"""
+    exit_json = module.exit_json
+    fail_json = module.fail_json
+
+    def add_metrics(result):
+        result["debug_metrics"] = metrics.summary()
+        if module.params.get("debug_metrics_trace"):
+            try:
+                metrics.write_trace(module.params["debug_metrics_trace"])
+                result["debug_metrics"]["trace_file"] = module.params[
+                    "debug_metrics_trace"
+                ]
+            except (IOError, OSError) as err:
+                module.warn("Failed to write API trace: {0}".format(err))
+        return result
+
+    module.exit_json = lambda **kwargs: exit_json(**add_metrics(kwargs))
+    module.fail_json = lambda **kwargs: fail_json(**add_metrics(kwargs))
+
+
+_USER_AGENT = None
+
+
+def user_agent():
+    """Return the User-Agent of the collection, computed once per process
+
+    platform.platform() runs uname -p in a subprocess for the processor,
+    so the platform is built from the cheap uname fields instead.
+    """
+    global _USER_AGENT
+    if _USER_AGENT is None:
+        uname = platform.uname()
+        libc = "".join(platform.libc_ver())
+        _USER_AGENT = "%(base)s %(class)s/%(version)s (%(platform)s)" % {
+            "base": USER_AGENT_BASE,
+            "class": __name__,
+            "version": VERSION,
+            "platform": "-".join(
+                part
+                for part in [
+                    uname[0],
+                    uname[2],
+                    uname[4],
+                    "with" if libc else "",
+                    libc,
+                ]
+                if part
+            ),
+        }
+    return _USER_AGENT
 
 
 def get_pure1(module):
     """Return System Object or Fail"""
-    user_agent = "%(base)s %(class)s/%(version)s (%(platform)s)" % {
-        "base": USER_AGENT_BASE,
-        "class": __name__,
-        "version": VERSION,
-        "platform": platform.platform(),
-    }
+    user_agent_header = user_agent()
     app_id = module.params["app_id"]
     key_file = module.params["key_file"]
+    metrics = None
+    if module.params.get("debug_metrics"):
+        metrics = ApiMetrics()
+        report_api_metrics(module, metrics)
+    if environ.get("PURE1_PROFILE"):
+        from ansible_collections.purestorage.pure1.plugins.module_utils.pure1_profile import (
+            profile_module,
+        )
+
+        profile_module(module)
     if HAS_PYPURECLIENT:
         if app_id and key_file:
             try:
                 if module.params["password"]:
-                    pure_1 = pure1.Client(
+                    pure_1 = pure1_client(
+                        check_mode=module.check_mode,
                         app_id=app_id,
                         private_key_file=key_file,
                         private_key_password=module.params["password"],
                     )
                 else:
-                    pure_1 = pure1.Client(
+                    pure_1 = pure1_client(
+                        check_mode=module.check_mode,
                         app_id=app_id,
                         private_key_file=key_file,
                     )
-                pure_1._api_client.set_default_header("User-Agent", user_agent)
+                pure_1._api_client.set_default_header("User-Agent", user_agent_header)
+            except CassetteError as err:
+                module.fail_json(msg=str(err))
             except Exception:
                 module.fail_json(msg="Unknown failure. Please contact Pure Support")
         elif environ.get("PURE1_APP_ID") and environ.get("PURE1_PRIVATE_KEY_FILE"):
             try:
                 if module.params["password"]:
-                    pure_1 = pure1.Client(
+                    pure_1 = pure1_client(
+                        check_mode=module.check_mode,
                         app_id=environ.get("PURE1_APP_ID"),
                         private_key_file=environ.get("PURE1_PRIVATE_KEY_FILE"),
                         private_key_password=environ.get("PURE1_PRIVATE_PASSWORD"),
                     )
                 else:
-                    pure_1 = pure1.Client(
-                        app_id=app_id,
-                        private_key_file=key_file,
+                    pure_1 = pure1_client(
+                        check_mode=module.check_mode,
+                        app_id=environ.get("PURE1_APP_ID"),
+                        private_key_file=environ.get("PURE1_PRIVATE_KEY_FILE"),
                     )
-                pure_1._api_client.set_default_header("User-Agent", user_agent)
+                pure_1._api_client.set_default_header("User-Agent", user_agent_header)
+            except CassetteError as err:
+                module.fail_json(msg=str(err))
             except Exception:
                 module.fail_json(msg="Unknown failure. Please contact Pure Support")
         else:
@@ -94,8 +621,12 @@ def get_pure1(module):
                 msg="You must set PURE1_APP_ID and PURE1_PRIVATE_KEY_FILE environment variables "
                 "or the app_id and key_file module arguments"
             )
+        if metrics:
+            metrics.client_setup = time.time() - metrics.epoch
+            metrics.instrument(pure_1)
         try:
-            res = pure_1.get_arrays()
+            # Any response proves the credentials, one array is enough
+            res = pure_1.get_arrays(limit=1)
             if res.status_code != 200:
                 module.fail_json(
                     msg="Pure1 authentication failed. Check your credentials"
@@ -107,6 +638,1016 @@ def get_pure1(module):
     return pure_1
 
 
+def format_timestamp(
+    module, epoch_ms, legacy_format=LEGACY_TIME_FORMAT, legacy_localtime=False
+):
+    """Return a Pure1 millisecond epoch in the requested timestamp_format
+
+    The legacy format and timezone are per call site so existing module
+    output is unchanged unless another format is requested.
+    """
+    if epoch_ms is None:
+        return None
+    timestamp_format = module.params.get("timestamp_format") or "legacy"
+    if timestamp_format == "epoch_ms":
+        return int(epoch_ms)
+    if timestamp_format == "iso8601_utc":
+        return "%s.%03dZ" % (
+            time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(int(epoch_ms) // 1000)),
+            int(epoch_ms) % 1000,
+        )
+    if legacy_localtime:
+        return time.strftime(legacy_format, time.localtime(int(epoch_ms) / 1000))
+    return time.strftime(legacy_format, time.gmtime(int(epoch_ms) / 1000))
+
+
+def field_wanted(module, field):
+    """Return True if field has been requested by the fields option"""
+    fields = module.params.get("fields")
+    return not fields or field in fields
+
+
+def project_fields(module, record):
+    """Return record reduced to the attributes requested by the fields option"""
+    fields = module.params.get("fields")
+    if not fields:
+        return record
+    return dict((key, value) for key, value in record.items() if key in fields)
+
+
+class OutputFile(object):
+    """Stream module records to output_file
+
+    Records are written to a temporary file in the destination directory
+    as they are generated and moved into place by close(), so memory use
+    stays flat however many records are exported.
+
+    ndjson writes one JSON document per record. The columnar formats expect
+    flat rows keyed by columns, a list of (name, type) tuples where type is
+    one of the COLUMN_TYPES keys. parquet and arrow (Arrow IPC file) need
+    pyarrow and are written in record batches; without pyarrow a gzip
+    compressed CSV is written instead. CSV is always written to a path
+    ending in .csv.gz, the output_file extension is replaced otherwise,
+    and close() reports the path and format written.
+    """
+
+    def __init__(self, module, columns=None):
+        self.module = module
+        self.path = os.path.abspath(module.params["output_file"])
+        self.output_format = module.params.get("output_format") or "ndjson"
+        self.columns = columns or []
+        self.records = 0
+        self.batch = []
+        if self.output_format in ["parquet", "arrow"]:
+            try:
+                import pyarrow
+                import pyarrow.ipc
+                import pyarrow.parquet
+            except ImportError:
+                self.path = os.path.splitext(self.path)[0] + ".csv.gz"
+                module.warn(
+                    "pyarrow is not installed, writing gzip compressed CSV to {0}"
+                    " instead of {1}".format(self.path, self.output_format)
+                )
+                self.output_format = "csv"
+        elif self.output_format == "csv" and not self.path.endswith(".csv.gz"):
+            path = self.path
+            self.path = os.path.splitext(path)[0] + ".csv.gz"
+            module.warn(
+                "CSV is written gzip compressed, writing {0} instead of {1}".format(
+                    self.path, path
+                )
+            )
+        try:
+            fd, self.tmp_path = tempfile.mkstemp(
+                prefix=".pure1_", suffix=".tmp", dir=os.path.dirname(self.path)
+            )
+        except OSError as err:
+            module.fail_json(
+                msg="Failed to create output file {0}. Error: {1}".format(
+                    self.path, err
+                )
+            )
+        module.add_cleanup_file(self.tmp_path)
+        if self.output_format == "ndjson":
+            self.handle = os.fdopen(fd, "w")
+            return
+        os.close(fd)
+        if self.output_format == "csv":
+            import csv
+            import gzip
+
+            self.handle = gzip.open(self.tmp_path, "wt", newline="")
+            self.writer = csv.writer(self.handle)
+            self.writer.writerow([name for name, column_type in self.columns])
+            return
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema(
+            [
+                (name, COLUMN_TYPES[column_type](pyarrow))
+                for name, column_type in self.columns
+            ]
+        )
+        if self.output_format == "parquet":
+            self.handle = None
+            self.writer = pyarrow.parquet.ParquetWriter(self.tmp_path, self.schema)
+        else:
+            self.handle = pyarrow.OSFile(self.tmp_path, "wb")
+            self.writer = pyarrow.ipc.new_file(self.handle, self.schema)
+
+    @property
+    def columnar(self):
+        return self.output_format != "ndjson"
+
+    def write(self, record):
+        self.records += 1
+        if self.output_format == "ndjson":
+            self.handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        elif self.output_format == "csv":
+            self.writer.writerow(
+                [record.get(name) for name, column_type in self.columns]
+            )
+        else:
+            self.batch.append(record)
+            if len(self.batch) >= COLUMNAR_BATCH_SIZE:
+                self._write_batch()
+
+    def _write_batch(self):
+        if self.batch:
+            self.writer.write_batch(
+                self.pyarrow.RecordBatch.from_pylist(self.batch, schema=self.schema)
+            )
+            self.batch = []
+
+    def close(self):
+        """Move the completed file into place and return a result summary"""
+        if self.output_format in ["parquet", "arrow"]:
+            self._write_batch()
+            self.writer.close()
+        if self.handle:
+            self.handle.close()
+        self.module.atomic_move(self.tmp_path, self.path)
+        return {
+            "output_file": self.path,
+            "output_format": self.output_format,
+            "records": self.records,
+        }
+
+
+class DeltaState(object):
+    """Record digests of a previous run to report the changes of this one
+
+    The state file holds a JSON object of record key to the SHA-1 digest of
+    the record as returned. Each record of this run is compared with the
+    digest of its key as it is added, so only the digests are kept in
+    memory, and the state file is replaced with the digests of this run
+    unless in check mode.
+    """
+
+    def __init__(self, module, path):
+        self.module = module
+        self.path = path
+        self.previous = {}
+        self.digests = {}
+        self.added = []
+        self.modified = []
+        if os.path.exists(path):
+            try:
+                with open(path) as state:
+                    self.previous = json.load(state)
+            except (IOError, OSError, ValueError) as err:
+                module.fail_json(
+                    msg="Failed to read state file {0}. Error: {1}".format(path, err)
+                )
+
+    def add(self, key, record):
+        digest = hashlib.sha1(
+            json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()
+        self.digests[key] = digest
+        previous = self.previous.pop(key, None)
+        if previous is None:
+            self.added.append(key)
+        elif previous != digest:
+            self.modified.append(key)
+
+    def close(self):
+        """Save the digests of this run and return the keys that changed"""
+        if not self.module.check_mode:
+            try:
+                fd, tmp_path = tempfile.mkstemp(
+                    prefix=".pure1_",
+                    suffix=".tmp",
+                    dir=os.path.dirname(os.path.abspath(self.path)),
+                )
+                with os.fdopen(fd, "w") as state:
+                    json.dump(self.digests, state, separators=(",", ":"))
+            except (IOError, OSError) as err:
+                self.module.fail_json(
+                    msg="Failed to write state file {0}. Error: {1}".format(
+                        self.path, err
+                    )
+                )
+            self.module.atomic_move(tmp_path, self.path)
+        return {
+            "state_file": self.path,
+            "added": sorted(self.added),
+            "modified": sorted(self.modified),
+            "removed": sorted(self.previous),
+        }
+
+
+def chunks(items, size=RESOURCE_BATCH_SIZE):
+    """Return items as a list of lists of at most size items"""
+    items = list(items)
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def any_of_filter(attribute, values):
+    """Return a Pure1 filter matching objects whose attribute is any of values"""
+    return " or ".join(
+        "{0}='{1}'".format(attribute, value.replace("\\", "\\\\").replace("'", "\\'"))
+        for value in values
+    )
+
+
+def run_concurrently(function, batches, workers=MAX_WORKERS):
+    """Return the results of function for each of batches, in order
+
+    Batches are run in a thread pool as Pure1 requests spend almost all of
+    their time waiting on the network.
+    """
+    batches = list(batches)
+    if len(batches) < 2:
+        return [function(batch) for batch in batches]
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        return list(executor.map(function, batches))
+
+
+_JSON_LOADS = None
+
+
+def _json_loads():
+    """Return orjson.loads, or json.loads when orjson is not installed"""
+    global _JSON_LOADS
+    if _JSON_LOADS is None:
+        try:
+            import orjson
+
+            _JSON_LOADS = orjson.loads
+        except ImportError:
+            _JSON_LOADS = json.loads
+    return _JSON_LOADS
+
+
+def _raw_endpoint(pure_1, resource):
+    """Return a function getting a raw page of resource, or None
+
+    The generated function of the endpoint is called through the retries
+    of the client with _preload_content=False, which skips building models.
+    These are internals of py-pure-client, so any client that does not
+    have them as expected gets None and the models are used instead.
+    """
+    if environ.get("PURE1_RAW_JSON", "1") == "0":
+        return None
+    suffix = "_{0}_get_with_http_info".format(resource)
+    try:
+        api = pure_1._Client__get_api_instance(
+            "".join(part.title() for part in resource.split("_")) + "Api"
+        )
+        call_with_retries = pure_1._call_with_retries
+        timeout = pure_1._timeout
+        names = [
+            name
+            for name in dir(api)
+            if name.startswith("api")
+            and name.endswith(suffix)
+            and name[3 : -len(suffix)].isdigit()
+        ]
+    except Exception:
+        return None
+    if len(names) != 1:
+        return None
+    api_function = getattr(api, names[0])
+
+    def fetch(**params):
+        return call_with_retries(
+            api_function, _preload_content=False, _request_timeout=timeout, **params
+        )
+
+    return fetch
+
+
+def _raw_error_message(err):
+    """Return the Pure1 error message of a failed raw request"""
+    try:
+        return json.loads(err.body)["errors"][0]["message"]
+    except Exception:
+        return str(err)
+
+
+class RawResponse(object):
+    """A successful Pure1 collection response with plain dict items"""
+
+    def __init__(self, total_item_count, items):
+        self.status_code = 200
+        self.total_item_count = total_item_count
+        self.items = items
+
+
+def get_collection(module, pure_1, resource, **params):
+    """Return the response of a Pure1 collection with its items as dicts
+
+    Each page of JSON is parsed, with orjson when it is installed, and its
+    items are returned as they are, instead of being validated into
+    pypureclient models, which dominates the time spent on large listings.
+    Later pages are fetched as the items are consumed, like res.items.
+    Attributes absent from the JSON are absent from the dicts, so callers
+    use get() where they used getattr() on the models.
+
+    The models are used, and converted with to_dict(), when the client
+    does not expose its generated endpoint functions, PURE1_RAW_JSON=0 or
+    the raw request of the first page fails in any way, so errors are
+    reported by the client as usual and a failed first request returns
+    its ErrorResponse. A failed later page fails the module.
+    """
+    fetch = _raw_endpoint(pure_1, resource)
+    loads = _json_loads()
+
+    def get_page(**page_params):
+        body = loads(fetch(**page_params).raw_data)
+        if not isinstance(body, dict):
+            raise ValueError("Unexpected response body")
+        return body
+
+    body = None
+    if fetch is not None:
+        try:
+            body = get_page(**params)
+        except Exception:
+            body = None
+    if body is None:
+        res = getattr(pure_1, "get_" + resource)(**params)
+        if res.status_code != 200:
+            return res
+        return RawResponse(res.total_item_count, (item.to_dict() for item in res.items))
+
+    def generate_items(body):
+        # Like res.items, limit is the number of items, not only a page size
+        remaining = params.get("limit")
+        while True:
+            items = body.get("items") or []
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            for item in items:
+                yield item
+            token = body.get("continuation_token")
+            if not token or not items or remaining == 0:
+                return
+            try:
+                body = get_page(continuation_token=token, **params)
+            except Exception as err:
+                module.fail_json(
+                    msg="Failed to get {0}. Error: {1}".format(
+                        resource, _raw_error_message(err)
+                    )
+                )
+
+    return RawResponse(body.get("total_item_count"), generate_items(body))
+
+
+def metric_history_requests(names, resources, start_time, end_time, resolution):
+    """Return (names, resources, start_time, end_time) for each request
+
+    Requests stay within METRIC_MAX_SERIES series and METRIC_MAX_POINTS
+    points per series. They are ordered by series batch, then window.
+    """
+    span = resolution * (METRIC_MAX_POINTS - 1)
+    windows = []
+    window_start = start_time
+    while window_start <= end_time:
+        windows.append((window_start, min(window_start + span, end_time)))
+        # Both ends are inclusive, so windows meet without sharing a sample
+        window_start += span + 1
+    requests = []
+    for name_batch in chunks(names, METRIC_MAX_SERIES):
+        per_request = max(1, METRIC_MAX_SERIES // len(name_batch))
+        for resource_batch in chunks(resources, per_request):
+            for window in windows:
+                requests.append((name_batch, resource_batch) + window)
+    return requests
+
+
+def get_metric_history(
+    module, pure_1, names, resources, start_time, end_time, resolution, aggregation
+):
+    """Yield (metric, resource, unit, data) for every metric and resource
+
+    Long time ranges and many series are split into requests the API
+    accepts, which are fetched concurrently, MAX_WORKERS at a time. The
+    windows of a series are merged in time order and each series is
+    yielded once its batch of requests is complete, so the caller can
+    stream the series out before later requests are even sent.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    requests = metric_history_requests(
+        names, resources, start_time, end_time, resolution
+    )
+
+    def fetch(request):
+        name_batch, resource_batch, window_start, window_end = request
+        try:
+            res = pure_1.get_metrics_history(
+                names=name_batch,
+                resource_names=resource_batch,
+                aggregation=aggregation,
+                resolution=resolution,
+                start_time=window_start,
+                end_time=window_end,
+            )
+            if res.status_code != 200:
+                return res.errors[0].message, []
+            return None, list(res.items)
+        except Exception as err:
+            return str(err), []
+
+    batch = None
+    series = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for request_batch in chunks(requests, MAX_WORKERS):
+            for request, (error, items) in zip(
+                request_batch, executor.map(fetch, request_batch)
+            ):
+                if error is not None:
+                    module.fail_json(
+                        msg="Failed to get metrics {0} for {1}. Error: {2}".format(
+                            ", ".join(request[0]), ", ".join(request[1]), error
+                        )
+                    )
+                if request[:2] != batch:
+                    for key in sorted(series):
+                        yield key + tuple(series[key])
+                    batch = request[:2]
+                    series = {}
+                for item in items:
+                    key = (item.name, item.resources[0].name)
+                    unit, data = series.setdefault(
+                        key, [getattr(item, "unit", None), []]
+                    )
+                    data.extend(getattr(item, "data", None) or [])
+    for key in sorted(series):
+        yield key + tuple(series[key])
+
+
+class MetricCache(object):
+    """Local store of metric history so only new samples are requested
+
+    Samples are kept in an SQLite database, one series per metric, resource,
+    resolution and aggregation, along with the time range each series has
+    been fetched for. A series only grows at either end of that range, so
+    it never has holes. Samples older than retention_days are removed when
+    the cache is opened and the file is compacted once a quarter of it is
+    free space. The file is not changed in check mode, see sqlite_connect.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS series (
+            id INTEGER PRIMARY KEY,
+            metric TEXT NOT NULL,
+            resource TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            aggregation TEXT NOT NULL,
+            unit TEXT,
+            first_time INTEGER NOT NULL,
+            last_time INTEGER NOT NULL,
+            UNIQUE (metric, resource, resolution, aggregation)
+        );
+        CREATE TABLE IF NOT EXISTS samples (
+            series_id INTEGER NOT NULL,
+            timestamp INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (series_id, timestamp)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, module, path, retention_days=None):
+        try:
+            import sqlite3
+        except ImportError:
+            module.fail_json(msg="Python sqlite3 support is required for cache_file")
+        self.module = module
+        self.path = path
+        try:
+            self.db = sqlite_connect(path, module.check_mode, timeout=60)
+            self.db.executescript(self.SCHEMA)
+        except (sqlite3.Error, OSError) as err:
+            module.fail_json(
+                msg="Failed to open metric cache {0}. Error: {1}".format(path, err)
+            )
+        if retention_days:
+            self.expire(int(time.time() * 1000) - retention_days * 86400000)
+
+    def _series(self, key):
+        return self.db.execute(
+            "SELECT id, unit, first_time, last_time FROM series"
+            " WHERE metric = ? AND resource = ? AND resolution = ?"
+            " AND aggregation = ?",
+            key,
+        ).fetchone()
+
+    def missing(self, key, start_time, end_time):
+        """Return the (start_time, end_time) windows to fetch for a series
+
+        The last cached sample is fetched again as it may have been
+        incomplete, and windows always adjoin the cached range.
+        """
+        series = self._series(key)
+        if series is None:
+            return [(start_time, end_time)]
+        dummy, dummy, first_time, last_time = series
+        windows = []
+        if start_time < first_time:
+            windows.append((start_time, first_time - 1))
+        if end_time >= last_time:
+            windows.append((last_time, end_time))
+        return windows
+
+    def store(self, key, unit, start_time, data):
+        """Add the samples of a series fetched from start_time"""
+        last_time = max([start_time] + [point[0] for point in data])
+        series = self._series(key)
+        if series is None:
+            series_id = self.db.execute(
+                "INSERT INTO series (metric, resource, resolution, aggregation,"
+                " unit, first_time, last_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (unit, start_time, last_time),
+            ).lastrowid
+        else:
+            series_id = series[0]
+            self.db.execute(
+                "UPDATE series SET unit = coalesce(?, unit),"
+                " first_time = min(first_time, ?), last_time = max(last_time, ?)"
+                " WHERE id = ?",
+                (unit, start_time, last_time, series_id),
+            )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO samples VALUES (?, ?, ?)",
+            [(series_id, point[0], point[1]) for point in data],
+        )
+
+    def load(self, key, start_time, end_time):
+        """Return the unit and cached samples of a series in a time range"""
+        series = self._series(key)
+        if series is None:
+            return None, []
+        return series[1], [
+            list(point)
+            for point in self.db.execute(
+                "SELECT timestamp, value FROM samples WHERE series_id = ?"
+                " AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                (series[0], start_time, end_time),
+            )
+        ]
+
+    def expire(self, cutoff):
+        """Remove samples from before cutoff and compact the file"""
+        self.db.execute("DELETE FROM samples WHERE timestamp < ?", (cutoff,))
+        self.db.execute(
+            "UPDATE series SET first_time = ?, last_time = max(last_time, ?)"
+            " WHERE first_time < ?",
+            (cutoff, cutoff, cutoff),
+        )
+        self.db.commit()
+        free_pages = self.db.execute("PRAGMA freelist_count").fetchone()[0]
+        pages = self.db.execute("PRAGMA page_count").fetchone()[0]
+        if free_pages * 4 > pages:
+            self.db.execute("VACUUM")
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def get_cached_metric_history(
+    module,
+    pure_1,
+    cache,
+    names,
+    resources,
+    start_time,
+    end_time,
+    resolution,
+    aggregation,
+):
+    """Yield (metric, resource, unit, data) like get_metric_history
+
+    Only the parts of the time range that are not in the MetricCache cache
+    are requested. Series missing the same windows share requests, so a
+    fleet cached at the same time is updated in one batched fetch.
+    """
+    names = sorted(set(names))
+    resources = sorted(set(resources))
+    fetches = {}
+    for name in names:
+        for resource in resources:
+            key = (name, resource, resolution, aggregation)
+            for window in cache.missing(key, start_time, end_time):
+                fetches.setdefault(window, {}).setdefault(name, []).append(resource)
+    for (window_start, window_end), by_name in sorted(fetches.items()):
+        groups = {}
+        for name, group_resources in sorted(by_name.items()):
+            groups.setdefault(tuple(group_resources), []).append(name)
+        for group_resources, group_names in groups.items():
+            for metric, resource, unit, data in get_metric_history(
+                module,
+                pure_1,
+                group_names,
+                list(group_resources),
+                window_start,
+                window_end,
+                resolution,
+                aggregation,
+            ):
+                cache.store(
+                    (metric, resource, resolution, aggregation),
+                    unit,
+                    window_start,
+                    data,
+                )
+            cache.commit()
+    for name in names:
+        for resource in resources:
+            unit, data = cache.load(
+                (name, resource, resolution, aggregation), start_time, end_time
+            )
+            yield name, resource, unit, data
+
+
+INDEX_KINDS = ["arrays", "volumes", "pods", "drives", "ports"]
+# Indexed attributes of fleet index objects, besides their kind and id
+INDEX_COLUMNS = ["name", "array", "serial", "pod"]
+# Objects written to the fleet index per statement, within the 999 host
+# parameters older SQLite versions allow
+INDEX_BATCH_SIZE = 500
+
+
+def normalize_serial(serial):
+    """Return a volume serial in upper case, as Pure1 reports them"""
+    if serial is None:
+        return None
+    return serial.upper()
+
+
+class FleetIndex(object):
+    """Local SQLite mirror of Pure1 fleet objects for fast lookups
+
+    Each object is stored with its kind, id, name, first array, volume
+    serial and pod, which are indexed, and its attributes as JSON. Syncing
+    a kind only writes the objects that were added, changed or removed
+    since the last sync.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS objects (
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            name TEXT,
+            array TEXT,
+            serial TEXT,
+            pod TEXT,
+            attributes TEXT NOT NULL,
+            PRIMARY KEY (kind, id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS objects_name ON objects (name, kind);
+        CREATE INDEX IF NOT EXISTS objects_array ON objects (array, kind);
+        CREATE INDEX IF NOT EXISTS objects_serial ON objects (serial);
+        CREATE INDEX IF NOT EXISTS objects_pod ON objects (pod, kind);
+        CREATE TABLE IF NOT EXISTS syncs (
+            kind TEXT PRIMARY KEY,
+            synced INTEGER NOT NULL,
+            objects INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, module, path, create=True):
+        try:
+            import sqlite3
+        except ImportError:
+            module.fail_json(msg="Python sqlite3 support is required for the index")
+        if not create and not os.path.exists(path):
+            module.fail_json(msg="Fleet index {0} does not exist".format(path))
+        self.module = module
+        try:
+            self.db = sqlite3.connect(path, timeout=60)
+            if create:
+                self.db.executescript(self.SCHEMA)
+        except sqlite3.Error as err:
+            module.fail_json(
+                msg="Failed to open fleet index {0}. Error: {1}".format(path, err)
+            )
+
+    def synced(self):
+        """Return the time in milliseconds and objects of the last sync by kind"""
+        return dict(
+            (kind, {"synced": synced, "objects": objects})
+            for kind, synced, objects in self.db.execute(
+                "SELECT kind, synced, objects FROM syncs"
+            )
+        )
+
+    def sync(self, kind, objects, synced):
+        """Replace the objects of kind, returning the ids added, changed and
+        removed and the number of objects
+
+        objects is an iterable of dicts with an id, the INDEX_COLUMNS and the
+        attributes of each object. It is read and written in batches of
+        INDEX_BATCH_SIZE, so a listing is never held in memory whole, and
+        the ids seen are kept in a temporary table to find the removed ones.
+        """
+        objects = iter(objects)
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM seen")
+        changes = {"added": [], "changed": [], "removed": []}
+        count = 0
+        while True:
+            batch = [
+                dict(record, serial=normalize_serial(record.get("serial")))
+                for record in itertools.islice(objects, INDEX_BATCH_SIZE)
+            ]
+            if not batch:
+                break
+            count += len(batch)
+            ids = [record["id"] for record in batch]
+            current = dict(
+                self.db.execute(
+                    "SELECT id, attributes FROM objects WHERE kind = ?"
+                    " AND id IN ({0})".format(", ".join("?" * len(ids))),
+                    [kind] + ids,
+                )
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO seen VALUES (?)",
+                [(object_id,) for object_id in ids],
+            )
+            rows = []
+            for record in batch:
+                attributes = json.dumps(record["attributes"], sort_keys=True)
+                previous = current.pop(record["id"], None)
+                if previous == attributes:
+                    continue
+                changes["added" if previous is None else "changed"].append(record["id"])
+                rows.append(
+                    (kind, record["id"])
+                    + tuple(record.get(column) for column in INDEX_COLUMNS)
+                    + (attributes,)
+                )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        changes["removed"] = [
+            object_id
+            for (object_id,) in self.db.execute(
+                "SELECT id FROM objects WHERE kind = ?"
+                " AND id NOT IN (SELECT id FROM seen) ORDER BY id",
+                (kind,),
+            )
+        ]
+        self.db.executemany(
+            "DELETE FROM objects WHERE kind = ? AND id = ?",
+            [(kind, object_id) for object_id in changes["removed"]],
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO syncs VALUES (?, ?, ?)", (kind, synced, count)
+        )
+        return changes, count
+
+    def lookup(self, kind=None, limit=None, **columns):
+        """Return the objects matching every given column value"""
+        conditions = []
+        values = []
+        columns["serial"] = normalize_serial(columns.get("serial"))
+        if kind:
+            conditions.append("kind = ?")
+            values.append(kind)
+        for column in INDEX_COLUMNS:
+            if columns.get(column) is not None:
+                conditions.append("{0} = ?".format(column))
+                values.append(columns[column])
+        query = "SELECT kind, id, {0}, attributes FROM objects".format(
+            ", ".join(INDEX_COLUMNS)
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY kind, name, id"
+        if limit:
+            query += " LIMIT ?"
+            values.append(limit)
+        objects = []
+        for row in self.db.execute(query, values):
+            record = dict(zip(["kind", "id"] + INDEX_COLUMNS, row[:-1]))
+            record["attributes"] = json.loads(row[-1])
+            objects.append(record)
+        return objects
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+# Statistics returned by summarize_series
+SUMMARY_STATISTICS = ["avg", "p95", "p99", "max", "rate"]
+_NUMPY = None
+
+
+def _numpy():
+    """Return the numpy module, or None when it is not installed"""
+    global _NUMPY
+    if _NUMPY is None:
+        try:
+            import numpy
+
+            _NUMPY = numpy
+        except ImportError:
+            _NUMPY = False
+    return _NUMPY or None
+
+
+def _summarize_numpy(numpy, data):
+    samples = numpy.array(data, dtype=float).reshape(-1, 2)
+    samples = samples[~numpy.isnan(samples[:, 1])]
+    if not len(samples):
+        return None
+    days = (samples[:, 0] - samples[0, 0]) / 86400000.0
+    values = samples[:, 1]
+    p95, p99 = numpy.percentile(values, [95, 99])
+    days = days - days.mean()
+    spread = (days * days).sum()
+    return {
+        "avg": float(values.mean()),
+        "p95": float(p95),
+        "p99": float(p99),
+        "max": float(values.max()),
+        "rate": float((days * values).sum() / spread) if spread else 0.0,
+    }
+
+
+def _interpolated_percentile(values, percent):
+    """Return the linearly interpolated percentile of sorted values"""
+    rank = (len(values) - 1) * percent / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def _summarize_python(data):
+    samples = [(point[0], float(point[1])) for point in data if point[1] is not None]
+    if not samples:
+        return None
+    first = samples[0][0]
+    samples = [((stamp - first) / 86400000.0, value) for stamp, value in samples]
+    values = sorted(value for dummy, value in samples)
+    average = sum(values) / len(values)
+    mean_day = sum(day for day, dummy in samples) / len(samples)
+    spread = sum((day - mean_day) ** 2 for day, dummy in samples)
+    covariance = sum((day - mean_day) * value for day, value in samples)
+    return {
+        "avg": average,
+        "p95": _interpolated_percentile(values, 95),
+        "p99": _interpolated_percentile(values, 99),
+        "max": values[-1],
+        "rate": covariance / spread if spread else 0.0,
+    }
+
+
+def summarize_series(data):
+    """Return the summary statistics of the samples of a metric series
+
+    data is a list of [timestamp, value] samples as returned by
+    get_metrics_history, with timestamps in milliseconds. The summary has
+    the avg, p95, p99 and max of the values and their rate of change per
+    day, the least squares slope over the series. Samples without a value
+    are skipped and a series without any returns None.
+
+    NumPy is used when it is installed, pure Python gives the same results.
+    """
+    numpy = _numpy()
+    if numpy is not None:
+        return _summarize_numpy(numpy, data)
+    return _summarize_python(data)
+
+
+def _forecast_numpy(numpy, series, capacities, threshold):
+    from itertools import chain
+
+    # All series are fitted at once, each sample tagged with its series row
+    lengths = [len(data) for data in series]
+    samples = numpy.array(
+        list(chain.from_iterable(chain.from_iterable(series))), dtype=float
+    ).reshape(-1, 2)
+    rows = numpy.repeat(numpy.arange(len(series)), lengths)
+    valid = ~numpy.isnan(samples[:, 1])
+    samples, rows = samples[valid], rows[valid]
+    forecasts = [(None, None, None)] * len(series)
+    if not len(samples):
+        return forecasts
+    days = (samples[:, 0] - samples[:, 0].min()) / 86400000.0
+    values = samples[:, 1]
+    counts = numpy.bincount(rows, minlength=len(series))
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        mean_days = numpy.bincount(rows, days, len(series)) / counts
+        spread = days - mean_days[rows]
+        squares = numpy.bincount(rows, spread * spread, len(series))
+        growth = numpy.where(
+            squares > 0,
+            numpy.bincount(rows, spread * values, len(series)) / squares,
+            0.0,
+        )
+        # Samples are grouped by series in time order, so the last sample of
+        # each series is current and at the running total of the counts
+        used = numpy.full(len(series), numpy.nan)
+        present = counts > 0
+        used[present] = values[(numpy.cumsum(counts) - 1)[present]]
+        limit = numpy.array(
+            [numpy.nan if capacity is None else capacity for capacity in capacities],
+            dtype=float,
+        ) * (threshold / 100.0)
+        remaining = numpy.where(
+            used >= limit,
+            0.0,
+            numpy.where(growth > 0, (limit - used) / growth, numpy.nan),
+        )
+    for row, current, rate, days in zip(
+        numpy.flatnonzero(counts).tolist(),
+        used[present].tolist(),
+        growth[present].tolist(),
+        remaining[present].tolist(),
+    ):
+        forecasts[row] = (current, rate, None if days != days else days)
+    return forecasts
+
+
+def _forecast_python(series, capacities, threshold):
+    forecasts = []
+    for data, capacity in zip(series, capacities):
+        samples = [
+            (point[0] / 86400000.0, float(point[1]))
+            for point in data
+            if point[1] is not None
+        ]
+        if not samples:
+            forecasts.append((None, None, None))
+            continue
+        mean_day = sum(day for day, dummy in samples) / len(samples)
+        squares = sum((day - mean_day) ** 2 for day, dummy in samples)
+        growth = 0.0
+        if squares:
+            growth = sum((day - mean_day) * value for day, value in samples) / squares
+        used = samples[-1][1]
+        remaining = None
+        if capacity is not None:
+            limit = capacity * threshold / 100.0
+            if used >= limit:
+                remaining = 0.0
+            elif growth > 0:
+                remaining = (limit - used) / growth
+        forecasts.append((used, growth, remaining))
+    return forecasts
+
+
+def forecast_capacity(series, capacities, threshold):
+    """Return (used, growth per day, days to threshold) for each series
+
+    series is a list of used space series as returned by get_metrics_history
+    and capacities the matching capacities, or None when unknown. Growth is
+    the least squares slope of each series, the days to threshold how long
+    until the latest used space grows to threshold percent of capacity at
+    that rate. It is 0 when already there and None when it is never reached.
+
+    With NumPy every series is fitted in a single vectorized pass, so ranking
+    a whole fleet takes milliseconds once the history has been fetched.
+    """
+    numpy = _numpy()
+    if numpy is not None:
+        return _forecast_numpy(numpy, series, capacities, threshold)
+    return _forecast_python(series, capacities, threshold)
+
+
+def timestamp_column_type(module):
+    """Return the OutputFile column type of timestamps in timestamp_format"""
+    if module.params.get("timestamp_format") == "epoch_ms":
+        return "timestamp_ms"
+    return "string"
+
+
 def pure1_argument_spec():
     """Return standard base dictionary used for the argument_spec argument in AnsibleModule"""
 
@@ -114,4 +1655,7 @@ def pure1_argument_spec():
         app_id=dict(no_log=True, required=True),
         key_file=dict(no_log=False, required=True),
         password=dict(no_log=True),
+        timestamp_format=dict(type="str", default="legacy", choices=TIMESTAMP_FORMATS),
+        debug_metrics=dict(type="bool", default=False),
+        debug_metrics_trace=dict(type="path"),
     )
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Copyright (c), Simon Dodsley <simon@purestorage.com>,2026
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import threading
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    CassetteError,
+    _pure1_versioned,
+    decoded_headers,
+)
+
+CASSETTE_MODES = ["record", "replay"]
+# Query parameters derived from the current time, ignored when replaying
+CASSETTE_VOLATILE_PARAMS = ["start_time", "end_time"]
+# Attributes Client.__init__ sets, which replay_client sets instead
+REPLAY_CLIENT_ATTRIBUTES = [
+    "_Client__apis_instances",
+    "_api_client",
+    "_retries",
+    "_timeout",
+    "_token_man",
+]
+
+
+def client_attributes(client_class):
+    """Return the attributes the __init__ of client_class sets on self"""
+    import dis
+
+    try:
+        instructions = dis.get_instructions(client_class.__init__)
+        return set(
+            instruction.argval
+            for instruction in instructions
+            if instruction.opname == "STORE_ATTR"
+        )
+    except (AttributeError, TypeError):
+        return set()
+
+
+class Cassette(object):
+    """Recorded Pure1 API responses for deterministic, offline runs
+
+    A cassette is a gzip compressed file of JSON lines, one per HTTP
+    request, holding the request method, URL path and query, and body with
+    the response status, headers, body and latency. Recording appends a
+    gzip member per module run, so one cassette can capture a whole play.
+
+    Replaying serves responses in recorded order for each request, reusing
+    the last one once they run out, and sleeps for the recorded latency
+    multiplied by latency_scale. Requests are matched exactly, then with
+    time derived query parameters ignored, so time ranges computed from
+    the current time still match. No access token is requested on replay.
+    """
+
+    def __init__(self, path, mode="replay", latency_scale=1.0):
+        if mode not in CASSETTE_MODES:
+            raise CassetteError(
+                "PURE1_CASSETTE_MODE must be one of {0}".format(
+                    ", ".join(CASSETTE_MODES)
+                )
+            )
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._file = None
+        self._exact = {}
+        self._loose = {}
+
+    @staticmethod
+    def _location(url, volatile=False):
+        parts = urlsplit(url)
+        query = parts.query
+        if volatile:
+            query = "&".join(
+                param
+                for param in query.split("&")
+                if param.split("=", 1)[0] not in CASSETTE_VOLATILE_PARAMS
+            )
+        return parts.path + ("?" + query if query else "")
+
+    @staticmethod
+    def _body(body, post_params):
+        if body is None and not post_params:
+            return None
+        return json.dumps(body if body is not None else post_params, sort_keys=True)
+
+    def record(self, pure_1):
+        """Append every response of pure_1 to the cassette"""
+        import atexit
+
+        api_client = pure_1._api_client
+        request = api_client.request
+
+        def recorded_request(
+            method,
+            url,
+            query_params=None,
+            headers=None,
+            post_params=None,
+            body=None,
+            **kwargs
+        ):
+            start = time.time()
+            response = None
+            try:
+                response = request(
+                    method,
+                    url,
+                    query_params=query_params,
+                    headers=headers,
+                    post_params=post_params,
+                    body=body,
+                    **kwargs
+                )
+                return response
+            except Exception as err:
+                response = err
+                raise
+            finally:
+                if getattr(response, "status", None):
+                    self._write(
+                        method,
+                        url,
+                        self._body(body, post_params),
+                        response,
+                        time.time() - start,
+                    )
+
+        api_client.request = recorded_request
+        atexit.register(self.close)
+
+    def _write(self, method, url, body, response, duration):
+        data = getattr(response, "data", None)
+        if data is None:
+            data = getattr(response, "body", None)
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        headers = (
+            response.getheaders()
+            if hasattr(response, "getheaders")
+            else getattr(response, "headers", None)
+        )
+        interaction = {
+            "method": method,
+            "url": self._location(url),
+            "body": body,
+            "status": response.status,
+            "reason": response.reason,
+            "headers": decoded_headers(headers),
+            "data": data,
+            "duration": round(duration, 6),
+        }
+        with self._lock:
+            if self._file is None:
+                import gzip
+
+                self._file = gzip.open(self.path, "at")
+            self._file.write(json.dumps(interaction) + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def load(self):
+        """Index the recorded interactions of the cassette"""
+        import gzip
+
+        with gzip.open(self.path, "rt") as cassette:
+            try:
+                for line in cassette:
+                    interaction = json.loads(line)
+                    for index, volatile in [(self._exact, False), (self._loose, True)]:
+                        key = (
+                            interaction["method"],
+                            self._location(interaction["url"], volatile),
+                            interaction["body"],
+                        )
+                        index.setdefault(key, []).append(interaction)
+            except EOFError:
+                # A run that did not exit cleanly leaves a truncated member
+                pass
+
+    def _lookup(self, method, url, body):
+        with self._lock:
+            for index, volatile in [(self._exact, False), (self._loose, True)]:
+                interactions = index.get((method, self._location(url, volatile), body))
+                if interactions:
+                    if len(interactions) > 1:
+                        return interactions.pop(0)
+                    return interactions[0]
+        return None
+
+    def replay_client(self, configuration):
+        """Return a Pure1 client serving responses from the cassette"""
+        from pypureclient._helpers import create_api_client
+        from pypureclient._transport.exceptions import ApiException
+        from pypureclient._transport.rest import RESTResponse
+        from urllib3 import HTTPResponse
+
+        try:
+            self.load()
+        except (IOError, OSError, ValueError) as err:
+            raise CassetteError(
+                "Failed to read cassette {0}. Error: {1}".format(self.path, err)
+            )
+        versioned = _pure1_versioned()
+        # Client.__init__ always exchanges a token with Pure1, so it is
+        # bypassed and its attributes set here instead. That is only safe
+        # while __init__ sets exactly these, which py-pure-client may change.
+        attributes = client_attributes(versioned.Client)
+        if attributes != set(REPLAY_CLIENT_ATTRIBUTES):
+            raise CassetteError(
+                "Replaying a cassette is not supported by this version of"
+                " py-pure-client, its Client sets {0} instead of {1}".format(
+                    ", ".join(sorted(attributes)),
+                    ", ".join(sorted(REPLAY_CLIENT_ATTRIBUTES)),
+                )
+            )
+        pure_1 = versioned.Client.__new__(versioned.Client)
+        pure_1._token_man = None
+        pure_1._retries = 5
+        pure_1._timeout = 15.0
+        pure_1._Client__apis_instances = {}
+        pure_1._api_client = create_api_client(
+            configuration=configuration,
+            user_agent=None,
+            _models_package=versioned.models,
+        )
+
+        def replayed_request(
+            method,
+            url,
+            query_params=None,
+            headers=None,
+            post_params=None,
+            body=None,
+            **kwargs
+        ):
+            interaction = self._lookup(method, url, self._body(body, post_params))
+            if interaction is None:
+                raise ApiException(
+                    status=0,
+                    reason="No response recorded in {0} for {1} {2}".format(
+                        self.path, method, self._location(url)
+                    ),
+                )
+            if self.latency_scale:
+                time.sleep(interaction["duration"] * self.latency_scale)
+            response = RESTResponse(
+                HTTPResponse(
+                    body=(interaction["data"] or "").encode("utf-8"),
+                    headers=interaction["headers"],
+                    status=interaction["status"],
+                    reason=interaction["reason"],
+                    preload_content=True,
+                )
+            )
+            if not 200 <= response.status <= 299:
+                raise ApiException(http_resp=response)
+            return response
+
+        pure_1._api_client.request = replayed_request
+        return pure_1
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+# This code is part of Ansible, but is an independent component.
+# This particular file snippet, and this file snippet only, is BSD licensed.
+# Modules you write using this snippet, which is embedded dynamically by Ansible
+# still belong to the author of the module, and may assign their own license
+# to the complete work.
+#
+# Copyright (c), Simon Dodsley <simon@purestorage.com>,2026
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without modification,
+# are permitted provided that the following conditions are met:
+#
+#    * Redistributions of source code must retain the above copyright
+#      notice, this list of conditions and the following disclaimer.
+#    * Redistributions in binary form must reproduce the above copyright notice,
+#      this list of conditions and the following disclaimer in the documentation
+#      and/or other materials provided with the distribution.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED.
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE
+# USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from os import environ
+import os
+import time
+
+PROFILERS = ["cprofile", "pyinstrument"]
+
+
+def profile_module(module):
+    """Profile module until it exits when PURE1_PROFILE is set
+
+    PURE1_PROFILE names the directory the profile is written to, one file
+    per module run named after the module and its gather_subset.
+    PURE1_PROFILER selects cProfile, the default, or pyinstrument.
+    """
+    directory = environ.get("PURE1_PROFILE")
+    if not directory:
+        return
+    profiler_name = environ.get("PURE1_PROFILER", "cprofile").lower()
+    if profiler_name not in PROFILERS:
+        module.warn(
+            "PURE1_PROFILER must be one of {0}, using cprofile".format(
+                ", ".join(PROFILERS)
+            )
+        )
+        profiler_name = "cprofile"
+    if profiler_name == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            module.warn("pyinstrument is not installed, using cprofile")
+            profiler_name = "cprofile"
+    if profiler_name == "cprofile":
+        from cProfile import Profile as Profiler
+    profiler = Profiler()
+    name = "-".join(
+        [getattr(module, "_name", "module").replace(".", "_")]
+        + sorted(module.params.get("gather_subset") or [])
+        + [time.strftime("%Y%m%dT%H%M%S"), str(os.getpid())]
+    )
+    path = os.path.join(
+        directory, name + (".prof" if profiler_name == "cprofile" else ".html")
+    )
+    exit_json = module.exit_json
+    fail_json = module.fail_json
+
+    def profiled(method):
+        def finish(**kwargs):
+            # exit_json serialises the result and exits, so stop afterwards
+            try:
+                method(**kwargs)
+            finally:
+                if profiler_name == "cprofile":
+                    profiler.disable()
+                else:
+                    profiler.stop()
+                # The result has been returned already, so no warning can be added
+                try:
+                    if not os.path.isdir(directory):
+                        os.makedirs(directory)
+                    if profiler_name == "cprofile":
+                        profiler.dump_stats(path)
+                    else:
+                        with open(path, "w") as profile_file:
+                            profile_file.write(profiler.output_html())
+                except (IOError, OSError):
+                    pass
+
+        return finish
+
+    module.exit_json = profiled(exit_json)
+    module.fail_json = profiled(fail_json)
+    if profiler_name == "cprofile":
+        profiler.enable()
+    else:
+        profiler.start()
@@ -39,6 +39,13 @@ options:
     type: str
     default: open
     choices: [ open, closed ]
+  output_file:
+    description:
+      - Path of a file on the target to write alerts to as newline
+        delimited JSON, one alert per line, as they are received.
+      - When set only a summary of the export is returned, avoiding very
+        large registered variables for fleet-wide exports.
+    type: path
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
 """
@@ -48,55 +55,57 @@ EXAMPLES = r"""
   purestorage.pure1.pure1_alerts:
     name: foo
     severity: critical
+
+- name: export all open warning alerts for the fleet to a file
+  purestorage.pure1.pure1_alerts:
+    severity: warning
+    output_file: /tmp/pure1_alerts.ndjson
 """
 
 RETURN = r"""
 alert_info:
-  description: Returns information on appliance alerts
+  description:
+    - Returns information on appliance alerts
+    - When I(output_file) is set, returns the output file path and number of records written
   returned: always
   type: dict
 """
 
 
+import itertools
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    OutputFile,
+    format_timestamp,
+    get_collection,
     get_pure1,
     pure1_argument_spec,
 )
-import time
 
+ALERT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-def main():
-    argument_spec = pure1_argument_spec()
-    argument_spec.update(
-        dict(
-            name=dict(type="str"),
-            severity=dict(
-                type="str",
-                choices=["info", "warning", "critical", "hidden"],
-                required=True,
-            ),
-            state=dict(default="open", type="str", choices=["open", "closed"]),
-        )
-    )
 
-    module = AnsibleModule(argument_spec, supports_check_mode=True)
-    pure_1 = get_pure1(module)
-    index = 0
-    alert_info = {}
+def generate_alert_records(module, pure_1):
+    """Yield alert details as each page of alerts is received"""
+    alert_filter = (
+        "severity='"
+        + module.params["severity"]
+        + "' and state='"
+        + module.params["state"]
+        + "'"
+    )
     if module.params["name"]:
-        alerts = list(
-            pure_1.get_alerts(
-                filter="arrays.name='"
-                + module.params["name"]
-                + "' and severity='"
-                + module.params["severity"]
-                + "' and state='"
-                + module.params["state"]
-                + "'"
-            ).items
+        alert_filter = "arrays.name='" + module.params["name"] + "' and " + alert_filter
+    res = get_collection(module, pure_1, "alerts", filter=alert_filter)
+    if res.status_code != 200:
+        module.fail_json(
+            msg="Failed to get alerts. Error: {0}".format(res.errors[0].message)
         )
-        if not alerts:
+    alerts = iter(res.items)
+    first = next(alerts, None)
+    if first is None:
+        if module.params["name"]:
             module.fail_json(
                 msg="No {0} alerts of severity {1} for array {2} found.".format(
                     module.params["state"],
@@ -104,52 +113,82 @@ def main():
                     module.params["name"],
                 )
             )
-    else:
-        alerts = list(
-            pure_1.get_alerts(
-                filter="severity='"
-                + module.params["severity"]
-                + "' and state='"
-                + module.params["state"]
-                + "'"
-            ).items
-        )
-        if not alerts:
-            module.fail_json(
-                msg="Failed to get any {0} alerts of severity {1} for the fleet.".format(
-                    module.params["state"], module.params["severity"]
-                )
+        module.fail_json(
+            msg="Failed to get any {0} alerts of severity {1} for the fleet.".format(
+                module.params["state"], module.params["severity"]
             )
+        )
 
-    for alert in range(0, len(alerts)):
-        alert_info[index] = {
-            "component_type": getattr(alerts[alert], "component_type", None),
-            "component_name": getattr(alerts[alert], "component_name", None),
-            "code": alerts[alert].code,
-            "category": getattr(alerts[alert], "category", None),
-            "summary": alerts[alert].summary,
+    for alert in itertools.chain([first], alerts):
+        alert_info = {
+            "component_type": alert.get("component_type"),
+            "component_name": alert.get("component_name"),
+            "code": alert.get("code"),
+            "category": alert.get("category"),
+            "summary": alert.get("summary"),
         }
-        if getattr(alerts[alert], "created", 0) != 0:
-            alert_info[index]["created"] = time.strftime(
-                "%Y-%m-%d %H:%M:%S", time.localtime(int(alerts[alert].created) / 1000)
+        if alert.get("created") not in (None, 0):
+            alert_info["created"] = format_timestamp(
+                module,
+                alert.get("created"),
+                legacy_format=ALERT_TIME_FORMAT,
+                legacy_localtime=True,
             )
-        if getattr(alerts[alert], "updated", 0) != 0:
-            alert_info[index]["updated"] = time.strftime(
-                "%Y-%m-%d %H:%M:%S", time.localtime(int(alerts[alert].updated) / 1000)
+        if alert.get("updated") not in (None, 0):
+            alert_info["updated"] = format_timestamp(
+                module,
+                alert.get("updated"),
+                legacy_format=ALERT_TIME_FORMAT,
+                legacy_localtime=True,
             )
-        if getattr(alerts[alert], "notified", 0) != 0:
-            alert_info[index]["notified"] = time.strftime(
-                "%Y-%m-%d %H:%M:%S", time.localtime(int(alerts[alert].notified) / 1000)
+        if alert.get("notified") not in (None, 0):
+            alert_info["notified"] = format_timestamp(
+                module,
+                alert.get("notified"),
+                legacy_format=ALERT_TIME_FORMAT,
+                legacy_localtime=True,
             )
         if module.params["state"] == "closed":
-            if getattr(alerts[alert], "closed", 0) != 0:
-                alert_info[index]["closed"] = time.strftime(
-                    "%Y-%m-%d %H:%M:%S",
-                    time.localtime(int(alerts[alert].closed) / 1000),
+            if alert.get("closed") not in (None, 0):
+                alert_info["closed"] = format_timestamp(
+                    module,
+                    alert.get("closed"),
+                    legacy_format=ALERT_TIME_FORMAT,
+                    legacy_localtime=True,
                 )
         if not module.params["name"]:
-            alert_info[index]["appliance_name"] = alerts[alert].arrays[0].name
-        index += 1
+            alert_info["appliance_name"] = alert["arrays"][0].get("name")
+        yield alert_info
+
+
+def main():
+    argument_spec = pure1_argument_spec()
+    argument_spec.update(
+        dict(
+            name=dict(type="str"),
+            severity=dict(
+                type="str",
+                choices=["info", "warning", "critical", "hidden"],
+                required=True,
+            ),
+            state=dict(default="open", type="str", choices=["open", "closed"]),
+            output_file=dict(type="path"),
+        )
+    )
+
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+    pure_1 = get_pure1(module)
+    index = 0
+    alert_info = {}
+    if module.params["output_file"]:
+        output = OutputFile(module)
+        for alert in generate_alert_records(module, pure_1):
+            output.write(alert)
+        alert_info = output.close()
+    else:
+        for alert in generate_alert_records(module, pure_1):
+            alert_info[index] = alert
+            index += 1
 
     module.exit_json(changed=False, alert_info=alert_info)
 
@@ -26,14 +26,24 @@ author:
 options:
   name:
     description:
-    - The name of the array.
+    - The names of the arrays.
+    - A single array name is also accepted.
+    - Cannot be used with I(filter).
+    type: list
+    elements: str
+  filter:
+    description:
+    - Pure1 filter selecting the arrays to manage the tags of,
+      eg. C(os='Purity//FA').
+    - Cannot be used with I(name).
     type: str
-    required: true
   tag:
     description:
     - List of key value pairs to assign to the array.
     - Seperate the key from the value using a colon (:) only.
     - See examples for exact formatting requirements
+    - With I(state=absent) a tag given as C(key:value) is only removed when
+      it has that value, a tag given as a C(key) alone is always removed.
     type: list
     elements: str
     required: true
@@ -43,6 +53,13 @@ options:
     default: present
     choices: [ absent, present ]
     type: str
+  purge:
+    description:
+    - Remove any tags of the arrays that are not in I(tag), so the arrays
+      end up with exactly the tags given.
+    - Only used with I(state=present).
+    type: bool
+    default: false
 extends_documentation_fragment:
 - purestorage.pure1.purestorage.p1
 """
@@ -68,6 +85,39 @@ EXAMPLES = r"""
     password: PassW0rd!
     state: absent
 
+- name: Tag every FlashArray in the fleet
+  purestorage.pure1.pure1_array_tags:
+    filter: "os='Purity//FA'"
+    tag:
+    - 'env:prod'
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+    password: PassW0rd!
+
+- name: Make key1 and key2 the only tags of arrays foo and bar
+  purestorage.pure1.pure1_array_tags:
+    name:
+    - foo
+    - bar
+    tag:
+    - 'key1:value1'
+    - 'key2:value2'
+    purge: true
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+    password: PassW0rd!
+
+- name: Plan a fleet wide tag rollout without changing any tags
+  purestorage.pure1.pure1_array_tags:
+    filter: "os='Purity//FB'"
+    tag:
+    - 'env:prod'
+    purge: true
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+  check_mode: true
+  diff: true
+
 - name: Update an existing tag for array foo
   purestorage.pure1.pure1_array_tags:
     name: foo
@@ -79,149 +129,231 @@ EXAMPLES = r"""
 """
 
 RETURN = r"""
+arrays:
+  description:
+    - Whether the tags of each selected array were changed, by array name
+  returned: always
+  type: dict
+  sample: {"foo": true, "bar": false}
+diff:
+  description:
+    - With C(--diff), the tags of each changed array before and after the
+      change, including in check mode
+  returned: diff mode
+  type: list
+  elements: dict
 """
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    FILTER_BATCH_SIZE,
+    any_of_filter,
+    chunks,
     get_pure1,
     pure1_argument_spec,
+    run_concurrently,
 )
 
 
-def create_tag(module, pure_1):
-    """Create Array Tag"""
-    changed = True
-    if not module.check_mode:
-        for tag in range(0, len(module.params["tag"])):
-            key = module.params["tag"][tag].split(":")[0]
-            value = module.params["tag"][tag].split(":")[1]
-            tag = {"key": key, "value": value}
-            res = pure_1.put_arrays_tags(
-                resource_names=[module.params["name"]], tag=tag
-            )
-            if res.status_code != 200:
+def parse_tags(module):
+    """Return the tag parameter as a dict of key to value
+
+    A key without a value, only allowed with state=absent, maps to None.
+    """
+    tags = {}
+    for tag in module.params["tag"]:
+        key, separator, value = tag.partition(":")
+        if not separator:
+            if module.params["state"] == "present":
                 module.fail_json(
-                    msg="Failed to add tag KVP {0} to array {1}. Error: {2}".format(
-                        module.params["tag"][tag],
-                        module.params["name"],
-                        res.errors[0].message,
-                    )
+                    msg="Tag {0} must be in the format key:value".format(tag)
                 )
-    module.exit_json(changed=changed)
+            value = None
+        tags[key] = value
+    return tags
 
 
-def update_tag(module, pure_1, current_tags):
-    """Update Array Tag"""
-    changed = False
-    if not module.check_mode:
-        for tag in range(0, len(module.params["tag"])):
-            tag_exists = False
-            for current_tag in range(0, len(current_tags)):
-                if (
-                    module.params["tag"][tag].split(":")[0]
-                    == current_tags[current_tag].key
-                ):
-                    tag_exists = True
-                    if (
-                        module.params["tag"][tag].split(":")[1]
-                        != current_tags[current_tag].value
-                    ):
-                        key = module.params["tag"][tag].split(":")[0]
-                        value = module.params["tag"][tag].split(":")[1]
-                        tag = {"key": key, "value": value}
-                        res = pure_1.put_arrays_tags(
-                            resource_names=[module.params["name"]], tag=tag
-                        )
-                        if res.status_code == 200:
-                            changed = True
-                        else:
-                            module.fail_json(
-                                msg="Failed to update tag '{0}' from volume {1}. Error: {2}".format(
-                                    module.params["tag"][tag].split(":")[0],
-                                    module.params["name"],
-                                    res.errors[0].message,
-                                )
-                            )
-            if not tag_exists:
-                key = module.params["tag"][tag].split(":")[0]
-                value = module.params["tag"][tag].split(":")[1]
-                tag = {"key": key, "value": value}
-                res = pure_1.put_arrays_tags(
-                    resource_names=[module.params["name"]], tag=tag
+def get_array_names(module, pure_1):
+    """Return the names of the selected arrays, failing on unknown names"""
+    if module.params["filter"]:
+        res = pure_1.get_arrays(filter=module.params["filter"])
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to get arrays matching {0}. Error: {1}".format(
+                    module.params["filter"], res.errors[0].message
                 )
-                if res.status_code == 200:
-                    changed = True
-                else:
-                    module.fail_json(
-                        msg="Failed to add tag KVP {0} to volume {1}. Error: {2}".format(
-                            module.params["tag"][tag].split(":")[0],
-                            module.params["name"],
-                            res.errors[0].message,
-                        )
-                    )
-    module.exit_json(changed=changed)
-
-
-def delete_tag(module, pure_1, current_tags):
-    """Delete Array Tag"""
-    changed = False
-    if not module.check_mode:
-        for tag in range(0, len(module.params["tag"])):
-            for current_tag in range(0, len(current_tags)):
-                if (
-                    module.params["tag"][tag].split(":")[0]
-                    == current_tags[current_tag].key
-                ):
-                    res = pure_1.delete_arrays_tags(
-                        resource_names=[module.params["name"]],
-                        keys=module.params["tag"][tag].split(":")[0],
-                    )
-                    if res.status_code == 200:
-                        changed = True
-                    else:
-                        module.fail_json(
-                            msg="Failed to remove tag KVP '{0}' from volume {1}. Error: {2}".format(
-                                module.params["tag"][tag],
-                                module.params["name"],
-                                res.errors[0].message,
-                            )
-                        )
-    module.exit_json(changed=changed)
+            )
+        return sorted(set(array.name for array in res.items))
+    names = sorted(set(module.params["name"]))
+
+    def get_batch(batch):
+        res = pure_1.get_arrays(names=batch)
+        if res.status_code == 200:
+            return None, [array.name for array in res.items]
+        # Pure1 rejects a whole names batch with an unknown name, filters
+        # return the arrays that exist so the unknown names can be reported
+        found = []
+        for filter_batch in chunks(batch, FILTER_BATCH_SIZE):
+            filtered = pure_1.get_arrays(filter=any_of_filter("name", filter_batch))
+            if filtered.status_code != 200:
+                return res, []
+            found.extend(array.name for array in filtered.items)
+        return None, found
+
+    found = set()
+    for error, batch_found in run_concurrently(get_batch, chunks(names)):
+        if error:
+            module.fail_json(
+                msg="Failed to get arrays {0}. Error: {1}".format(
+                    ", ".join(names), error.errors[0].message
+                )
+            )
+        found.update(batch_found)
+    missing = [name for name in names if name not in found]
+    if missing:
+        module.fail_json(msg="Array {0} does not exist.".format(", ".join(missing)))
+    return names
+
+
+def get_current_tags(module, pure_1, names, keys=None):
+    """Return a dict of the current tags, or only the tags in keys, by array"""
+
+    def get_tags(batch):
+        res = pure_1.get_arrays_tags(resource_names=batch, keys=keys)
+        return res, list(res.items) if res.status_code == 200 else []
+
+    current_tags = dict((name, {}) for name in names)
+    for res, items in run_concurrently(get_tags, chunks(names)):
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to get array tags. Error: {0}".format(res.errors[0].message)
+            )
+        for tag in items:
+            current_tags[tag.resource.name][tag.key] = tag.value
+    return current_tags
+
+
+def plan_changes(module, tags, current):
+    """Return the tags to add, update and delete to reconcile current with tags"""
+    plan = {"add": {}, "update": {}, "delete": {}}
+    if module.params["state"] == "present":
+        for key, value in tags.items():
+            if key not in current:
+                plan["add"][key] = value
+            elif current[key] != value:
+                plan["update"][key] = value
+        if module.params["purge"]:
+            for key, value in current.items():
+                if key not in tags:
+                    plan["delete"][key] = value
+    else:
+        for key, value in tags.items():
+            if key in current and value in (None, current[key]):
+                plan["delete"][key] = current[key]
+    return plan
+
+
+def plan_diff(name, current, plan):
+    """Return the Ansible diff of the tags of an array for plan"""
+    after = dict(current)
+    for key in plan["delete"]:
+        del after[key]
+    after.update(plan["add"])
+    after.update(plan["update"])
+    return {
+        "before_header": name,
+        "after_header": name,
+        "before": current,
+        "after": after,
+    }
+
+
+def apply_plans(module, pure_1, plans):
+    """Apply the plan of each array in as few requests as possible
+
+    Arrays with identical plans share batched requests, one to set tags
+    and one to delete them, which run concurrently.
+    """
+    groups = {}
+    for name, plan in plans.items():
+        put = dict(plan["add"])
+        put.update(plan["update"])
+        change = (tuple(sorted(put.items())), tuple(sorted(plan["delete"])))
+        if any(change):
+            groups.setdefault(change, []).append(name)
+    requests = []
+    for (put, delete), names in groups.items():
+        for batch in chunks(names):
+            if put:
+                requests.append(("set", put, batch))
+            if delete:
+                requests.append(("remove", delete, batch))
+
+    def apply(request):
+        action, change, batch = request
+        if action == "set":
+            return pure_1.put_arrays_tags(
+                resource_names=batch,
+                tag_put=[{"key": key, "value": value} for key, value in change],
+            )
+        return pure_1.delete_arrays_tags(resource_names=batch, keys=list(change))
+
+    for (action, change, batch), res in zip(
+        requests, run_concurrently(apply, requests)
+    ):
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to {0} tags {1} on arrays {2}. Error: {3}".format(
+                    action,
+                    ", ".join(key if action == "remove" else key[0] for key in change),
+                    ", ".join(batch),
+                    res.errors[0].message,
+                )
+            )
 
 
 def main():
     argument_spec = pure1_argument_spec()
     argument_spec.update(
         dict(
-            name=dict(type="str", required=True),
+            name=dict(type="list", elements="str"),
+            filter=dict(type="str"),
             state=dict(type="str", default="present", choices=["absent", "present"]),
             tag=dict(type="list", elements="str", required=True),
+            purge=dict(type="bool", default=False),
         )
     )
 
-    module = AnsibleModule(argument_spec, supports_check_mode=True)
+    module = AnsibleModule(
+        argument_spec,
+        required_one_of=[["name", "filter"]],
+        mutually_exclusive=[["name", "filter"]],
+        supports_check_mode=True,
+    )
 
-    state = module.params["state"]
+    tags = parse_tags(module)
+    purge = module.params["purge"] and module.params["state"] == "present"
     pure_1 = get_pure1(module)
 
-    array = pure_1.get_arrays()
-
-    if array.status_code != 200:
-        module.fail_json(msg="Array {0} does not exist.".format(module.params["name"]))
-    current_tags = list(
-        pure_1.get_arrays_tags(resource_names=[module.params["name"]]).items
+    names = get_array_names(module, pure_1)
+    # Purging and a full diff need every tag, otherwise the requested keys do
+    current_tags = get_current_tags(
+        module, pure_1, names, keys=None if purge or module._diff else sorted(tags)
     )
-
-    if state == "present" and not current_tags:
-        create_tag(module, pure_1)
-    elif state == "absent" and not current_tags:
-        module.exit_json(changed=False)
-    elif state == "present" and current_tags:
-        update_tag(module, pure_1, current_tags)
-    elif state == "absent" and current_tags:
-        delete_tag(module, pure_1, current_tags)
-
-    module.exit_json(changed=False)
+    plans = dict(
+        (name, plan_changes(module, tags, current_tags[name])) for name in names
+    )
+    if not module.check_mode:
+        apply_plans(module, pure_1, plans)
+    arrays = dict((name, any(plan.values())) for name, plan in plans.items())
+    result = dict(changed=any(arrays.values()), arrays=arrays)
+    if module._diff:
+        result["diff"] = [
+            plan_diff(name, current_tags[name], plans[name])
+            for name in names
+            if arrays[name]
+        ]
+    module.exit_json(**result)
 
 
 if __name__ == "__main__":
@@ -26,21 +26,71 @@ options:
     description:
       - Filter to provide only drives for a specifically named array or blade
     type: str
+  output_file:
+    description:
+      - Path of a file on the target to write drives to, in
+        I(output_format), as they are received.
+      - When set only a summary of the export is returned, avoiding very
+        large registered variables for fleet-wide exports.
+    type: path
+  output_format:
+    description:
+      - Format of I(output_file).
+      - C(ndjson) writes one JSON document per drive.
+      - C(parquet) and C(arrow) (Arrow IPC file) write a typed columnar file
+        with one row per drive, and require the C(pyarrow) Python library.
+        If it is not installed a gzip compressed CSV is written instead, to
+        I(output_file) with its extension replaced by C(.csv.gz), and the
+        result reports the file and format written.
+      - C(csv) writes a gzip compressed CSV with one row per drive. Unless
+        I(output_file) ends in C(.csv.gz) its extension is replaced by
+        C(.csv.gz), and the result reports the file written.
+      - Columnar formats flatten nested attributes and the owning array is returned in the I(array) column.
+    type: str
+    default: ndjson
+    choices: [ ndjson, parquet, arrow, csv ]
+  delta_against:
+    description:
+      - Path of a state file on the target holding a digest of each drive
+        returned by the previous run with the same state file.
+      - When set only the keys of the drives added, modified or removed since
+        that run are returned, in I(delta), and the state file is updated
+        unless in check mode.
+      - Drives are keyed by array and drive name, as C(array/drive).
+      - Digests cover the returned attributes, so I(fields) selects the
+        attributes whose changes are reported.
+      - Cannot be used with I(output_file).
+    type: path
 author:
   - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
+  - purestorage.pure1.purestorage.fields
 """
 
 EXAMPLES = r"""
 - name: collect all drives information
   purestorage.pure1.pure1_drives:
-    register: pure1_drives
+  register: pure1_drives
 
 - name: collect only drives information for array X
   purestorage.pure1.pure1_drives:
     array: X
-    register: pure1_drives
+  register: pure1_drives
+
+- name: export all drives to a file
+  purestorage.pure1.pure1_drives:
+    output_file: /tmp/pure1_drives.ndjson
+
+- name: export all drives to an Arrow IPC file for analytics
+  purestorage.pure1.pure1_drives:
+    output_file: /tmp/pure1_drives.arrow
+    output_format: arrow
+
+- name: report the drives added, changed or removed since the last run
+  purestorage.pure1.pure1_drives:
+    delta_against: /var/lib/pure1/drives.state
+  register: pure1_drives
 
 - name: show drives information
   debug:
@@ -49,7 +99,10 @@ EXAMPLES = r"""
 
 RETURN = r"""
 pure1_drives:
-  description: Returns array drives information collected from Pure1
+  description:
+    - Returns array drives information collected from Pure1
+    - When I(output_file) is set, returns the path and format of the file written and its number of records
+    - When I(delta_against) is set, returns the drives I(added), I(modified) and I(removed) in I(delta)
   returned: always
   type: dict
 """
@@ -57,17 +110,28 @@ pure1_drives:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    OUTPUT_FORMATS,
+    DeltaState,
+    OutputFile,
+    field_wanted,
+    get_collection,
     get_pure1,
+    project_fields,
     pure1_argument_spec,
 )
 
 
-def generate_drives_dict(module, pure_1):
-    drives_info = {}
+def generate_drive_records(module, pure_1):
+    """Yield (array, drive name, drive details) as each page of drives is received"""
     if module.params["array"]:
-        res = pure_1.get_drives(filter="arrays.name='" + module.params["array"] + "'")
+        res = get_collection(
+            module,
+            pure_1,
+            "drives",
+            filter="arrays.name='" + module.params["array"] + "'",
+        )
         if res.status_code == 200 and res.total_item_count != 0:
-            drives = list(res.items)
+            drives = res.items
         else:
             module.warn(
                 "No drives information available for array {0}".format(
@@ -76,34 +140,81 @@ def generate_drives_dict(module, pure_1):
             )
             module.exit_json(changed=False)
     else:
-        drives = list(pure_1.get_drives().items)
-    for drive in range(0, len(drives)):
-        array = drives[drive].arrays[0].name
-        drives_info[array] = []
-    for drive in range(0, len(drives)):
-        array = drives[drive].arrays[0].name
-        drive_name = drives[drive].name
+        res = get_collection(module, pure_1, "drives")
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to get drives. Error: {0}".format(res.errors[0].message)
+            )
+        drives = res.items
+    for drive in drives:
         drive_details = {
-            drive_name: {
-                "capacity": getattr(drives[drive], "capacity", None),
-                "protocol": getattr(drives[drive], "protocol", None),
-                "status": getattr(drives[drive], "status", None),
-                "type": getattr(drives[drive], "type", None),
-            }
+            "capacity": drive.get("capacity"),
+            "protocol": drive.get("protocol"),
+            "status": drive.get("status"),
+            "type": drive.get("type"),
         }
-        drives_info[array].append(drive_details)
+        yield (
+            drive["arrays"][0].get("name"),
+            drive.get("name"),
+            project_fields(module, drive_details),
+        )
+
+
+def drive_columns(module):
+    """Return the columns of a columnar drives export"""
+    columns = [("array", "string"), ("name", "string")]
+    for name, column_type in [
+        ("capacity", "int64"),
+        ("protocol", "string"),
+        ("status", "string"),
+        ("type", "string"),
+    ]:
+        if field_wanted(module, name):
+            columns.append((name, column_type))
+    return columns
+
+
+def generate_drives_dict(module, pure_1):
+    drives_info = {}
+    for array, drive_name, drive_details in generate_drive_records(module, pure_1):
+        drives_info.setdefault(array, []).append({drive_name: drive_details})
     return drives_info
 
 
 def main():
     argument_spec = pure1_argument_spec()
-    argument_spec.update(dict(array=dict(type="str")))
-    module = AnsibleModule(argument_spec, supports_check_mode=True)
+    argument_spec.update(
+        dict(
+            array=dict(type="str"),
+            fields=dict(type="list", elements="str"),
+            output_file=dict(type="path"),
+            output_format=dict(type="str", default="ndjson", choices=OUTPUT_FORMATS),
+            delta_against=dict(type="path"),
+        )
+    )
+    module = AnsibleModule(
+        argument_spec,
+        mutually_exclusive=[["delta_against", "output_file"]],
+        supports_check_mode=True,
+    )
     pure_1 = get_pure1(module)
 
     drives = {}
 
-    drives["drives"] = generate_drives_dict(module, pure_1)
+    if module.params["output_file"]:
+        output = OutputFile(module, columns=drive_columns(module))
+        for array, drive_name, drive_details in generate_drive_records(module, pure_1):
+            record = {"array": array, "name": drive_name}
+            record.update(drive_details)
+            output.write(record)
+        drives = output.close()
+    elif module.params["delta_against"]:
+        delta = DeltaState(module, module.params["delta_against"])
+        for array, drive_name, drive_details in generate_drive_records(module, pure_1):
+            delta.add(array + "/" + drive_name, drive_details)
+        drives["delta"] = delta.close()
+    else:
+        drives["drives"] = generate_drives_dict(module, pure_1)
 
     module.exit_json(changed=False, pure1_drives=drives)
 
@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "community",
+}
+
+DOCUMENTATION = r"""
+---
+module: pure1_index
+version_added: '1.5.0'
+short_description: Sync a local index of Pure1 fleet objects
+description:
+  - Mirror the arrays, volumes, pods, drives and ports of the fleet into a
+    local SQLite database, indexed on name, array, volume serial and pod,
+    for fast lookups with M(purestorage.pure1.pure1_index_info).
+  - The kinds of objects are requested from Pure1 concurrently and their
+    objects are written in batches as their pages arrive. Only the objects
+    that were added, changed or removed since the last sync are written.
+options:
+  database:
+    description:
+      - Path of the SQLite database on the target, created if it does not
+        exist.
+    type: path
+    required: true
+  kinds:
+    description:
+      - Kinds of objects to sync.
+    type: list
+    elements: str
+    default: [ arrays, volumes, pods, drives, ports ]
+    choices: [ arrays, volumes, pods, drives, ports ]
+  max_age:
+    description:
+      - Skip kinds synced less than this many seconds ago.
+      - Use C(0) to always sync.
+    type: int
+    default: 0
+notes:
+  - Object attributes are stored as returned by Pure1, with times in
+    milliseconds since the epoch.
+author:
+  - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
+extends_documentation_fragment:
+  - purestorage.pure1.purestorage.p1
+"""
+
+EXAMPLES = r"""
+- name: Sync the fleet index
+  purestorage.pure1.pure1_index:
+    database: /var/cache/pure1/fleet.sqlite
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+
+- name: Sync volumes and pods unless synced in the last hour
+  purestorage.pure1.pure1_index:
+    database: /var/cache/pure1/fleet.sqlite
+    kinds:
+      - volumes
+      - pods
+    max_age: 3600
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+"""
+
+RETURN = r"""
+pure1_index:
+  description:
+    - The number of objects of each synced kind and how many of them were
+      added, changed or removed by the sync
+  returned: always
+  type: dict
+  sample: {
+    "volumes": {"objects": 1200, "added": 3, "changed": 1, "removed": 0}
+  }
+"""
+
+import os
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    INDEX_KINDS,
+    FleetIndex,
+    get_pure1,
+    pure1_argument_spec,
+    run_concurrently,
+)
+
+
+def index_record(kind, item):
+    """Return the fleet index record of a Pure1 object"""
+    attributes = item.to_dict()
+    attributes.pop("_as_of", None)
+    arrays = attributes.get("arrays") or [{}]
+    return {
+        "id": item.id,
+        "name": item.name,
+        "array": item.name if kind == "arrays" else arrays[0].get("name"),
+        "serial": attributes.get("serial"),
+        "pod": (attributes.get("pod") or {}).get("name"),
+        "attributes": attributes,
+    }
+
+
+def main():
+    argument_spec = pure1_argument_spec()
+    argument_spec.update(
+        dict(
+            database=dict(type="path", required=True),
+            kinds=dict(
+                type="list", elements="str", default=INDEX_KINDS, choices=INDEX_KINDS
+            ),
+            max_age=dict(type="int", default=0),
+        )
+    )
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    database = module.params["database"]
+    if module.check_mode and not os.path.exists(database):
+        # Nothing is written in check mode, everything would be added
+        database = ":memory:"
+    index = FleetIndex(module, database)
+    now = int(time.time() * 1000)
+    synced = index.synced()
+    kinds = [
+        kind
+        for kind in INDEX_KINDS
+        if kind in module.params["kinds"]
+        and now - synced.get(kind, {}).get("synced", 0)
+        >= module.params["max_age"] * 1000
+    ]
+
+    results = {}
+    if kinds:
+        pure_1 = get_pure1(module)
+
+        def fetch(kind):
+            return getattr(pure_1, "get_" + kind)()
+
+        # The first pages are fetched concurrently, later pages as each
+        # kind is written, so no listing is held in memory whole
+        for kind, res in zip(kinds, run_concurrently(fetch, kinds)):
+            if res.status_code != 200:
+                module.fail_json(
+                    msg="Failed to get {0}. Error: {1}".format(
+                        kind, res.errors[0].message
+                    )
+                )
+            changes, objects = index.sync(
+                kind, (index_record(kind, item) for item in res.items), now
+            )
+            results[kind] = dict((change, len(ids)) for change, ids in changes.items())
+            results[kind]["objects"] = objects
+        if not module.check_mode:
+            index.commit()
+    index.close()
+
+    changed = any(
+        count
+        for result in results.values()
+        for change, count in result.items()
+        if change != "objects"
+    )
+    module.exit_json(changed=changed, pure1_index=results)
+
+
+if __name__ == "__main__":
+    main()
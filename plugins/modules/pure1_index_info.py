@@ -0,0 +1,147 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "community",
+}
+
+DOCUMENTATION = r"""
+---
+module: pure1_index_info
+version_added: '1.5.0'
+short_description: Look up fleet objects in a local Pure1 index
+description:
+  - Find arrays, volumes, pods, drives and ports in a fleet index synced by
+    M(purestorage.pure1.pure1_index), such as the array owning a volume
+    serial or the pod holding a volume.
+  - Lookups are local reads of indexed columns, Pure1 is not contacted.
+options:
+  database:
+    description:
+      - Path of the SQLite database on the target synced by
+        M(purestorage.pure1.pure1_index).
+    type: path
+    required: true
+  kind:
+    description:
+      - Only return objects of this kind.
+    type: str
+    choices: [ arrays, volumes, pods, drives, ports ]
+  name:
+    description:
+      - Only return objects with this name.
+    type: str
+  array:
+    description:
+      - Only return objects of this array.
+    type: str
+  serial:
+    description:
+      - Only return the volume with this serial.
+      - Serials are matched regardless of case.
+    type: str
+  pod:
+    description:
+      - Only return volumes in this pod.
+    type: str
+  limit:
+    description:
+      - Return at most this many objects.
+    type: int
+author:
+  - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
+"""
+
+EXAMPLES = r"""
+- name: Find the array owning a volume serial
+  purestorage.pure1.pure1_index_info:
+    database: /var/cache/pure1/fleet.sqlite
+    serial: 5117AB000000000000000000
+  register: found
+
+- name: Show the array
+  debug:
+    msg: "{{ found['pure1_index_info']['objects'][0]['array'] }}"
+
+- name: Find the pod holding volume vol1 on array X
+  purestorage.pure1.pure1_index_info:
+    database: /var/cache/pure1/fleet.sqlite
+    kind: volumes
+    name: vol1
+    array: X
+  register: found
+
+- name: List the volumes of pod pod1
+  purestorage.pure1.pure1_index_info:
+    database: /var/cache/pure1/fleet.sqlite
+    kind: volumes
+    pod: pod1
+"""
+
+RETURN = r"""
+pure1_index_info:
+  description:
+    - The matching objects, ordered by kind and name, with their indexed
+      columns and Pure1 attributes
+    - When each kind of object was last synced, in milliseconds since the
+      epoch, and how many objects it had
+  returned: always
+  type: dict
+  sample: {
+    "objects": [
+      {
+        "kind": "volumes",
+        "id": "f11fdb56-da9c-47a0-8430-e58538c00a73",
+        "name": "vol1",
+        "array": "X",
+        "serial": "5117AB000000000000000000",
+        "pod": "pod1",
+        "attributes": {"provisioned": 1073741824, "destroyed": false}
+      }
+    ],
+    "synced": {"volumes": {"synced": 1767225600000, "objects": 1200}}
+  }
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    INDEX_COLUMNS,
+    INDEX_KINDS,
+    FleetIndex,
+)
+
+
+def main():
+    argument_spec = dict(
+        database=dict(type="path", required=True),
+        kind=dict(type="str", choices=INDEX_KINDS),
+        limit=dict(type="int"),
+    )
+    argument_spec.update(dict((column, dict(type="str")) for column in INDEX_COLUMNS))
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+
+    index = FleetIndex(module, module.params["database"], create=False)
+    info = {
+        "objects": index.lookup(
+            kind=module.params["kind"],
+            limit=module.params["limit"],
+            **dict((column, module.params[column]) for column in INDEX_COLUMNS)
+        ),
+        "synced": index.synced(),
+    }
+    index.close()
+
+    module.exit_json(changed=False, pure1_index_info=info)
+
+
+if __name__ == "__main__":
+    main()
@@ -32,11 +32,80 @@ options:
     description:
       - When supplied, this argument will define the information to be collected.
         Possible values for this include all, minimum, appliances, subscriptions,
-        contracts, environmental and invoices.
+        contracts, environmental, invoices and forecast.
+      - The I(forecast) subset returns, for every array, how many days
+        until its used space reaches I(forecast_threshold) percent of its
+        capacity at the rate it grew over the last I(forecast_days) days,
+        arrays closest to full first.
+      - I(forecast) fetches the metric history of the whole fleet, so it is
+        not part of I(all) and must be requested explicitly.
     type: list
     elements: str
     required: false
     default: minimum
+  fields:
+    description:
+      - List of attributes to return for each record in the gathered subsets.
+      - For the I(minimum) subset this selects which counts are returned.
+      - If not provided, all attributes are returned.
+      - The Pure1 API does not support server-side attribute selection, but
+        API calls that only serve unrequested attributes, such as appliance
+        tags and performance metrics, are skipped.
+    type: list
+    elements: str
+  output_file:
+    description:
+      - Path of a file on the target to write the gathered information to
+        as newline delimited JSON, one record per line.
+      - Each record carries the I(subset) and I(name) it belongs to and
+        each subset is written out as soon as it has been gathered.
+      - When set only a summary of the export is returned, avoiding very
+        large registered variables for fleet-wide exports.
+    type: path
+  summarize:
+    description:
+      - Return the summary statistics of each appliance performance metric
+        over the last five hours instead of its latest value.
+      - Each metric is returned as the I(avg), I(p95), I(p99) and I(max) of
+        its values and I(rate), their rate of change per day.
+      - Summaries are computed with NumPy when it is installed.
+    type: bool
+    default: false
+  forecast_threshold:
+    description:
+      - Percentage of array capacity the I(forecast) subset counts the days
+        to.
+    type: int
+    default: 90
+  forecast_days:
+    description:
+      - Days of daily used space history the I(forecast) subset fits the
+        growth of each array to.
+    type: int
+    default: 30
+  top_n:
+    description:
+      - Rank the arrays of the I(appliances) subset by each of the I(top_by)
+        metrics and return the I(top_n) highest under its I(top) key.
+      - Rankings are kept as each array is gathered, with summarized
+        metrics ranked by their I(p95).
+    type: int
+  top_by:
+    description:
+      - Appliance metrics to rank arrays by with I(top_n), by output key
+        such as C(load [%]) or by Pure1 metric name such as
+        C(array_total_load).
+      - Ranked metrics are collected even when I(fields) does not return
+        them.
+    type: list
+    elements: str
+    default: [ 'load [%]' ]
+  top_only:
+    description:
+      - With I(top_n), only return the rankings of the I(appliances)
+        subset, skipping the metrics and tags that are not ranked.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
 """
@@ -57,11 +126,40 @@ EXAMPLES = r"""
 - name: show all information
   debug:
     msg: "{{ pure1_info['pure1_info'] }}"
+
+- name: find the 5 arrays with the highest load and read latency
+  purestorage.pure1.pure1_info:
+    gather_subset:
+      - appliances
+    top_n: 5
+    top_by:
+      - load [%]
+      - array_read_latency_us
+    top_only: true
+  register: pure1_info
+- name: show the busiest arrays
+  debug:
+    msg: "{{ pure1_info['pure1_info']['appliances']['top'] }}"
+
+- name: find arrays expected to reach 80% full within 90 days
+  purestorage.pure1.pure1_info:
+    gather_subset:
+      - forecast
+    forecast_threshold: 80
+  register: pure1_info
+- name: show arrays heading toward full
+  debug:
+    msg: "{{ pure1_info['pure1_info']['forecast'] | dict2items
+             | selectattr('value.days_to_threshold', 'ne', None)
+             | selectattr('value.days_to_threshold', 'lt', 90)
+             | map(attribute='key') | list }}"
 """
 
 RETURN = r"""
 pure1_info:
-  description: Returns the information collected from Pure1
+  description:
+    - Returns the information collected from Pure1
+    - When I(output_file) is set, returns the output file path and number of records written
   returned: always
   type: dict
 """
@@ -69,52 +167,102 @@ pure1_info:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    OutputFile,
+    field_wanted,
+    forecast_capacity,
+    format_timestamp,
+    get_metric_history,
     get_pure1,
+    project_fields,
     pure1_argument_spec,
+    summarize_series,
 )
-import datetime
 import time
 
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def _round_metric(divisor, digits=None):
+    """Return a function scaling a raw metric value for display"""
+    if digits is None:
+        return lambda value: round(value / divisor)
+    return lambda value: round(value / divisor, digits)
+
+
+# (output key, Pure1 metric name, scaling function) for each appliance type
+FA_METRICS = [
+    ("bandwidth (read) [MB/s]", "array_read_bandwidth", _round_metric(104857600, 3)),
+    ("bandwidth (write) [MB/s]", "array_write_bandwidth", _round_metric(104857600, 3)),
+    ("latency (read) [ms]", "array_read_latency_us", _round_metric(1000, 2)),
+    ("latency (write) [ms]", "array_write_latency_us", _round_metric(1000, 2)),
+    ("iops (read)", "array_read_iops", _round_metric(1)),
+    ("iops (write)", "array_write_iops", _round_metric(1)),
+    ("load [%]", "array_total_load", lambda value: round(value * 100, 3)),
+]
+FB_METRICS = [
+    ("bandwidth (read) [MB/s]", "array_read_bandwidth", _round_metric(104857600, 3)),
+    ("bandwidth (write) [MB/s]", "array_write_bandwidth", _round_metric(104857600, 3)),
+    ("iops (read)", "array_read_iops", _round_metric(1)),
+    ("iops (write)", "array_write_iops", _round_metric(1)),
+    ("latency (read) [ms]", "array_read_latency_us", _round_metric(1000, 2)),
+    ("latency (write) [ms]", "array_write_latency_us", _round_metric(1000, 2)),
+]
+# Pure1 metrics the forecast subset fits used space growth against capacity with
+FORECAST_USED_METRIC = "array_used_space"
+FORECAST_CAPACITY_METRIC = "array_total_capacity"
+APPLIANCE_TYPES = {
+    "Purity//FA": ("FlashArray", FA_METRICS),
+    "Purity": ("FlashArray", FA_METRICS),
+    "Purity//FB": ("FlashBlade", FB_METRICS),
+    "Elasticity": ("ObjectEngine", []),
+}
+
+
+# (output key, Pure1 client method) for the object counts in the default subset
+DEFAULT_COUNTS = [
+    ("volumes", "get_volumes"),
+    ("volume_snapshots", "get_volume_snapshots"),
+    ("filesystems", "get_file_systems"),
+    ("filesystem_snapshots", "get_file_system_snapshots"),
+    ("buckets", "get_buckets"),
+    ("directories", "get_directories"),
+    ("pods", "get_pods"),
+    ("object_store_accounts", "get_object_store_accounts"),
+]
+
 
-def generate_default_dict(pure_1):
+def generate_default_dict(module, pure_1):
     default_info = {}
     fb_count = fa_count = os_count = 0
-    appliances = list(pure_1.get_arrays().items)
-    for appliance in range(0, len(appliances)):
-        if appliances[appliance].os in ["Purity//FA", "Purity"]:
-            fa_count += 1
-        elif appliances[appliance].os == "Purity//FB":
-            fb_count += 1
-        elif appliances[appliance].os == "Elasticity":
-            os_count += 1
+    if (
+        field_wanted(module, "FlashArrays")
+        or field_wanted(module, "FlashBlades")
+        or field_wanted(module, "ObjectEngines")
+    ):
+        appliances = list(pure_1.get_arrays().items)
+        for appliance in range(0, len(appliances)):
+            if appliances[appliance].os in ["Purity//FA", "Purity"]:
+                fa_count += 1
+            elif appliances[appliance].os == "Purity//FB":
+                fb_count += 1
+            elif appliances[appliance].os == "Elasticity":
+                os_count += 1
     default_info["FlashArrays"] = fa_count
     default_info["FlashBlades"] = fb_count
     default_info["ObjectEngines"] = os_count
-    default_info["volumes"] = pure_1.get_volumes().total_item_count
-    default_info["volume_snapshots"] = pure_1.get_volume_snapshots().total_item_count
-    default_info["filesystems"] = pure_1.get_file_systems().total_item_count
-    default_info["filesystem_snapshots"] = (
-        pure_1.get_file_system_snapshots().total_item_count
-    )
-    default_info["buckets"] = pure_1.get_buckets().total_item_count
-    default_info["directories"] = pure_1.get_directories().total_item_count
-    default_info["pods"] = pure_1.get_pods().total_item_count
-    default_info["object_store_accounts"] = (
-        pure_1.get_object_store_accounts().total_item_count
-    )
-    return default_info
+    for key, method in DEFAULT_COUNTS:
+        if field_wanted(module, key):
+            default_info[key] = getattr(pure_1, method)().total_item_count
+    return project_fields(module, default_info)
 
 
-def generate_subscription_assets_dict(pure_1):
+def generate_subscription_assets_dict(module, pure_1):
     assets_info = {}
     assets = list(pure_1.get_subscription_assets().items)
     if assets:
         for asset in range(0, len(assets)):
             name = assets[asset].name
-            activation = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(assets[asset].activation_date / 1000),
-            )
+            activation = format_timestamp(module, assets[asset].activation_date)
             assets_info[name] = {
                 "install_location": assets[asset].install_location,
                 "activation_date": activation,
@@ -130,36 +278,32 @@ def generate_subscription_assets_dict(pure_1):
                 "license_name": assets[asset].license.name,
                 "license_id": assets[asset].license.id,
             }
+            assets_info[name] = project_fields(module, assets_info[name])
     return assets_info
 
 
-def generate_subscription_licenses_dict(pure_1):
+def generate_subscription_licenses_dict(module, pure_1):
     licenses_info = {}
     licenses = list(pure_1.get_subscription_licenses().items)
     if licenses:
         for license in range(0, len(licenses)):
             name = licenses[license].name
-            start_date = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(licenses[license].start_date / 1000),
-            )
-            expiration_date = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(licenses[license].expiration_date / 1000),
-            )
-            last_updated = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(licenses[license].last_updated_date / 1000),
+            start_date = format_timestamp(module, licenses[license].start_date)
+            expiration_date = format_timestamp(
+                module, licenses[license].expiration_date
             )
+            last_updated = format_timestamp(module, licenses[license].last_updated_date)
             licenses_info[name] = {
                 "start_date": start_date,
                 "expiration_date": expiration_date,
                 "last_updated": last_updated,
                 "marketplace_partner": licenses[license].marketplace_partner.name,
                 "service_tier": licenses[license].service_tier,
-                "location": licenses[license].location,
-                "pre_ratio": licenses[license].pre_ratio,
-                "energy_usage": licenses[license].energy_usage,
+                "location": getattr(licenses[license], "location", None),
+                "pre_ratio": getattr(
+                    getattr(licenses[license], "pre_ratio", None), "data", None
+                ),
+                "energy_usage": getattr(licenses[license], "energy_usage", None),
                 "subscription": licenses[license].subscription.name,
                 "average_on_demand": {
                     "data": licenses[license].average_on_demand.data,
@@ -184,18 +328,15 @@ def generate_subscription_licenses_dict(pure_1):
                 "resources": {},
             }
             for resource in range(0, len(licenses[license].resources)):
-                res_name = licenses_info[license].resources[resource].name
-                res_start_time = time.strftime(
-                    "%Y-%m-%d %H:%M:%S UTC",
-                    time.gmtime(
-                        licenses[license].resources[resource].activation_time / 1000
-                    ),
+                res_name = licenses[license].resources[resource].name
+                res_start_time = format_timestamp(
+                    module, licenses[license].resources[resource].activation_time
                 )
-                licenses_info[license].resources[res_name] = {
-                    "resource_type": licenses_info[license]
+                licenses_info[name]["resources"][res_name] = {
+                    "resource_type": licenses[license]
                     .resources[resource]
                     .resource_type,
-                    "fqdn": licenses_info[license].resources[resource].fqdn,
+                    "fqdn": licenses[license].resources[resource].fqdn,
                     "activation_time": res_start_time,
                     "usage": {
                         "data": licenses[license].resources[resource].usage.data,
@@ -205,22 +346,21 @@ def generate_subscription_licenses_dict(pure_1):
                         .usage.metric.name,
                     },
                 }
+            licenses_info[name] = project_fields(module, licenses_info[name])
     return licenses_info
 
 
-def generate_subscriptions_dict(pure_1):
+def generate_subscriptions_dict(module, pure_1):
     subscriptions_info = {}
     subscriptions = list(pure_1.get_subscriptions().items)
     if subscriptions:
         for subscription in range(0, len(subscriptions)):
             name = subscriptions[subscription].name
-            start_time = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(subscriptions[subscription].start_date / 1000),
+            start_time = format_timestamp(
+                module, subscriptions[subscription].start_date
             )
-            end_time = time.strftime(
-                "%Y-%m-%d %H:%M:%S UTC",
-                time.gmtime(subscriptions[subscription].expiration_date / 1000),
+            end_time = format_timestamp(
+                module, subscriptions[subscription].expiration_date
             )
             subscriptions_info[name] = {
                 "start_date": start_time,
@@ -235,6 +375,7 @@ def generate_subscriptions_dict(pure_1):
                     subscriptions[subscription], "subscription_term", None
                 ),
             }
+            subscriptions_info[name] = project_fields(module, subscriptions_info[name])
     return subscriptions_info
 
 
@@ -274,9 +415,8 @@ def generate_esg_dict(module, pure_1):
                 ),
             }
             if esg_info[name]["location"]["updated"]:
-                esg_info[name]["location"]["updated"] = time.strftime(
-                    "%Y-%m-%d %H:%M:%S UTC",
-                    time.gmtime(esg_info[name]["location"]["updated"] / 1000),
+                esg_info[name]["location"]["updated"] = format_timestamp(
+                    module, esg_info[name]["location"]["updated"]
                 )
         if appliances[appliance].reporting_status != "assessment_ready":
             esg_info[name]["reporting_status"] = appliances[appliance].reporting_status
@@ -330,14 +470,12 @@ def generate_esg_dict(module, pure_1):
                 "end": getattr(appliances[appliance].assessment, "interval_end", None),
             }
             if esg_info[name]["assessment"]["start"]:
-                esg_info[name]["assessment"]["start"] = time.strftime(
-                    "%Y-%m-%d %H:%M:%S UTC",
-                    time.gmtime(esg_info[name]["assessment"]["start"] / 1000),
+                esg_info[name]["assessment"]["start"] = format_timestamp(
+                    module, esg_info[name]["assessment"]["start"]
                 )
             if esg_info[name]["assessment"]["end"]:
-                esg_info[name]["assessment"]["end"] = time.strftime(
-                    "%Y-%m-%d %H:%M:%S UTC",
-                    time.gmtime(esg_info[name]["assessment"]["end"] / 1000),
+                esg_info[name]["assessment"]["end"] = format_timestamp(
+                    module, esg_info[name]["assessment"]["end"]
                 )
     insights = list(pure_1.get_assessment_sustainability_insights_arrays().items)
     for insight in range(0, len(insights)):
@@ -351,10 +489,12 @@ def generate_esg_dict(module, pure_1):
                     "insight_data": insights[insight].additional_data,
                 }
             )
+    for name in esg_info:
+        esg_info[name] = project_fields(module, esg_info[name])
     return esg_info
 
 
-def generate_contract_dict(pure_1):
+def generate_contract_dict(module, pure_1):
     contract_info = {}
     grace_period = 2592000000  # 30 days in ms
     contract_start_epoch = None
@@ -373,22 +513,25 @@ def generate_contract_dict(pure_1):
         if contract_data:
             contract_start_epoch = getattr(contract_data[0], "start_date", None)
             contract_end_epoch = getattr(contract_data[0], "end_date", None)
-            if contract_start_epoch:
-                contract_start = datetime.datetime.fromtimestamp(
-                    int(contract_start_epoch / 1000)
-                ).strftime("%Y-%m-%d")
-            if contract_end_epoch:
-                contract_end = datetime.datetime.fromtimestamp(
-                    int(contract_end_epoch / 1000)
-                ).strftime("%Y-%m-%d")
-            contract_info[name]["contract_start"] = contract_start
-            contract_info[name]["contract_end"] = contract_end
+            contract_info[name]["contract_start"] = format_timestamp(
+                module,
+                contract_start_epoch,
+                legacy_format=DATE_FORMAT,
+                legacy_localtime=True,
+            )
+            contract_info[name]["contract_end"] = format_timestamp(
+                module,
+                contract_end_epoch,
+                legacy_format=DATE_FORMAT,
+                legacy_localtime=True,
+            )
             if contract_end_epoch:
                 if current_date <= contract_end_epoch:
                     contract_state = "Active"
                 elif contract_end_epoch + grace_period >= current_date:
                     contract_state = "Grace Period"
         contract_info[name]["contract_state"] = contract_state
+        contract_info[name] = project_fields(module, contract_info[name])
     return contract_info
 
 
@@ -397,32 +540,29 @@ def generate_invoices_dict(module, pure_1):
     res = pure_1.get_invoices()
     if res.status_code == 200:
         invoices = list(res.items)
-        for invoice in len(0, len(invoices)):
+        for invoice in range(0, len(invoices)):
             name = invoices[invoice].id
-            invoice_date = getattr(invoices[invoice], "date", None)
-            invoice_due_date = getattr(invoices[invoice], "due_date", None)
-            invoice_ship_date = getattr(invoices[invoice], "ship_date", None)
-            if invoice_date:
-                inv_date = datetime.datetime.fromtimestamp(
-                    int(invoice_date / 1000)
-                ).strftime("%Y-%m-%d")
-            else:
-                inv_date = None
-            if invoice_due_date:
-                inv_due_date = datetime.datetime.fromtimestamp(
-                    int(invoice_due_date / 1000)
-                ).strftime("%Y-%m-%d")
-            else:
-                inv_due_date = None
-            if invoice_ship_date:
-                inv_ship_date = datetime.datetime.fromtimestamp(
-                    int(invoice_ship_date / 1000)
-                ).strftime("%Y-%m-%d")
-            else:
-                inv_date = None
+            inv_date = format_timestamp(
+                module,
+                getattr(invoices[invoice], "var_date", None) or None,
+                legacy_format=DATE_FORMAT,
+                legacy_localtime=True,
+            )
+            inv_due_date = format_timestamp(
+                module,
+                getattr(invoices[invoice], "due_date", None) or None,
+                legacy_format=DATE_FORMAT,
+                legacy_localtime=True,
+            )
+            inv_ship_date = format_timestamp(
+                module,
+                getattr(invoices[invoice], "ship_date", None) or None,
+                legacy_format=DATE_FORMAT,
+                legacy_localtime=True,
+            )
 
             invoices_info[name] = {
-                "lines": {},
+                "lines": [],
                 "status": getattr(invoices[invoice], "status", None),
                 "amount": getattr(invoices[invoice], "amount", 0),
                 "date": inv_date,
@@ -436,34 +576,26 @@ def generate_invoices_dict(module, pure_1):
                 "end_user_po": getattr(
                     invoices[invoice], "end_user_purchase_order", None
                 ),
-                "end_user_name": getattr(
-                    invoices[invoice], "end_user_purchase_name", None
-                ),
+                "end_user_name": getattr(invoices[invoice], "end_user_name", None),
                 "subscription_id": getattr(invoices[invoice].subscription, "id", None),
                 "subscription_name": getattr(
                     invoices[invoice].subscription, "name", None
                 ),
             }
             for line in range(0, len(invoices[invoice].lines)):
-                line_start_date = (
-                    getattr(invoices[invoice].lines[line], "start_date", None),
+                start_date = format_timestamp(
+                    module,
+                    getattr(invoices[invoice].lines[line], "start_date", None) or None,
+                    legacy_format=DATE_FORMAT,
+                    legacy_localtime=True,
                 )
-                line_end_date = (
-                    getattr(invoices[invoice].lines[line], "end_date", None),
+                end_date = format_timestamp(
+                    module,
+                    getattr(invoices[invoice].lines[line], "end_date", None) or None,
+                    legacy_format=DATE_FORMAT,
+                    legacy_localtime=True,
                 )
-                if line_start_date:
-                    start_date = datetime.datetime.fromtimestamp(
-                        int(line_start_date / 1000)
-                    ).strftime("%Y-%m-%d")
-                else:
-                    start_date = None
-                if line_end_date:
-                    end_date = datetime.datetime.fromtimestamp(
-                        int(line_end_date / 1000)
-                    ).strftime("%Y-%m-%d")
-                else:
-                    end_date = None
-                invoices_info[invoice]["lines"].append(
+                invoices_info[name]["lines"].append(
                     {
                         "item": getattr(invoices[invoice].lines[line], "item", None),
                         "quantity": getattr(
@@ -474,322 +606,255 @@ def generate_invoices_dict(module, pure_1):
                         ),
                         "start_date": start_date,
                         "end_date": end_date,
-                        "components": invoices[invoice].lines[line]["components"],
+                        "components": [
+                            component.to_dict()
+                            for component in getattr(
+                                invoices[invoice].lines[line], "components", None
+                            )
+                            or []
+                        ],
                         "unit_price": getattr(
                             invoices[invoice].lines[line], "unit_price", 0
                         ),
                         "amount": getattr(invoices[invoice].lines[line], "amount", 0),
                         "tax_percentage": getattr(
-                            invoices[invoice].lines[line].tax, "percentage", 0
+                            getattr(invoices[invoice].lines[line], "tax", None),
+                            "percentage",
+                            0,
                         ),
                         "tax_amount": getattr(
-                            invoices[invoice].lines[line].tax, "amount", 0
+                            getattr(invoices[invoice].lines[line], "tax", None),
+                            "amount",
+                            0,
                         ),
                         "tax_exemption_statement": getattr(
-                            invoices[invoice].lines[line].tax,
+                            getattr(invoices[invoice].lines[line], "tax", None),
                             "exemption_statement",
                             None,
                         ),
                     }
                 )
+            invoices_info[name] = project_fields(module, invoices_info[name])
     return invoices_info
 
 
+def generate_appliance_tags(pure_1, name):
+    tags_info = []
+    res = pure_1.get_arrays_tags(resource_names=[name])
+    if res.status_code == 200:
+        tags = list(res.items)
+        for tag in range(0, len(tags)):
+            tags_info.append(
+                {
+                    "key": tags[tag].key,
+                    "value": tags[tag].value,
+                    "org_id": tags[tag].tag_organization_id,
+                    "namespace": tags[tag].namespace,
+                }
+            )
+    return tags_info
+
+
+def get_top_keys(module):
+    """Return the appliance metric output keys to rank arrays by"""
+    if module.params["top_n"] < 1:
+        module.fail_json(msg="top_n must be at least 1")
+    keys = {}
+    for key, metric, dummy in FA_METRICS + FB_METRICS:
+        keys[key] = keys[metric] = key
+    top_keys = []
+    for name in module.params["top_by"]:
+        if name not in keys:
+            module.fail_json(
+                msg="Unknown top_by metric {0}. Use one of: {1}".format(
+                    name, ", ".join(sorted(set(keys.values())))
+                )
+            )
+        if keys[name] not in top_keys:
+            top_keys.append(keys[name])
+    return top_keys
+
+
 def generate_appliances_dict(module, pure_1):
     names_info = {"FlashArray": {}, "FlashBlade": {}, "ObjectEngine": {}}
+    top_n = module.params["top_n"]
+    top_only = top_n and module.params["top_only"]
+    # A min-heap of the top_n (value, name, type) entries per ranked metric
+    rankings = {}
+    if top_n:
+        # Imported here so tasks without top_n do not pay for it at startup
+        import heapq
+
+        rankings = dict((key, []) for key in get_top_keys(module))
     appliances = list(pure_1.get_arrays().items)
     for appliance in range(0, len(appliances)):
         name = appliances[appliance].name
+        if appliances[appliance].os not in APPLIANCE_TYPES:
+            module.warn(
+                "Unknown operating system detected: {0}.".format(
+                    appliances[appliance].os
+                )
+            )
+            continue
+        appliance_type, metrics = APPLIANCE_TYPES[appliances[appliance].os]
         try:
             fqdn = appliances[appliance].fqdn
         except AttributeError:
             fqdn = ""
-        if appliances[appliance].os in ["Purity//FA", "Purity"]:
-            names_info["FlashArray"][name] = {
-                "os_version": appliances[appliance].version,
-                "model": appliances[appliance].model,
-                "fqdn": fqdn,
-                "tags": [],
-            }
-            res = pure_1.get_array_tags(resource_names=[name])
-            if res.status_code == 200:
-                tags = list(res.items)
-                for tag in range(0, len(tags)):
-                    names_info["FlashArray"][name]["tags"].append(
-                        {
-                            "key": tags[tag].key,
-                            "value": tags[tag].value,
-                            "org_id": tags[tag].tag_organization_id,
-                            "namespace": tags[tag].namespace,
-                        }
-                    )
-            try:
-                names_info["FlashArray"][name]["bandwidth (read) [MB/s]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_bandwidth"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 104857600,
-                    3,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashArray"][name]["bandwidth (write) [MB/s]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_bandwidth"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 104857600,
-                    3,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashArray"][name]["latency (read) [ms]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_latency_us"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 1000,
-                    2,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashArray"][name]["latency (write) [ms]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_latency_us"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 1000,
-                    2,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashArray"][name]["iops (read)"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_iops"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashArray"][name]["iops (write)"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_iops"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                )
-            except IndexError:
-                pass
+        appliance_info = {
+            "os_version": appliances[appliance].version,
+            "model": appliances[appliance].model,
+            "fqdn": fqdn,
+            "tags": [],
+        }
+        if field_wanted(module, "tags") and not top_only:
+            appliance_info["tags"] = generate_appliance_tags(pure_1, name)
+        for key, metric, scale in metrics:
+            if key not in rankings and (top_only or not field_wanted(module, key)):
+                continue
+            end_time = int(time.time()) * 1000
             try:
-                names_info["FlashArray"][name]["load [%]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_total_load"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    * 100,
-                    3,
-                )
+                data = list(
+                    pure_1.get_metrics_history(
+                        names=[metric],
+                        resource_names=[name],
+                        aggregation="max",
+                        resolution=180000,
+                        end_time=end_time,
+                        start_time=end_time - 18000000,
+                    ).items
+                )[0].data
+                if module.params["summarize"]:
+                    summary = summarize_series(data)
+                    if summary:
+                        appliance_info[key] = dict(
+                            (stat, scale(value)) for stat, value in summary.items()
+                        )
+                else:
+                    appliance_info[key] = scale(data[-1][1])
             except IndexError:
                 pass
-        elif appliances[appliance].os == "Elasticity":
-            names_info["ObjectEngine"][name] = {
-                "os_version": appliances[appliance].version,
-                "model": appliances[appliance].model,
-                "fqdn": fqdn,
-                "tags": [],
-            }
-            res = pure_1.get_array_tags(resource_names=[name])
-            if res.status_code == 200:
-                tags = list(res.items)
-                for tag in range(0, len(tags)):
-                    names_info["ObjectEngine"][name]["tags"].append(
-                        {
-                            "key": tags[tag].key,
-                            "value": tags[tag].value,
-                            "org_id": tags[tag].tag_organization_id,
-                            "namespace": tags[tag].namespace,
-                        }
-                    )
-        elif appliances[appliance].os == "Purity//FB":
-            names_info["FlashBlade"][name] = {
-                "os_version": appliances[appliance].version,
-                "model": appliances[appliance].model,
-                "fqdn": fqdn,
-                "tags": [],
-            }
-            res = pure_1.get_array_tags(resource_names=[name])
-            if res.status_code == 200:
-                tags = list(res.items)
-                for tag in range(0, len(tags)):
-                    names_info["FlashBlade"][name]["tags"].append(
-                        {
-                            "key": tags[tag].key,
-                            "value": tags[tag].value,
-                            "org_id": tags[tag].tag_organization_id,
-                            "namespace": tags[tag].namespace,
-                        }
+        for key, heap in rankings.items():
+            value = appliance_info.get(key)
+            if isinstance(value, dict):
+                value = value["p95"]
+            if value is None:
+                continue
+            if len(heap) < top_n:
+                heapq.heappush(heap, (value, name, appliance_type))
+            else:
+                heapq.heappushpop(heap, (value, name, appliance_type))
+        if not top_only:
+            names_info[appliance_type][name] = project_fields(module, appliance_info)
+    if top_only:
+        names_info = {}
+    if top_n:
+        names_info["top"] = dict(
+            (
+                key,
+                [
+                    {"name": name, "type": appliance_type, "value": value}
+                    for value, name, appliance_type in sorted(
+                        heap, key=lambda entry: (-entry[0], entry[1])
                     )
-            try:
-                names_info["FlashBlade"][name]["bandwidth (read) [MB/s]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_bandwidth"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 104857600,
-                    3,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashBlade"][name]["bandwidth (write) [MB/s]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_bandwidth"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 104857600,
-                    3,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashBlade"][name]["iops (read)"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_iops"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashBlade"][name]["iops (write)"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_iops"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashBlade"][name]["latency (read) [ms]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_read_latency_us"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 1000,
-                    2,
-                )
-            except IndexError:
-                pass
-            try:
-                names_info["FlashBlade"][name]["latency (write) [ms]"] = round(
-                    list(
-                        pure_1.get_metrics_history(
-                            names=["array_write_latency_us"],
-                            resource_names=[name],
-                            aggregation="max",
-                            resolution=180000,
-                            end_time=int(time.time()) * 1000,
-                            start_time=(int(time.time()) * 1000) - 18000000,
-                        ).items
-                    )[0].data[-1][1]
-                    / 1000,
-                    2,
-                )
-            except IndexError:
-                pass
-        else:
-            module.warning(
-                "Unknown operating system detected: {0}.".format(
-                    appliances[appliance].os
-                )
+                ],
             )
+            for key, heap in rankings.items()
+        )
     return names_info
 
 
+def generate_forecast_dict(module, pure_1):
+    """Return the capacity forecast of every array, closest to full first"""
+    names = sorted(appliance.name for appliance in pure_1.get_arrays().items)
+    end_time = int(time.time()) * 1000
+    series = {}
+    for metric, resource, dummy, data in get_metric_history(
+        module,
+        pure_1,
+        [FORECAST_USED_METRIC, FORECAST_CAPACITY_METRIC],
+        names,
+        end_time - module.params["forecast_days"] * 86400000,
+        end_time,
+        86400000,
+        "max",
+    ):
+        series[(metric, resource)] = data
+    capacities = []
+    for name in names:
+        capacity = [
+            point[1]
+            for point in series.get((FORECAST_CAPACITY_METRIC, name), [])
+            if point[1] is not None
+        ]
+        capacities.append(capacity[-1] if capacity else None)
+    forecasts = forecast_capacity(
+        [series.get((FORECAST_USED_METRIC, name), []) for name in names],
+        capacities,
+        module.params["forecast_threshold"],
+    )
+    forecast_info = {}
+    for name, capacity, (used, growth, days) in sorted(
+        zip(names, capacities, forecasts),
+        key=lambda item: (item[2][2] is None, item[2][2], item[0]),
+    ):
+        forecast_info[name] = project_fields(
+            module,
+            {
+                "capacity": None if capacity is None else round(capacity),
+                "used": None if used is None else round(used),
+                "growth_per_day": None if growth is None else round(growth),
+                "days_to_threshold": None if days is None else round(days, 1),
+            },
+        )
+    return forecast_info
+
+
+def write_subset(output, subset, subset_info):
+    """Write the records of a gathered subset to output_file"""
+    if subset == "default":
+        record = {"subset": subset}
+        record.update(subset_info)
+        output.write(record)
+    elif subset == "appliances":
+        for metric, ranking in subset_info.get("top", {}).items():
+            for rank, entry in enumerate(ranking, 1):
+                record = {"subset": "appliances_top", "metric": metric, "rank": rank}
+                record.update(entry)
+                output.write(record)
+        for appliance_type in subset_info:
+            if appliance_type == "top":
+                continue
+            for name in subset_info[appliance_type]:
+                record = {"subset": subset, "type": appliance_type, "name": name}
+                record.update(subset_info[appliance_type][name])
+                output.write(record)
+    else:
+        for name in subset_info:
+            record = {"subset": subset, "name": name}
+            record.update(subset_info[name])
+            output.write(record)
+
+
 def main():
     argument_spec = pure1_argument_spec()
     argument_spec.update(
-        dict(gather_subset=dict(default="minimum", type="list", elements="str"))
+        dict(
+            gather_subset=dict(default="minimum", type="list", elements="str"),
+            fields=dict(type="list", elements="str"),
+            output_file=dict(type="path"),
+            summarize=dict(type="bool", default=False),
+            forecast_threshold=dict(type="int", default=90),
+            forecast_days=dict(type="int", default=30),
+            top_n=dict(type="int"),
+            top_by=dict(type="list", elements="str", default=["load [%]"]),
+            top_only=dict(type="bool", default=False),
+        )
     )
 
     module = AnsibleModule(argument_spec, supports_check_mode=True)
+    if module.params["top_n"] is not None:
+        get_top_keys(module)
     pure_1 = get_pure1(module)
 
     subset = [test.lower() for test in module.params["gather_subset"]]
@@ -801,6 +866,7 @@ def main():
         "contracts",
         "environmental",
         "invoices",
+        "forecast",
     )
     subset_test = (test in valid_subsets for test in subset)
     if not all(subset_test):
@@ -810,21 +876,38 @@ def main():
         )
 
     info = {}
+    generators = []
 
     if "minimum" in subset or "all" in subset:
-        info["default"] = generate_default_dict(pure_1)
+        generators.append(("default", generate_default_dict))
     if "appliances" in subset or "all" in subset:
-        info["appliances"] = generate_appliances_dict(module, pure_1)
+        generators.append(("appliances", generate_appliances_dict))
     if "subscriptions" in subset or "all" in subset:
-        info["subscriptions"] = generate_subscriptions_dict(pure_1)
-        info["subscription_licenses"] = generate_subscription_licenses_dict(pure_1)
-        # info["subscription_assets"] = generate_subscription_assets_dict(pure_1)
+        generators.append(("subscriptions", generate_subscriptions_dict))
+        generators.append(
+            ("subscription_licenses", generate_subscription_licenses_dict)
+        )
+        # generators.append(("subscription_assets", generate_subscription_assets_dict))
     if "contracts" in subset or "all" in subset:
-        info["contracts"] = generate_contract_dict(pure_1)
+        generators.append(("contracts", generate_contract_dict))
     if "environmental" in subset or "all" in subset:
-        info["environmental"] = generate_esg_dict(module, pure_1)
+        generators.append(("environmental", generate_esg_dict))
     if "invoices" in subset or "all" in subset:
-        info["invoices"] = generate_invoices_dict(module, pure_1)
+        generators.append(("invoices", generate_invoices_dict))
+    # Not part of all, as it fetches the used space history of every array
+    if "forecast" in subset:
+        generators.append(("forecast", generate_forecast_dict))
+
+    output = None
+    if module.params["output_file"]:
+        output = OutputFile(module)
+    for name, generator in generators:
+        if output:
+            write_subset(output, name, generator(module, pure_1))
+        else:
+            info[name] = generator(module, pure_1)
+    if output:
+        info = output.close()
 
     module.exit_json(changed=False, pure1_info=info)
 
@@ -0,0 +1,340 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "community",
+}
+
+DOCUMENTATION = r"""
+---
+module: pure1_metrics
+version_added: '1.5.0'
+short_description: Collect metric history from Pure1
+description:
+  - Collect the history of any Pure1 metrics for arrays, or other resources,
+    over a time range.
+  - Long time ranges and many resources are split into requests the Pure1
+    API accepts, which are fetched concurrently and merged into one series
+    per metric and resource.
+options:
+  names:
+    description:
+      - Names of the metrics to collect, eg. C(array_read_latency_us).
+    type: list
+    elements: str
+    required: true
+  resources:
+    description:
+      - Names of the arrays, or other resources, to collect the metrics of.
+      - If not provided, the metrics of every array are collected.
+    type: list
+    elements: str
+  start_time:
+    description:
+      - Start of the time range.
+      - Milliseconds since the epoch, an ISO 8601 UTC time such as
+        C(2026-01-31T09:15:00Z) or C(2026-01-31), or a time relative to now
+        such as C(-30d), C(-12h) or C(-90m).
+    type: str
+    default: '-1h'
+  end_time:
+    description:
+      - End of the time range, in any of the I(start_time) formats or C(now).
+    type: str
+    default: now
+  resolution:
+    description:
+      - Duration between samples in milliseconds.
+    type: int
+    default: 300000
+    choices: [ 30000, 300000, 1800000, 7200000, 86400000 ]
+  aggregation:
+    description:
+      - How samples are aggregated to I(resolution).
+    type: str
+    default: avg
+    choices: [ avg, max ]
+  output_file:
+    description:
+      - Path of a file on the target to write the series to, in
+        I(output_format), as each batch of series is received.
+      - When set only a summary of the export is returned.
+    type: path
+  output_format:
+    description:
+      - Format of I(output_file).
+      - C(ndjson) writes one JSON document per metric and resource.
+      - C(parquet), C(arrow) and C(csv) write one row per sample with
+        I(metric), I(resource), I(unit), I(timestamp) and I(value) columns,
+        see M(purestorage.pure1.pure1_volumes) for their requirements.
+    type: str
+    default: ndjson
+    choices: [ ndjson, parquet, arrow, csv ]
+  summarize:
+    description:
+      - Return the summary statistics of each series instead of its samples.
+      - The statistics are the I(avg), I(p95), I(p99) and I(max) of the
+        values and I(rate), their rate of change per day.
+      - With I(output_file), C(parquet), C(arrow) and C(csv) write one row
+        per series with I(metric), I(resource), I(unit) and a column per
+        statistic.
+      - Summaries are computed with NumPy when it is installed.
+    type: bool
+    default: false
+  cache_file:
+    description:
+      - Path of an SQLite database on the target to cache the samples of
+        each series in, by metric, resource, I(resolution) and
+        I(aggregation).
+      - Only the parts of the time range that are not cached are requested
+        from Pure1, the most recent cached sample is always refreshed.
+      - The file is created, readable and writable by its owner only, if it
+        does not exist and can be shared by tasks, as long as they use the
+        same Pure1 account.
+      - In check mode cached samples are used but the file is not changed.
+    type: path
+  cache_retention:
+    description:
+      - Days of samples to keep in I(cache_file).
+      - Older samples are removed at the start of each run and the file is
+        compacted once a quarter of it is unused, so I(start_time) should
+        stay within this many days for the cache to be effective.
+    type: int
+    default: 90
+notes:
+  - Sample timestamps are milliseconds since the epoch unless
+    I(timestamp_format=iso8601_utc).
+author:
+  - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
+extends_documentation_fragment:
+  - purestorage.pure1.purestorage.p1
+"""
+
+EXAMPLES = r"""
+- name: Collect the last hour of read latency of every array
+  purestorage.pure1.pure1_metrics:
+    names:
+      - array_read_latency_us
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+  register: latency
+
+- name: Export 30 days of fleet latency to a Parquet file
+  purestorage.pure1.pure1_metrics:
+    names:
+      - array_read_latency_us
+      - array_write_latency_us
+    start_time: '-30d'
+    resolution: 1800000
+    aggregation: max
+    output_file: /tmp/latency.parquet
+    output_format: parquet
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+
+- name: Keep a local history of array capacity, fetching only new samples
+  purestorage.pure1.pure1_metrics:
+    names:
+      - array_total_capacity
+      - array_used_space
+    start_time: '-30d'
+    resolution: 86400000
+    cache_file: /var/cache/pure1/metrics.sqlite
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+
+- name: Summarize 30 days of write latency of two arrays
+  purestorage.pure1.pure1_metrics:
+    names:
+      - array_write_latency_us
+    resources:
+      - array1
+      - array2
+    start_time: '-30d'
+    resolution: 1800000
+    summarize: true
+    app_id: 'pure1:apikey:P3nkAt46lmXMBHLV'
+    key_file: '/home/private.pem'
+"""
+
+RETURN = r"""
+pure1_metrics:
+  description:
+    - The unit and samples of each metric by metric name and resource name
+    - Each sample is a list of timestamp and value
+    - With I(summarize), the unit and summary statistics of each metric by
+      metric name and resource name, statistics are null for a series
+      without samples
+    - When I(output_file) is set, returns the path and format of the file written and its number of records
+  returned: always
+  type: dict
+  sample: {
+    "array_read_latency_us": {
+      "array1": {
+        "unit": "us",
+        "data": [[1767225600000, 412.5], [1767225900000, 398.0]]
+      }
+    }
+  }
+"""
+
+import calendar
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    METRIC_AGGREGATIONS,
+    METRIC_RESOLUTIONS,
+    OUTPUT_FORMATS,
+    OutputFile,
+    MetricCache,
+    SUMMARY_STATISTICS,
+    format_timestamp,
+    get_cached_metric_history,
+    get_metric_history,
+    get_pure1,
+    pure1_argument_spec,
+    summarize_series,
+)
+
+RELATIVE_UNITS = {"m": 60000, "h": 3600000, "d": 86400000}
+ISO_FORMATS = ["%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"]
+
+
+def parse_time(module, option, now):
+    """Return the time of option in milliseconds since the epoch"""
+    value = module.params[option].strip()
+    if value == "now":
+        return now
+    if value.isdigit():
+        return int(value)
+    if value.startswith("-") and value[1:-1].isdigit() and value[-1] in RELATIVE_UNITS:
+        return now - int(value[1:-1]) * RELATIVE_UNITS[value[-1]]
+    for iso_format in ISO_FORMATS:
+        try:
+            return calendar.timegm(time.strptime(value, iso_format)) * 1000
+        except ValueError:
+            pass
+    module.fail_json(
+        msg="Invalid {0} {1}. Use milliseconds, ISO 8601 or eg. -30d".format(
+            option, value
+        )
+    )
+
+
+def generate_series(module, pure_1):
+    """Yield (metric, resource, unit, data) for every requested series
+
+    With summarize, data is the summary statistics of the series.
+    """
+    now = int(time.time()) * 1000
+    start_time = parse_time(module, "start_time", now)
+    end_time = parse_time(module, "end_time", now)
+    if start_time >= end_time:
+        module.fail_json(msg="start_time must be before end_time")
+    resources = module.params["resources"]
+    if not resources:
+        resources = sorted(array.name for array in pure_1.get_arrays().items)
+    series = (
+        module.params["names"],
+        resources,
+        start_time,
+        end_time,
+        module.params["resolution"],
+        module.params["aggregation"],
+    )
+    cache = None
+    if module.params["cache_file"]:
+        cache = MetricCache(
+            module, module.params["cache_file"], module.params["cache_retention"]
+        )
+        series = get_cached_metric_history(module, pure_1, cache, *series)
+    else:
+        series = get_metric_history(module, pure_1, *series)
+    for metric, resource, unit, data in series:
+        if module.params["summarize"]:
+            summary = summarize_series(data)
+            data = summary or dict((stat, None) for stat in SUMMARY_STATISTICS)
+        elif module.params["timestamp_format"] == "iso8601_utc":
+            data = [[format_timestamp(module, point[0]), point[1]] for point in data]
+        yield metric, resource, unit, data
+    if cache:
+        cache.close()
+
+
+def main():
+    argument_spec = pure1_argument_spec()
+    argument_spec.update(
+        dict(
+            names=dict(type="list", elements="str", required=True),
+            resources=dict(type="list", elements="str"),
+            start_time=dict(type="str", default="-1h"),
+            end_time=dict(type="str", default="now"),
+            resolution=dict(type="int", default=300000, choices=METRIC_RESOLUTIONS),
+            aggregation=dict(type="str", default="avg", choices=METRIC_AGGREGATIONS),
+            output_file=dict(type="path"),
+            output_format=dict(type="str", default="ndjson", choices=OUTPUT_FORMATS),
+            summarize=dict(type="bool", default=False),
+            cache_file=dict(type="path"),
+            cache_retention=dict(type="int", default=90),
+        )
+    )
+    module = AnsibleModule(argument_spec, supports_check_mode=True)
+    pure_1 = get_pure1(module)
+
+    metrics = {}
+    summarize = module.params["summarize"]
+    if module.params["output_file"]:
+        columns = [("metric", "string"), ("resource", "string"), ("unit", "string")]
+        if summarize:
+            columns.extend((stat, "double") for stat in SUMMARY_STATISTICS)
+        else:
+            columns.append(
+                (
+                    "timestamp",
+                    (
+                        "string"
+                        if module.params["timestamp_format"] == "iso8601_utc"
+                        else "timestamp_ms"
+                    ),
+                )
+            )
+            columns.append(("value", "double"))
+        output = OutputFile(module, columns=columns)
+        for metric, resource, unit, data in generate_series(module, pure_1):
+            record = {"metric": metric, "resource": resource, "unit": unit}
+            if summarize:
+                record.update(data)
+                output.write(record)
+            elif not output.columnar:
+                record["data"] = data
+                output.write(record)
+            else:
+                for timestamp, value in data:
+                    row = dict(record)
+                    row.update(timestamp=timestamp, value=value)
+                    output.write(row)
+        metrics = output.close()
+    else:
+        for metric, resource, unit, data in generate_series(module, pure_1):
+            series = {"unit": unit}
+            if summarize:
+                series.update(data)
+            else:
+                series["data"] = data
+            metrics.setdefault(metric, {})[resource] = series
+
+    module.exit_json(changed=False, pure1_metrics=metrics)
+
+
+if __name__ == "__main__":
+    main()
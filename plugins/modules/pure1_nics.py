@@ -30,6 +30,7 @@ author:
   - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
+  - purestorage.pure1.purestorage.fields
 """
 
 EXAMPLES = r"""
@@ -58,6 +59,7 @@ pure1_nics:
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
     get_pure1,
+    project_fields,
     pure1_argument_spec,
 )
 
@@ -95,13 +97,19 @@ def generate_nics_dict(module, pure_1):
             nic_details[nic_name]["services"] = nics[nic].services
         if getattr(nics[nic], "subinterfaces", None):
             nic_details[nic_name]["subinterfaces"] = nics[nic].subinterfaces
+        nic_details[nic_name] = project_fields(module, nic_details[nic_name])
         nics_info[array].append(nic_details)
     return nics_info
 
 
 def main():
     argument_spec = pure1_argument_spec()
-    argument_spec.update(dict(array=dict(type="str")))
+    argument_spec.update(
+        dict(
+            array=dict(type="str"),
+            fields=dict(type="list", elements="str"),
+        )
+    )
     module = AnsibleModule(argument_spec, supports_check_mode=True)
     pure_1 = get_pure1(module)
 
@@ -30,6 +30,7 @@ author:
   - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
+  - purestorage.pure1.purestorage.fields
 """
 
 EXAMPLES = r"""
@@ -58,6 +59,7 @@ pure1_pods:
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
     get_pure1,
+    project_fields,
     pure1_argument_spec,
 )
 
@@ -84,13 +86,19 @@ def generate_pods_dict(module, pure_1):
         }
         if getattr(pods[pod], "source", None):
             pod_details[pod_name]["source"] = pods[pod].source.name
+        pod_details[pod_name] = project_fields(module, pod_details[pod_name])
         pods_info[array].append(pod_details)
     return pods_info
 
 
 def main():
     argument_spec = pure1_argument_spec()
-    argument_spec.update(dict(array=dict(type="str")))
+    argument_spec.update(
+        dict(
+            array=dict(type="str"),
+            fields=dict(type="list", elements="str"),
+        )
+    )
     module = AnsibleModule(argument_spec, supports_check_mode=True)
     pure_1 = get_pure1(module)
 
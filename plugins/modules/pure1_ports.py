@@ -30,6 +30,7 @@ author:
   - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
+  - purestorage.pure1.purestorage.fields
 """
 
 EXAMPLES = r"""
@@ -58,6 +59,7 @@ pure1_ports:
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
     get_pure1,
+    project_fields,
     pure1_argument_spec,
 )
 
@@ -87,13 +89,19 @@ def generate_ports_dict(module, pure_1):
                 "failover": getattr(ports[port], "failover", None),
             }
         }
+        port_details[port_name] = project_fields(module, port_details[port_name])
         ports_info[array].append(port_details)
     return ports_info
 
 
 def main():
     argument_spec = pure1_argument_spec()
-    argument_spec.update(dict(array=dict(type="str")))
+    argument_spec.update(
+        dict(
+            array=dict(type="str"),
+            fields=dict(type="list", elements="str"),
+        )
+    )
     module = AnsibleModule(argument_spec, supports_check_mode=True)
     pure_1 = get_pure1(module)
 
@@ -26,21 +26,108 @@ options:
     description:
       - Filter to provide only volumes for a specifically named array
     type: str
+  serials:
+    description:
+      - Only collect the volumes with these serial numbers.
+      - The serials are requested in chunks, fetched concurrently, so only
+        the matching volumes are transferred.
+      - Serials not found in Pure1 are returned in I(missing_serials).
+    type: list
+    elements: str
+  output_file:
+    description:
+      - Path of a file on the target to write volumes to, in
+        I(output_format), as they are received.
+      - When set only a summary of the export is returned, avoiding very
+        large registered variables for fleet-wide exports.
+    type: path
+  output_format:
+    description:
+      - Format of I(output_file).
+      - C(ndjson) writes one JSON document per volume.
+      - C(parquet) and C(arrow) (Arrow IPC file) write a typed columnar file
+        with one row per volume, and require the C(pyarrow) Python library.
+        If it is not installed a gzip compressed CSV is written instead, to
+        I(output_file) with its extension replaced by C(.csv.gz), and the
+        result reports the file and format written.
+      - C(csv) writes a gzip compressed CSV with one row per volume. Unless
+        I(output_file) ends in C(.csv.gz) its extension is replaced by
+        C(.csv.gz), and the result reports the file written.
+      - Columnar formats flatten nested attributes into I(array_name) and I(array_fqdn) columns.
+    type: str
+    default: ndjson
+    choices: [ ndjson, parquet, arrow, csv ]
+  delta_against:
+    description:
+      - Path of a state file on the target holding a digest of each volume
+        returned by the previous run with the same state file.
+      - When set only the keys of the volumes added, modified or removed since
+        that run are returned, in I(delta), and the state file is updated
+        unless in check mode.
+      - Volumes are keyed by serial number, see I(serials) to collect the details of the reported volumes.
+      - Digests cover the returned attributes, so I(fields) selects the
+        attributes whose changes are reported.
+      - Cannot be used with I(output_file) or I(compact).
+    type: path
+  compact:
+    description:
+      - Return a compact representation of the volumes.
+      - Arrays are returned once in an I(arrays) list and each volume
+        references its array by index in that list.
+      - The redundant I(serial) attribute is dropped from each volume and a
+        missing I(source) or I(pod) is returned as null.
+      - Cannot be used with I(output_file).
+    type: bool
+    default: false
 author:
   - Pure Storage Ansible Team (@sdodsley) <pure-ansible-team@purestorage.com>
 extends_documentation_fragment:
   - purestorage.pure1.purestorage.p1
+  - purestorage.pure1.purestorage.fields
 """
 
 EXAMPLES = r"""
 - name: collect all volumes information
   purestorage.pure1.pure1_volumes:
-    register: pure1_volumes
+  register: pure1_volumes
 
 - name: collect only volumes information for array X
   purestorage.pure1.pure1_volumes:
     array: X
-    register: pure1_volumes
+  register: pure1_volumes
+
+- name: export all volumes to a file
+  purestorage.pure1.pure1_volumes:
+    output_file: /tmp/pure1_volumes.ndjson
+
+- name: export all volumes to a parquet file for analytics
+  purestorage.pure1.pure1_volumes:
+    output_file: /tmp/pure1_volumes.parquet
+    output_format: parquet
+    timestamp_format: epoch_ms
+
+- name: find the arrays of a set of host visible volume serials
+  purestorage.pure1.pure1_volumes:
+    serials:
+      - 5117AB000000000000000000
+      - 5117AB000000000000000001
+    fields:
+      - array
+  register: pure1_volumes
+
+- name: report the volumes added, changed or removed since the last run
+  purestorage.pure1.pure1_volumes:
+    delta_against: /var/lib/pure1/volumes.state
+  register: pure1_volumes
+
+- name: collect all volumes information in compact form
+  purestorage.pure1.pure1_volumes:
+    compact: true
+  register: pure1_volumes
+
+- name: show the array of volume serial X from compact information
+  debug:
+    msg: "{{ pure1_volumes['pure1_volumes']['arrays'][pure1_volumes['pure1_volumes']['serial_numbers']['X']['array']] }}"
 
 - name: show volumes information
   debug:
@@ -49,7 +136,12 @@ EXAMPLES = r"""
 
 RETURN = r"""
 pure1_volumes:
-  description: Returns the volumes information collected from Pure1
+  description:
+    - Returns the volumes information collected from Pure1
+    - When I(output_file) is set, returns the path and format of the file written and its number of records
+    - When I(compact=true), also returns the I(arrays) lookup list referenced by each volume
+    - When I(serials) is set, also returns the I(missing_serials) that were not found
+    - When I(delta_against) is set, returns the serials I(added), I(modified) and I(removed) in I(delta)
   returned: always
   type: dict
 """
@@ -57,58 +149,218 @@ pure1_volumes:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.purestorage.pure1.plugins.module_utils.pure1 import (
+    OUTPUT_FORMATS,
+    FILTER_BATCH_SIZE,
+    DeltaState,
+    OutputFile,
+    any_of_filter,
+    chunks,
+    field_wanted,
+    format_timestamp,
+    get_collection,
     get_pure1,
+    normalize_serial,
+    project_fields,
     pure1_argument_spec,
+    run_concurrently,
+    timestamp_column_type,
 )
-import time
 
 
-def generate_volumes_dict(module, pure_1):
-    volumes_info = {}
-    if module.params["array"]:
-        volumes = list(
-            pure_1.get_volumes(
-                filter="arrays.name='" + module.params["array"] + "'"
-            ).items
+def requested_serials(module):
+    """Return the serials option as sorted, upper case serial numbers"""
+    return sorted(set(normalize_serial(serial) for serial in module.params["serials"]))
+
+
+def get_serial_volumes(module, pure_1):
+    """Return the volumes with the requested serials
+
+    The serials are requested in chunks of any_of_filter filters, which are
+    fetched concurrently.
+    """
+
+    def get_batch(batch):
+        res = get_collection(
+            module, pure_1, "volumes", filter=any_of_filter("serial", batch)
         )
+        return res, list(res.items) if res.status_code == 200 else []
+
+    volumes = []
+    for res, items in run_concurrently(
+        get_batch, chunks(requested_serials(module), FILTER_BATCH_SIZE)
+    ):
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to get volumes by serial. Error: {0}".format(
+                    res.errors[0].message
+                )
+            )
+        volumes.extend(items)
+    return volumes
+
+
+def generate_volume_records(module, pure_1):
+    """Yield (serial, volume details) as each page of volumes is received"""
+    if module.params["serials"]:
+        volumes = [
+            volume
+            for volume in get_serial_volumes(module, pure_1)
+            if not module.params["array"]
+            or volume["arrays"][0].get("name") == module.params["array"]
+        ]
     else:
-        volumes = list(pure_1.get_volumes().items)
-    for volume in range(0, len(volumes)):
-        serial = volumes[volume].serial
-        created = time.strftime(
-            "%Y-%m-%d %H:%M:%S UTC",
-            time.gmtime(volumes[volume].created / 1000),
-        )
-        volumes_info[serial] = {
-            "name": volumes[volume].name,
-            "created": created,
-            "eradicated": volumes[volume].eradicated,
-            "destroyed": volumes[volume].destroyed,
-            "provisioned": volumes[volume].provisioned,
+        if module.params["array"]:
+            res = get_collection(
+                module,
+                pure_1,
+                "volumes",
+                filter="arrays.name='" + module.params["array"] + "'",
+            )
+        else:
+            res = get_collection(module, pure_1, "volumes")
+        if res.status_code != 200:
+            module.fail_json(
+                msg="Failed to get volumes. Error: {0}".format(res.errors[0].message)
+            )
+        volumes = res.items
+    for volume in volumes:
+        array = volume["arrays"][0]
+        volume_info = {
+            "name": volume.get("name"),
+            "created": format_timestamp(module, volume.get("created")),
+            "eradicated": volume.get("eradicated"),
+            "destroyed": volume.get("destroyed"),
+            "provisioned": volume.get("provisioned"),
             "source": [],
-            "serial": getattr(volumes[volume], "serial", None),
+            "serial": volume.get("serial"),
             "pod": [],
             "array": {
-                "name": volumes[volume].arrays[0].name,
-                "fqdn": volumes[volume].arrays[0].fqdn,
+                "name": array.get("name"),
+                "fqdn": array.get("fqdn"),
             },
         }
-        if getattr(volumes[volume], "source", None):
-            volumes_info[serial]["source"] = volumes[volume].source.name
-        if getattr(volumes[volume], "pod", None):
-            volumes_info[serial]["pod"] = volumes[volume].pod.name
+        if volume.get("source") is not None:
+            volume_info["source"] = volume["source"].get("name")
+        if volume.get("pod") is not None:
+            volume_info["pod"] = volume["pod"].get("name")
+        yield volume.get("serial"), project_fields(module, volume_info)
+
+
+def volume_columns(module):
+    """Return the columns of a columnar volumes export"""
+    columns = [("serial", "string")]
+    for name, column_type in [
+        ("name", "string"),
+        ("created", timestamp_column_type(module)),
+        ("eradicated", "bool"),
+        ("destroyed", "bool"),
+        ("provisioned", "int64"),
+        ("source", "string"),
+        ("pod", "string"),
+    ]:
+        if field_wanted(module, name):
+            columns.append((name, column_type))
+    if field_wanted(module, "array"):
+        columns.extend([("array_name", "string"), ("array_fqdn", "string")])
+    return columns
+
+
+def volume_row(serial, volume_info):
+    """Flatten volume details into a columnar export row"""
+    row = {"serial": serial}
+    for key, value in volume_info.items():
+        if key == "array":
+            row["array_name"] = value["name"]
+            row["array_fqdn"] = value["fqdn"]
+        elif value != []:
+            row[key] = value
+    return row
+
+
+def generate_volumes_dict(module, pure_1):
+    volumes_info = {}
+    for serial, volume_info in generate_volume_records(module, pure_1):
+        volumes_info[serial] = volume_info
     return volumes_info
 
 
+def generate_compact_volumes_dict(module, pure_1):
+    arrays = []
+    array_index = {}
+    volumes_info = {}
+    for serial, volume_info in generate_volume_records(module, pure_1):
+        volume_info.pop("serial", None)
+        for key in ["source", "pod"]:
+            if volume_info.get(key) == []:
+                volume_info[key] = None
+        if "array" in volume_info:
+            array = (volume_info["array"]["name"], volume_info["array"]["fqdn"])
+            if array not in array_index:
+                array_index[array] = len(arrays)
+                arrays.append(volume_info["array"])
+            volume_info["array"] = array_index[array]
+        volumes_info[serial] = volume_info
+    return {"arrays": arrays, "serial_numbers": volumes_info}
+
+
 def main():
     argument_spec = pure1_argument_spec()
-    argument_spec.update(dict(array=dict(type="str")))
-    module = AnsibleModule(argument_spec, supports_check_mode=True)
+    argument_spec.update(
+        dict(
+            array=dict(type="str"),
+            serials=dict(type="list", elements="str"),
+            fields=dict(type="list", elements="str"),
+            output_file=dict(type="path"),
+            output_format=dict(type="str", default="ndjson", choices=OUTPUT_FORMATS),
+            compact=dict(type="bool", default=False),
+            delta_against=dict(type="path"),
+        )
+    )
+    module = AnsibleModule(
+        argument_spec,
+        mutually_exclusive=[
+            ["compact", "output_file"],
+            ["delta_against", "output_file"],
+            ["delta_against", "compact"],
+        ],
+        supports_check_mode=True,
+    )
     pure_1 = get_pure1(module)
 
     volumes = {}
+    # Streamed serials are only kept to report missing_serials, so memory
+    # stays flat when every volume of the fleet is written
+    found = set() if module.params["serials"] else None
 
-    volumes["serial_numbers"] = generate_volumes_dict(module, pure_1)
+    if module.params["output_file"]:
+        output = OutputFile(module, columns=volume_columns(module))
+        for serial, volume_info in generate_volume_records(module, pure_1):
+            if found is not None:
+                found.add(serial)
+            if output.columnar:
+                output.write(volume_row(serial, volume_info))
+            else:
+                record = {"serial": serial}
+                record.update(volume_info)
+                output.write(record)
+        volumes = output.close()
+    elif module.params["delta_against"]:
+        delta = DeltaState(module, module.params["delta_against"])
+        for serial, volume_info in generate_volume_records(module, pure_1):
+            if found is not None:
+                found.add(serial)
+            delta.add(serial, volume_info)
+        volumes["delta"] = delta.close()
+    elif module.params["compact"]:
+        volumes = generate_compact_volumes_dict(module, pure_1)
+        found = volumes["serial_numbers"]
+    else:
+        volumes["serial_numbers"] = generate_volumes_dict(module, pure_1)
+        found = volumes["serial_numbers"]
+    if module.params["serials"]:
+        volumes["missing_serials"] = [
+            serial for serial in requested_serials(module) if serial not in found
+        ]
 
     module.exit_json(changed=False, pure1_volumes=volumes)
 
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Fleet scale benchmarks for the Pure1 collection
+
+Runs the generate_* functions of the collection modules against the Pure1
+simulator for fleets of increasing size, recording wall time, API calls,
+response bytes and peak RSS. Each scenario runs in a fresh interpreter so
+peak RSS is not inflated by earlier scenarios or by the simulator itself.
+
+    python tests/perf/benchmark.py --tier small
+    python tests/perf/benchmark.py --tier small --save-baseline
+    python tests/perf/benchmark.py --tier small --baseline tests/perf/baseline.json
+
+With --baseline the exit status is 1 when any scenario regresses beyond
+the given tolerances. The collection must be importable as
+ansible_collections.purestorage.pure1, either from the location of this
+checkout or from --collections-path.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import copy
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    from urllib.request import Request, urlopen
+except ImportError:
+    raise SystemExit("The Pure1 benchmarks require Python 3.7 or later")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from pure1_simulator import start_simulator, write_private_key  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+TIERS = {
+    "small": dict(arrays=10, volumes=10000),
+    "medium": dict(arrays=100, volumes=100000),
+    "large": dict(arrays=1000, volumes=1000000),
+}
+# (scenario, module, function, module parameters)
+SCENARIOS = [
+    ("info_default", "pure1_info", "generate_default_dict", {}),
+    ("info_appliances", "pure1_info", "generate_appliances_dict", {}),
+    ("info_contracts", "pure1_info", "generate_contract_dict", {}),
+    ("info_environmental", "pure1_info", "generate_esg_dict", {}),
+    ("info_subscriptions", "pure1_info", "generate_subscriptions_dict", {}),
+    ("info_licenses", "pure1_info", "generate_subscription_licenses_dict", {}),
+    ("info_invoices", "pure1_info", "generate_invoices_dict", {}),
+    ("volumes_fleet", "pure1_volumes", "generate_volumes_dict", {}),
+    (
+        "volumes_array",
+        "pure1_volumes",
+        "generate_volumes_dict",
+        {"array": "sim-array-00001"},
+    ),
+    ("drives_fleet", "pure1_drives", "generate_drives_dict", {}),
+    ("ports_fleet", "pure1_ports", "generate_ports_dict", {}),
+    ("nics_fleet", "pure1_nics", "generate_nics_dict", {}),
+    ("pods_fleet", "pure1_pods", "generate_pods_dict", {}),
+    (
+        "alerts_fleet",
+        "pure1_alerts",
+        "generate_alert_records",
+        {"severity": "warning", "state": "open"},
+    ),
+    (
+        "metrics_latency_30d",
+        "pure1_metrics",
+        "generate_series",
+        {
+            "names": ["array_read_latency_us"],
+            "resources": None,
+            "start_time": "-30d",
+            "end_time": "now",
+            "resolution": 1800000,
+            "aggregation": "max",
+        },
+    ),
+]
+
+
+class ArgumentSpec(Exception):
+    pass
+
+
+def module_defaults(plugin):
+    """Return the default of every option of a module, from its argument_spec
+
+    main() of the module is run with AnsibleModule replaced by a stand-in
+    that stops it at the argument_spec, so the defaults cannot drift from
+    the options of the modules.
+    """
+
+    def capture(argument_spec=None, **kwargs):
+        raise ArgumentSpec(argument_spec)
+
+    original = plugin.AnsibleModule
+    plugin.AnsibleModule = capture
+    try:
+        plugin.main()
+    except ArgumentSpec as spec:
+        argument_spec = spec.args[0]
+    finally:
+        plugin.AnsibleModule = original
+    return dict(
+        (name, copy.deepcopy(option.get("default")))
+        for name, option in argument_spec.items()
+    )
+
+
+class ModuleExit(Exception):
+    pass
+
+
+class BenchmarkModule(object):
+    """The subset of AnsibleModule used by the generate_* functions"""
+
+    def __init__(self, plugin, params):
+        self.params = dict(module_defaults(plugin), **params)
+        self.check_mode = False
+        self.warnings = []
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+    def fail_json(self, **kwargs):
+        raise SystemExit(json.dumps({"failed": True, "result": kwargs}))
+
+    def exit_json(self, **kwargs):
+        raise ModuleExit()
+
+
+def sim_request(url, path, method="GET"):
+    request = Request(url + path, data=b"" if method == "POST" else None)
+    request.get_method = lambda: method
+    return json.loads(urlopen(request).read().decode("utf-8"))
+
+
+def peak_rss_mb():
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return round(peak / (1048576.0 if sys.platform == "darwin" else 1024.0), 1)
+
+
+def run_scenario(module_name, function, params, api_url, key_file):
+    """Run one scenario in this interpreter and return its measurements"""
+    os.environ["PURE1_API_URL"] = api_url
+    utils = importlib.import_module(
+        "ansible_collections.purestorage.pure1.plugins.module_utils.pure1"
+    )
+    plugin = importlib.import_module(
+        "ansible_collections.purestorage.pure1.plugins.modules." + module_name
+    )
+    pure_1 = utils.pure1_client(
+        app_id="pure1:apikey:benchmark", private_key_file=key_file
+    )
+    module = BenchmarkModule(plugin, params)
+    sim_request(api_url, "/_sim/reset", "POST")
+    start = time.time()
+    try:
+        result = getattr(plugin, function)(module, pure_1)
+        if not isinstance(result, dict):
+            result = dict(enumerate(result))
+    except ModuleExit:
+        result = {}
+    gathered = time.time()
+    serialized = json.dumps(result)
+    finished = time.time()
+    stats = sim_request(api_url, "/_sim/stats")
+    return {
+        "wall_s": round(finished - start, 4),
+        "serialize_s": round(finished - gathered, 4),
+        "api_calls": stats["requests"],
+        "bytes": stats["bytes"],
+        "result_bytes": len(serialized),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results, baseline, time_tolerance, rss_tolerance, min_time_delta):
+    """Return a list of regressions of results against a baseline
+
+    Metric history responses depend on the current time, so response bytes
+    get a small tolerance. Wall time increases below min_time_delta seconds
+    are treated as noise.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        checks = [
+            ("wall_s", time_tolerance),
+            ("api_calls", 0.0),
+            ("bytes", 0.02),
+            ("peak_rss_mb", rss_tolerance),
+        ]
+        for metric, tolerance in checks:
+            limit = previous[metric] * (1 + tolerance)
+            if (
+                metric == "wall_s"
+                and current[metric] - previous[metric] < min_time_delta
+            ):
+                continue
+            if current[metric] > limit:
+                regressions.append(
+                    "%s: %s %s > baseline %s (+%d%% allowed)"
+                    % (name, metric, current[metric], previous[metric], tolerance * 100)
+                )
+    return regressions
+
+
+def collections_path(option):
+    if option:
+        return option
+    # A checkout at <path>/ansible_collections/purestorage/pure1
+    root = os.path.dirname(os.path.dirname(HERE))
+    parts = root.split(os.sep)
+    if parts[-3:-2] == ["ansible_collections"]:
+        return os.sep.join(parts[:-3])
+    raise SystemExit(
+        "Cannot import the collection from %s, use --collections-path" % root
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), action="append")
+    parser.add_argument(
+        "--scenario", action="append", help="only run the named scenarios"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="ms per request")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest run")
+    parser.add_argument("--collections-path")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help="write the results as the new baseline",
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--min-time-delta", type=float, default=0.05)
+    parser.add_argument("--rss-tolerance", type=float, default=0.10)
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--child", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        module_name, function, params, api_url, key_file = args.child
+        measurements = run_scenario(
+            module_name, function, json.loads(params), api_url, key_file
+        )
+        print(json.dumps(measurements))
+        return
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [collections_path(args.collections_path)]
+        + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    # The client caches its access token in the working directory
+    workdir = tempfile.mkdtemp(prefix="pure1_benchmark_")
+    key_file = os.path.join(workdir, "key.pem")
+    write_private_key(key_file)
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not args.scenario or scenario[0] in args.scenario
+    ]
+
+    results = {}
+    for tier in args.tier or ["small"]:
+        server = start_simulator(latency=args.latency, **TIERS[tier])
+        try:
+            for scenario, module_name, function, params in scenarios:
+                runs = []
+                for dummy in range(max(args.repeat, 1)):
+                    output = subprocess.check_output(
+                        [
+                            sys.executable,
+                            os.path.abspath(__file__),
+                            "--child",
+                            module_name,
+                            function,
+                            json.dumps(params),
+                            server.url,
+                            key_file,
+                        ],
+                        env=env,
+                        cwd=workdir,
+                    )
+                    runs.append(json.loads(output.decode("utf-8").splitlines()[-1]))
+                best = min(runs, key=lambda run: run["wall_s"])
+                name = "%s/%s" % (tier, scenario)
+                results[name] = best
+                print(
+                    "%-32s %9.3fs %7d calls %12d bytes %8.1f MB"
+                    % (
+                        name,
+                        best["wall_s"],
+                        best["api_calls"],
+                        best["bytes"],
+                        best["peak_rss_mb"],
+                    )
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    if args.save_baseline:
+        baseline = {"results": {}}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        report["results"] = dict(baseline["results"], **results)
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(
+            results,
+            baseline,
+            args.time_tolerance,
+            args.rss_tolerance,
+            args.min_time_delta,
+        )
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against %s" % args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Summarise PURE1_PROFILE cProfile dumps by where the time went
+
+    python tests/perf/profile_report.py /tmp/pure1-profiles
+    python tests/perf/profile_report.py /tmp/pure1-profiles/pure1_info-all-*.prof --top 20
+
+Own time of every function is assigned to a category from its source file:
+imports, model deserialisation in pypureclient and pydantic, the network,
+the collection's own dict building, result serialisation and the rest.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import glob
+import os
+import pstats
+
+# (category, path fragments), the first match wins
+CATEGORIES = [
+    ("imports", ["<frozen importlib", "/re/_compiler.py", "/re/_parser.py"]),
+    ("network", ["/_transport/rest.py", "urllib3", "/ssl.py", "/socket.py", "/http/"]),
+    ("deserialisation", ["pypureclient", "pydantic", "dateutil"]),
+    ("collection", ["ansible_collections/purestorage/pure1"]),
+    ("serialisation", ["/json/", "module_utils/basic.py", "module_utils/common"]),
+]
+
+
+# Built in functions that only run while modules are imported
+IMPORT_BUILTINS = ["builtins.compile", "marshal.loads", "builtins.__build_class__"]
+
+
+def category(filename, function):
+    if filename == "~" and any(name in function for name in IMPORT_BUILTINS):
+        return "imports"
+    for name, fragments in CATEGORIES:
+        if any(fragment in filename for fragment in fragments):
+            return name
+    if filename == "~":
+        # Built in functions, sleeping and waiting on sockets among them
+        return "builtins"
+    return "other"
+
+
+def summarise(path, top):
+    stats = pstats.Stats(path)
+    totals = {}
+    functions = []
+    for (filename, line, function), stat in stats.stats.items():
+        own_time = stat[2]
+        name = category(filename, function)
+        totals[name] = totals.get(name, 0.0) + own_time
+        functions.append((own_time, name, "%s:%d(%s)" % (filename, line, function)))
+    total = sum(totals.values()) or 1.0
+    print("%s  %.3fs" % (os.path.basename(path), stats.total_tt))
+    for name, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        print("  %-16s %8.3fs %5.1f%%" % (name, seconds, 100.0 * seconds / total))
+    if top:
+        print("  top functions by own time:")
+        for own_time, name, function in sorted(functions, reverse=True)[:top]:
+            print("  %8.3fs  %-16s %s" % (own_time, name, function))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="profile files or directories")
+    parser.add_argument("--top", type=int, default=0, help="list the slowest functions")
+    args = parser.parse_args()
+    for path in args.paths:
+        files = (
+            sorted(glob.glob(os.path.join(path, "*.prof")))
+            if os.path.isdir(path)
+            else [path]
+        )
+        for profile in files:
+            summarise(profile, args.top)
+
+
+if __name__ == "__main__":
+    main()
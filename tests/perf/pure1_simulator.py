@@ -0,0 +1,1198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Local stand-in for the Pure1 REST API
+
+Serves a deterministic, synthetic fleet over the Pure1 endpoints used by
+this collection so modules can be exercised and timed without a Pure1
+tenant. Point the collection at it with the PURE1_API_URL environment
+variable, for example::
+
+    python tests/perf/pure1_simulator.py --arrays 100 --volumes 100000 \\
+        --write-key /tmp/sim.pem
+    export PURE1_API_URL=http://127.0.0.1:8080
+    export PURE1_APP_ID=pure1:apikey:simulator
+    export PURE1_PRIVATE_KEY_FILE=/tmp/sim.pem
+
+Records are built on demand from their index, so fleets with millions of
+objects cost no memory until they are requested. Only array tags are
+mutable; everything else is derived from the fleet sizes.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import base64
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    raise SystemExit("The Pure1 simulator requires Python 3.7 or later")
+
+API_PATH = re.compile(r"^/api/1\.\d+(/.*)$")
+TOKEN_PATH = "/oauth2/1.0/token"
+DEFAULT_LIMIT = 1000
+DAY_MS = 86400000
+# Fixed reference point so every run of a given fleet returns identical data
+EPOCH_MS = 1767225600000  # 2026-01-01T00:00:00Z
+ARRAY_NAME = "sim-array-%05d"
+VOLUME_SERIAL = "5117AB00%016X"
+SEVERITIES = ["info", "warning", "critical"]
+STATES = ["open", "closing", "closed"]
+METRIC_MAX_SERIES = 32
+METRIC_MAX_POINTS = 1440
+METRIC_UNITS = {
+    "bandwidth": "B/s",
+    "latency": "us",
+    "iops": "IO/s",
+    "load": "",
+    "capacity": "B",
+    "space": "B",
+    "reduction": "",
+}
+FILTER_TOKEN = re.compile(
+    r"\s*(?:(?P<conj>and|or)\b|(?P<path>[A-Za-z_][\w.]*)\s*(?P<op>!=|=)\s*"
+    r"'(?P<value>(?:[^'\\]|\\.)*)')",
+    re.IGNORECASE,
+)
+
+
+class FilterError(ValueError):
+    pass
+
+
+def parse_filter(expression):
+    """Parse a Pure1 filter into a list of OR'ed groups of AND'ed terms
+
+    Only the equality subset of the filter language used by the
+    collection is understood: path='value', path!='value', and, or.
+    """
+    groups = [[]]
+    position = 0
+    expect_term = True
+    expression = expression.strip()
+    while position < len(expression):
+        match = FILTER_TOKEN.match(expression, position)
+        if not match:
+            raise FilterError("Unsupported filter: %s" % expression)
+        position = match.end()
+        if match.group("conj"):
+            if expect_term:
+                raise FilterError("Unexpected %s in filter" % match.group("conj"))
+            if match.group("conj").lower() == "or":
+                groups.append([])
+            expect_term = True
+            continue
+        if not expect_term:
+            raise FilterError("Missing and/or in filter: %s" % expression)
+        groups[-1].append(
+            (
+                match.group("path"),
+                match.group("op"),
+                match.group("value").replace("\\'", "'"),
+            )
+        )
+        expect_term = False
+    if expect_term:
+        raise FilterError("Incomplete filter: %s" % expression)
+    return groups
+
+
+def split_list(value):
+    """Split a csv query parameter of single-quoted strings"""
+    return [item.strip().strip("'") for item in value.split(",") if item.strip()]
+
+
+def split_etags(value):
+    """Split an If-None-Match header into its entity tags"""
+    return [tag.strip() for tag in (value or "").split(",") if tag.strip()]
+
+
+def resolve(record, path):
+    """Return every value found at a dotted path, descending into lists"""
+    values = [record]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, list):
+                found.extend(item.get(part) for item in value if isinstance(item, dict))
+            elif isinstance(value, dict):
+                found.append(value.get(part))
+        values = found
+    flat = []
+    for value in values:
+        if isinstance(value, list):
+            flat.extend(value)
+        else:
+            flat.append(value)
+    return flat
+
+
+def term_matches(record, term):
+    path, op, value = term
+    found = any(
+        (
+            str(item).lower() == value.lower()
+            if isinstance(item, bool)
+            else str(item) == value
+        )
+        for item in resolve(record, path)
+    )
+    return found if op == "=" else not found
+
+
+def uuid_for(kind, index):
+    digest = hashlib.md5(("%s:%d" % (kind, index)).encode()).hexdigest()
+    return "%s-%s-4%s-8%s-%s" % (
+        digest[0:8],
+        digest[8:12],
+        digest[13:16],
+        digest[17:20],
+        digest[20:32],
+    )
+
+
+def jwt_token(claims):
+    """Return an unsigned-looking HS256 JWT the client can decode"""
+
+    def encode(part):
+        raw = json.dumps(part, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    body = encode({"alg": "HS256", "typ": "JWT"}) + "." + encode(claims)
+    signature = hashlib.sha256(body.encode()).digest()
+    return body + "." + base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+
+
+class RecordRange(object):
+    """Records over a range of indices, built only when sliced"""
+
+    def __init__(self, span, build):
+        self.span = span
+        self.build = build
+
+    def __getitem__(self, window):
+        return [self.build(index) for index in self.span[window]]
+
+
+class Collection(object):
+    """A virtual collection of records addressed by index
+
+    ranges maps filter paths to functions returning the contiguous range of
+    indices a value can match, letting selective filters skip full scans.
+    """
+
+    def __init__(self, count, build, ranges=None, names_path="name"):
+        self.count = count
+        self.build = build
+        self.ranges = ranges or {}
+        self.names_path = names_path
+
+    def candidates(self, group):
+        """Return the index range for a group and the terms left to check"""
+        span = range(self.count)
+        residual = []
+        for term in group:
+            path, op, value = term
+            if op == "=" and path in self.ranges:
+                bound = self.ranges[path](value)
+                span = range(max(span.start, bound.start), min(span.stop, bound.stop))
+            else:
+                residual.append(term)
+        if span.start >= span.stop:
+            span = range(0)
+        return span, residual
+
+    def select(self, groups):
+        """Return (matching records, total count)
+
+        Unfiltered and fully range-resolved selections return a RecordRange
+        so pages deep into a large collection cost no more than the first.
+        """
+        if not groups:
+            groups = [[]]
+        plans = [self.candidates(group) for group in groups]
+        if len(plans) == 1 and not plans[0][1]:
+            span = plans[0][0]
+            return RecordRange(span, self.build), len(span)
+
+        def matching():
+            streams = [iter(span) for span, residual in plans]
+            last = None
+            for index in heapq.merge(*streams):
+                if index == last:
+                    continue
+                last = index
+                record = None
+                for span, residual in plans:
+                    if index not in span:
+                        continue
+                    record = record or self.build(index)
+                    if all(term_matches(record, term) for term in residual):
+                        yield record
+                        break
+
+        total = sum(1 for _ in matching())
+        return matching(), total
+
+
+class Fleet(object):
+    """Deterministic synthetic Pure1 fleet"""
+
+    def __init__(
+        self,
+        arrays=10,
+        volumes=1000,
+        drives_per_array=20,
+        ports_per_array=8,
+        nics_per_array=6,
+        pods_per_array=2,
+        alerts_per_array=6,
+        tags_per_array=2,
+        subscriptions=None,
+    ):
+        self.arrays = max(int(arrays), 1)
+        self.volumes = max(int(volumes), 0)
+        self.volumes_per_array = max(int(math.ceil(self.volumes / self.arrays)), 1)
+        self.drives_per_array = int(drives_per_array)
+        self.ports_per_array = int(ports_per_array)
+        self.nics_per_array = int(nics_per_array)
+        self.pods_per_array = int(pods_per_array)
+        self.alerts_per_array = int(alerts_per_array)
+        self.tags_per_array = int(tags_per_array)
+        self.subscriptions = int(subscriptions or max(1, self.arrays // 50))
+        self._tags = {}
+        self._tags_lock = threading.Lock()
+        self.collections = self._collections()
+
+    # Arrays
+
+    def array_index(self, name):
+        try:
+            if name.startswith("sim-array-"):
+                index = int(name[len("sim-array-") :])
+                if 0 <= index < self.arrays:
+                    return index
+        except ValueError:
+            pass
+        return None
+
+    def array_range(self, per_array):
+        """Return a ranges function for collections laid out per array"""
+
+        def by_name(name):
+            index = self.array_index(name)
+            if index is None:
+                return range(0)
+            return range(index * per_array, (index + 1) * per_array)
+
+        return by_name
+
+    def array_os(self, index):
+        if index % 25 == 24:
+            return "Elasticity"
+        if index % 4 == 3:
+            return "Purity//FB"
+        return "Purity//FA"
+
+    def array_ref(self, index, fqdn=True):
+        ref = {
+            "id": uuid_for("array", index),
+            "name": ARRAY_NAME % index,
+            "resource_type": "arrays",
+        }
+        if fqdn:
+            ref["fqdn"] = (ARRAY_NAME % index) + ".sim.example.com"
+        return ref
+
+    def array(self, index):
+        os_name = self.array_os(index)
+        model = {
+            "Purity//FA": "FA-X70R%d" % (index % 4 + 1),
+            "Purity//FB": "FB-S%d00" % (index % 3 + 1),
+            "Elasticity": "OE-1000",
+        }[os_name]
+        record = self.array_ref(index)
+        del record["resource_type"]
+        record.update(
+            {
+                "_as_of": EPOCH_MS,
+                "model": model,
+                "os": os_name,
+                "version": "6.%d.%d" % (index % 8, index % 13),
+                "fleet": {"id": uuid_for("fleet", 0), "name": "sim-fleet"},
+            }
+        )
+        return record
+
+    # Per array collections
+
+    def volume(self, index):
+        array = index // self.volumes_per_array
+        record = {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("volume", index),
+            "name": "vol-%07d" % index,
+            "arrays": [self.array_ref(array)],
+            "created": EPOCH_MS - (index % 3650) * DAY_MS,
+            "destroyed": index % 97 == 96,
+            "eradicated": False,
+            "provisioned": (1 + index % 64) * 1073741824,
+            "serial": VOLUME_SERIAL % index,
+        }
+        if index % 10 == 0 and self.pods_per_array:
+            record["pod"] = self.pod_ref(array * self.pods_per_array)
+        if index % 7 == 1:
+            record["source"] = {
+                "id": uuid_for("volume", index - 1),
+                "name": "vol-%07d" % (index - 1),
+                "resource_type": "volumes",
+            }
+        return record
+
+    def volume_index(self, value, pattern, base=10):
+        match = re.match(pattern, value)
+        if not match:
+            return range(0)
+        index = int(match.group(1), base)
+        if index >= self.volumes:
+            return range(0)
+        return range(index, index + 1)
+
+    def drive(self, index):
+        array, slot = divmod(index, self.drives_per_array)
+        nvram = slot < 2
+        return {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("drive", index),
+            "name": ("CH0.NVB%d" if nvram else "CH0.BAY%d") % slot,
+            "arrays": [self.array_ref(array)],
+            "capacity": 35184372088 if nvram else 19791209299968,
+            "details": "",
+            "protocol": "NVMe",
+            "status": "unused" if slot == self.drives_per_array - 1 else "healthy",
+            "type": "NVRAM" if nvram else "SSD",
+        }
+
+    def port(self, index):
+        array, slot = divmod(index, self.ports_per_array)
+        controller, number = divmod(slot, 4)
+        record = {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("port", index),
+            "name": "CT%d.FC%d" % (controller % 2, number),
+            "arrays": [self.array_ref(array)],
+            "wwn": ":".join(
+                "%02X" % byte for byte in (0x52, 0x4A, 0x93, array >> 8 & 0xFF)
+            )
+            + ":%02X:%02X:%02X:%02X" % (array & 0xFF, controller, number, 0),
+        }
+        if slot % 2:
+            record["failover"] = "CT%d.FC%d" % ((controller + 1) % 2, number)
+        return record
+
+    def nic(self, index):
+        array, slot = divmod(index, self.nics_per_array)
+        controller, number = divmod(slot, 3)
+        return {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("nic", index),
+            "name": "ct%d.eth%d" % (controller % 2, number),
+            "arrays": [self.array_ref(array)],
+            "address": "10.%d.%d.%d" % (array >> 8 & 0xFF, array & 0xFF, slot + 10),
+            "enabled": number != 2,
+            "gateway": "10.%d.%d.1" % (array >> 8 & 0xFF, array & 0xFF),
+            "hwaddr": "24:a9:37:%02x:%02x:%02x"
+            % (array >> 8 & 0xFF, array & 0xFF, slot),
+            "mtu": 9000 if number else 1500,
+            "netmask": "255.255.255.0",
+            "services": ["management"] if number == 0 else ["iscsi"],
+            "speed": 25000000000,
+            "subinterfaces": [],
+        }
+
+    def pod_ref(self, index):
+        array, slot = divmod(index, self.pods_per_array)
+        return {
+            "id": uuid_for("pod", index),
+            "name": "pod-%05d-%d" % (array, slot),
+            "resource_type": "pods",
+        }
+
+    def pod(self, index):
+        array = index // self.pods_per_array
+        record = self.pod_ref(index)
+        del record["resource_type"]
+        record.update(
+            {
+                "_as_of": EPOCH_MS,
+                "arrays": [self.array_ref(array)],
+                "mediator": "purestorage",
+            }
+        )
+        return record
+
+    def alert(self, index):
+        array, slot = divmod(index, self.alerts_per_array)
+        created = EPOCH_MS - (index % 90) * DAY_MS
+        state = STATES[(index // 3) % len(STATES)]
+        record = {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("alert", index),
+            "name": "%d" % (10000 + index),
+            "arrays": [self.array_ref(array)],
+            "actual": "%d%%" % (80 + slot),
+            "category": "array",
+            "code": 1000 + slot,
+            "component_name": "ct%d.eth%d" % (slot % 2, slot),
+            "component_type": "network_interface",
+            "created": created,
+            "description": "Simulated alert %d" % slot,
+            "expected": "< 80%",
+            "knowledge_base_url": "https://support.example.com/kb/%d" % (1000 + slot),
+            "notified": created + 60000,
+            "origin": "array",
+            "severity": SEVERITIES[index % len(SEVERITIES)],
+            "state": state,
+            "summary": "Simulated alert %d on %s" % (slot, ARRAY_NAME % array),
+            "updated": created + 120000,
+        }
+        if state == "closed":
+            record["closed"] = created + DAY_MS
+        return record
+
+    def support_contract(self, index):
+        start = EPOCH_MS - (365 + index % 365) * DAY_MS
+        return {
+            "resource": self.array_ref(index),
+            "start_date": start,
+            "end_date": start + (365 * 3 if index % 10 else 330) * DAY_MS,
+        }
+
+    def sustainability(self, index):
+        record = self.array_ref(index, fqdn=False)
+        del record["resource_type"]
+        record.update(
+            {
+                "_as_of": EPOCH_MS,
+                "install_address": {
+                    "geolocation": {
+                        "latitude": 37.4 + index % 10,
+                        "longitude": -122.1 + index % 10,
+                    },
+                    "street_address": "%d Simulated Way" % (index + 1),
+                    "updated": EPOCH_MS - DAY_MS,
+                },
+                "reporting_status": (
+                    "not_enough_data" if index % 9 == 8 else "assessment_ready"
+                ),
+                "assessment": {
+                    "_interval_start": EPOCH_MS - 30 * DAY_MS,
+                    "_interval_end": EPOCH_MS,
+                    "array_data_reduction": 3.5 + (index % 20) / 10.0,
+                    "array_total_load": (index % 100) / 100.0,
+                    "assessment_level": "good",
+                    "capacity_utilization": (index % 90) / 100.0,
+                    "chassis": 1,
+                    "heat_average": 2000.0 + index % 500,
+                    "heat_peak_spec": 4500.0,
+                    "heat_typical_spec": 3000.0,
+                    "power_average": 800.0 + index % 300,
+                    "power_peak_spec": 1600.0,
+                    "power_per_usable_capacity": 2.5,
+                    "power_per_used_space": 4.1,
+                    "power_typical_spec": 1100.0,
+                    "rack_units": 3,
+                    "shelves": index % 3,
+                },
+            }
+        )
+        return record
+
+    def sustainability_insight(self, index):
+        array = index * 5
+        return {
+            "_as_of": EPOCH_MS,
+            "resource": self.array_ref(array),
+            "severity": "info",
+            "type": "high_power_usage",
+            "additional_data": {"power_average": 800.0 + array % 300},
+        }
+
+    # Subscriptions
+
+    def subscription_ref(self, index):
+        return {
+            "id": uuid_for("subscription", index),
+            "name": "SIM-%05d" % index,
+            "resource_type": "subscriptions",
+        }
+
+    def subscription(self, index):
+        record = self.subscription_ref(index)
+        del record["resource_type"]
+        record.update(
+            {
+                "_as_of": EPOCH_MS,
+                "customer_name": "Simulated Customer",
+                "initial_name": record["name"],
+                "start_date": EPOCH_MS - 400 * DAY_MS,
+                "expiration_date": EPOCH_MS + (330 + index) * DAY_MS,
+                "last_updated_date": EPOCH_MS - DAY_MS,
+                "partner_name": "Simulated Partner",
+                "service": "Evergreen//One" if index % 2 == 0 else "Pure as-a-Service",
+                "status": "active",
+                "subscription_term": 36,
+            }
+        )
+        return record
+
+    def current_metric(self, name, data, unit):
+        return {
+            "data": data,
+            "unit": unit,
+            "metric": {"name": name, "resource_type": "metrics"},
+        }
+
+    def subscription_license(self, index):
+        resources = []
+        for array in range(index, self.arrays, self.subscriptions)[:50]:
+            resource = self.array_ref(array)
+            resource.update(
+                {
+                    "activation_time": EPOCH_MS - (400 - array % 30) * DAY_MS,
+                    "usage": self.current_metric(
+                        "subscription_array_usage", 1.0e12 * (1 + array % 7), "B"
+                    ),
+                }
+            )
+            resources.append(resource)
+        return {
+            "_as_of": EPOCH_MS,
+            "id": uuid_for("license", index),
+            "name": "L-SIM-%05d" % index,
+            "subscription": self.subscription_ref(index),
+            "service_tier": "//Block Ultra",
+            "start_date": EPOCH_MS - 400 * DAY_MS,
+            "expiration_date": EPOCH_MS + (330 + index) * DAY_MS,
+            "last_updated_date": EPOCH_MS - DAY_MS,
+            "marketplace_partner": {"name": "None", "reference_id": ""},
+            "site_address": {"city": "Mountain View", "country": "US", "state": "CA"},
+            "pre_ratio": self.current_metric("subscription_pre_ratio", 4.0, ""),
+            "average_on_demand": self.current_metric(
+                "subscription_average_on_demand", 0.0, "B"
+            ),
+            "quarter_on_demand": self.current_metric(
+                "subscription_quarter_on_demand", 0.0, "B"
+            ),
+            "reservation": self.current_metric("subscription_reservation", 5.0e14, "B"),
+            "usage": self.current_metric("subscription_usage", 3.2e14, "B"),
+            "resources": resources,
+        }
+
+    def invoice(self, index):
+        subscription = index // 3
+        issued = EPOCH_MS - (index % 3) * 90 * DAY_MS
+        return {
+            "id": "INV-%07d" % index,
+            "amount": 12500.0 + subscription,
+            "currency": "USD",
+            "date": issued,
+            "due_date": issued + 30 * DAY_MS,
+            "ship_date": issued,
+            "end_user_name": "Simulated Customer",
+            "end_user_purchase_order": "PO-E-%05d" % subscription,
+            "partner_purchase_order": "PO-P-%05d" % subscription,
+            "payment_terms": "Net 30",
+            "sales_representative": "Simulated Rep",
+            "status": "paid" if index % 3 else "open",
+            "subscription": self.subscription_ref(subscription),
+            "lines": [
+                {
+                    "item": "EG1-BLOCK-ULTRA",
+                    "description": "Reserved capacity",
+                    "quantity": 100,
+                    "unit_price": 125.0,
+                    "amount": 12500.0,
+                    "start_date": issued,
+                    "end_date": issued + 90 * DAY_MS,
+                    "tax": {"amount": 1031.25, "percentage": 8.25},
+                    "components": [
+                        {"item": "TB-RESERVED", "description": "TiB", "quantity": 100}
+                    ],
+                }
+            ],
+        }
+
+    def counted(self, kind):
+        """Return a builder for collections the collection only counts"""
+
+        def build(index):
+            return {
+                "_as_of": EPOCH_MS,
+                "id": uuid_for(kind, index),
+                "name": "%s-%07d" % (kind, index),
+                "arrays": [self.array_ref(index % self.arrays)],
+            }
+
+        return build
+
+    def _collections(self):
+        per_array = self.array_range
+        return {
+            "/arrays": Collection(
+                self.arrays,
+                self.array,
+                {"name": per_array(1)},
+            ),
+            "/volumes": Collection(
+                self.volumes,
+                self.volume,
+                {
+                    "arrays.name": per_array(self.volumes_per_array),
+                    "name": lambda value: self.volume_index(value, r"^vol-(\d+)$"),
+                    "serial": lambda value: self.volume_index(
+                        value, r"^5117AB00([0-9A-Fa-f]{16})$", 16
+                    ),
+                },
+            ),
+            "/drives": Collection(
+                self.arrays * self.drives_per_array,
+                self.drive,
+                {"arrays.name": per_array(self.drives_per_array)},
+            ),
+            "/ports": Collection(
+                self.arrays * self.ports_per_array,
+                self.port,
+                {"arrays.name": per_array(self.ports_per_array)},
+            ),
+            "/network-interfaces": Collection(
+                self.arrays * self.nics_per_array,
+                self.nic,
+                {"arrays.name": per_array(self.nics_per_array)},
+            ),
+            "/pods": Collection(
+                self.arrays * self.pods_per_array,
+                self.pod,
+                {"arrays.name": per_array(self.pods_per_array)},
+            ),
+            "/alerts": Collection(
+                self.arrays * self.alerts_per_array,
+                self.alert,
+                {"arrays.name": per_array(self.alerts_per_array)},
+            ),
+            "/arrays/support-contracts": Collection(
+                self.arrays,
+                self.support_contract,
+                {"resource.name": per_array(1)},
+                names_path="resource.name",
+            ),
+            "/assessment/sustainability/arrays": Collection(
+                self.arrays, self.sustainability, {"name": per_array(1)}
+            ),
+            "/assessment/sustainability/insights/arrays": Collection(
+                (self.arrays + 4) // 5,
+                self.sustainability_insight,
+                names_path="resource.name",
+            ),
+            "/subscriptions": Collection(self.subscriptions, self.subscription),
+            "/subscription-licenses": Collection(
+                self.subscriptions, self.subscription_license
+            ),
+            "/subscription-assets": Collection(0, self.counted("asset")),
+            "/invoices": Collection(
+                self.subscriptions * 3, self.invoice, names_path="id"
+            ),
+            "/volume-snapshots": Collection(
+                self.volumes * 2, self.counted("volume-snapshot")
+            ),
+            "/file-systems": Collection(self.arrays * 10, self.counted("fs")),
+            "/file-system-snapshots": Collection(
+                self.arrays * 40, self.counted("fs-snapshot")
+            ),
+            "/buckets": Collection(self.arrays * 5, self.counted("bucket")),
+            "/directories": Collection(self.arrays * 20, self.counted("directory")),
+            "/object-store-accounts": Collection(
+                self.arrays * 2, self.counted("account")
+            ),
+        }
+
+    # Tags
+
+    def tags(self, index):
+        """Return the mutable tag dictionary of an array, seeding it once"""
+        with self._tags_lock:
+            if index not in self._tags:
+                seeded = [
+                    ("site", "dc%d" % (index % 4)),
+                    ("owner", "team-%d" % (index % 7)),
+                    ("tier", "gold" if index % 3 == 0 else "silver"),
+                ]
+                self._tags[index] = dict(seeded[: self.tags_per_array])
+            return self._tags[index]
+
+    def tag_record(self, index, key, value):
+        return {
+            "key": key,
+            "value": value,
+            "namespace": "default",
+            "tag_organization_id": 1,
+            "resource": self.array_ref(index, fqdn=False),
+        }
+
+    # Metrics
+
+    def metric_series(self, metric, resource, start, end, resolution):
+        seed = int(hashlib.md5((metric + resource).encode()).hexdigest()[:8], 16)
+        unit = next((unit for word, unit in METRIC_UNITS.items() if word in metric), "")
+        scale = {"B/s": 5.0e8, "us": 400.0, "IO/s": 50000.0, "B": 1.0e14}.get(unit, 1.0)
+        base = scale * (0.25 + (seed % 1000) / 2000.0)
+        if unit == "B":
+            # Space is a share of a capacity fixed per resource and grows by
+            # up to 0.1% of it a day, so used space stays below capacity for
+            # a year after EPOCH_MS and arrays reach a forecast threshold at
+            # different times
+            resource_seed = int(hashlib.md5(resource.encode()).hexdigest()[:8], 16)
+            capacity = scale * (0.5 + (resource_seed % 1000) / 1000.0)
+            base = capacity * (0.2 + 0.4 * (seed % 1000) / 1000.0)
+            growth = capacity * 0.001 * (seed % 97) / 96.0
+        first = start - start % resolution + (resolution if start % resolution else 0)
+        data = []
+        for timestamp in range(first, end + 1, resolution):
+            step = (timestamp - EPOCH_MS) / float(resolution)
+            value = base * (1 + 0.3 * math.sin(step / 48.0 + seed % 17))
+            if unit == "B" and "capacity" in metric:
+                value = capacity
+            elif unit == "B":
+                days = (timestamp - EPOCH_MS) / float(DAY_MS)
+                value = min(max(base + growth * days, 0.0), capacity)
+            elif not unit:
+                value = min(max(value / scale * 0.5, 0.0), 1.0)
+            data.append([timestamp, round(value, 3)])
+        return unit, data
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Pure1Simulator/1.0"
+    # Send headers and body in one segment so small responses do not stall
+    # on delayed ACKs, which would swamp the latency being measured
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        query = dict(
+            (key, values[-1])
+            for key, values in parse_qs(url.query, keep_blank_values=True).items()
+        )
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if url.path.startswith("/_sim/"):
+            return self.control(method, url.path)
+        self.server.delay()
+        if url.path == TOKEN_PATH and method == "POST":
+            return self.reply(200, self.token(), url.path)
+        match = API_PATH.match(url.path)
+        if not match:
+            return self.error(404, "Unknown path %s" % url.path, url.path)
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self.error(401, "Missing access token", url.path)
+        endpoint = match.group(1)
+        if self.server.overloaded():
+            return self.reply(
+                503,
+                {"errors": [{"message": "Server is busy"}]},
+                endpoint,
+                headers={"Retry-After": "0"},
+            )
+        try:
+            if endpoint == "/arrays/tags" and method in ("GET", "DELETE"):
+                status, payload = self.array_tags(method, query, body)
+            elif endpoint == "/arrays/tags/batch" and method == "PUT":
+                status, payload = self.array_tags(method, query, body)
+            elif endpoint == "/metrics/history" and method == "GET":
+                status, payload = 200, self.metrics_history(query)
+            elif endpoint in self.server.fleet.collections and method == "GET":
+                status, payload = 200, self.collection(endpoint, query)
+            else:
+                return self.error(404, "Unsupported endpoint %s" % endpoint, endpoint)
+        except (FilterError, ValueError) as err:
+            return self.error(400, str(err), endpoint)
+        self.reply(status, payload, endpoint)
+
+    def control(self, method, path):
+        if path == "/_sim/stats" and method == "GET":
+            return self.reply(200, self.server.snapshot(), path, count=False)
+        if path == "/_sim/reset" and method == "POST":
+            self.server.reset()
+            return self.reply(200, {}, path, count=False)
+        return self.error(404, "Unknown control path %s" % path, path)
+
+    def token(self):
+        now = int(time.time())
+        claims = {"iss": "pure1-simulator", "iat": now, "exp": now + 36000}
+        return {
+            "access_token": jwt_token(claims),
+            "issued_token_type": "urn:ietf:params:oauth:token-type:access_token",
+            "token_type": "Bearer",
+            "expires_in": 36000,
+        }
+
+    def collection(self, endpoint, query):
+        collection = self.server.fleet.collections[endpoint]
+        groups = parse_filter(query["filter"]) if query.get("filter") else []
+        if query.get("names"):
+            names = split_list(query["names"])
+            # Like Pure1, a request naming an unknown object fails as a whole
+            for name in names:
+                if not collection.select([[(collection.names_path, "=", name)]])[1]:
+                    raise ValueError("Object %s does not exist" % name)
+            groups = [
+                group + [(collection.names_path, "=", name)]
+                for group in (groups or [[]])
+                for name in names
+            ]
+        records, total = collection.select(groups)
+        return self.page(records, total, query)
+
+    def page(self, records, total, query):
+        limit = int(query.get("limit") or DEFAULT_LIMIT)
+        offset = int(query.get("continuation_token", "0").strip("'") or 0)
+        if isinstance(records, (list, RecordRange)):
+            items = records[offset : offset + limit]
+        else:
+            items = list(itertools.islice(records, offset, offset + limit))
+        token = None
+        if offset + len(items) < total:
+            token = str(offset + len(items))
+        return {"continuation_token": token, "total_item_count": total, "items": items}
+
+    def array_tags(self, method, query, body):
+        fleet = self.server.fleet
+        if query.get("resource_names"):
+            indices = []
+            for name in split_list(query["resource_names"]):
+                index = fleet.array_index(name)
+                if index is None:
+                    raise ValueError("Unknown array %s" % name)
+                indices.append(index)
+        elif method == "GET":
+            indices = range(fleet.arrays)
+        else:
+            raise ValueError("resource_names is required")
+        if method == "GET":
+            keys = split_list(query["keys"]) if query.get("keys") else None
+            records = (
+                fleet.tag_record(index, key, value)
+                for index in indices
+                for key, value in sorted(fleet.tags(index).items())
+                if keys is None or key in keys
+            )
+            records = list(records)
+            return 200, self.page(records, len(records), query)
+        if method == "PUT":
+            tags = json.loads(body.decode("utf-8") or "[]")
+            items = []
+            for index in indices:
+                current = fleet.tags(index)
+                for tag in tags:
+                    current[tag["key"]] = tag["value"]
+                    items.append(fleet.tag_record(index, tag["key"], tag["value"]))
+            return 200, {"items": items}
+        if method == "DELETE":
+            for index in indices:
+                for key in split_list(query.get("keys", "")):
+                    fleet.tags(index).pop(key, None)
+            return 200, {}
+        raise ValueError("Unsupported method %s" % method)
+
+    def metrics_history(self, query):
+        fleet = self.server.fleet
+        for required in ("names", "resource_names", "start_time", "end_time"):
+            if not query.get(required):
+                raise ValueError("%s is required" % required)
+        resolution = int(query.get("resolution") or 30000)
+        start = int(query["start_time"])
+        end = int(query["end_time"])
+        names = split_list(query["names"])
+        resources = split_list(query["resource_names"])
+        if len(names) * len(resources) > METRIC_MAX_SERIES:
+            raise ValueError(
+                "At most %d metric and resource combinations allowed"
+                % METRIC_MAX_SERIES
+            )
+        if (end - start) // resolution >= METRIC_MAX_POINTS:
+            raise ValueError("At most %d points per series allowed" % METRIC_MAX_POINTS)
+        items = []
+        for metric in names:
+            for resource in resources:
+                index = fleet.array_index(resource)
+                if index is None:
+                    continue
+                unit, data = fleet.metric_series(
+                    metric, resource, start, end, resolution
+                )
+                items.append(
+                    {
+                        "_as_of": EPOCH_MS,
+                        "id": uuid_for("metric", hash(metric) & 0xFFFF),
+                        "name": metric,
+                        "aggregation": query.get("aggregation", "avg").strip("'"),
+                        "resolution": resolution,
+                        "unit": unit,
+                        "resources": [fleet.array_ref(index)],
+                        "data": data,
+                    }
+                )
+        return {
+            "continuation_token": None,
+            "total_item_count": len(items),
+            "items": items,
+        }
+
+    def error(self, status, message, endpoint):
+        self.reply(status, {"errors": [{"message": message}]}, endpoint)
+
+    def reply(self, status, payload, endpoint, count=True, headers=None):
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        headers = dict(headers or {})
+        if count and status == 200 and self.command == "GET":
+            headers["ETag"] = '"%s"' % hashlib.sha1(data).hexdigest()
+            if headers["ETag"] in split_etags(self.headers.get("If-None-Match")):
+                status, data = 304, b""
+        if (
+            data
+            and self.server.compression
+            and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        ):
+            # The fastest level keeps the simulator out of module timings
+            data = gzip.compress(data, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Request-ID", self.headers.get("X-Request-ID", ""))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        if count:
+            self.server.record(self.command + " " + endpoint, len(data), status)
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        fleet,
+        latency=0.0,
+        jitter=0.0,
+        verbose=False,
+        error_rate=0.0,
+        compression=True,
+    ):
+        ThreadingHTTPServer.__init__(self, address, SimulatorHandler)
+        self.fleet = fleet
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.compression = compression
+        self.verbose = verbose
+        self._stats_lock = threading.Lock()
+        self._random = random.Random(0)
+        self.reset()
+
+    @property
+    def url(self):
+        return "http://%s:%d" % self.server_address[:2]
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._stats_lock:
+                extra = self._random.uniform(0, self.jitter)
+            time.sleep((self.latency + extra) / 1000.0)
+
+    def overloaded(self):
+        """Return True when a request should be rejected as overloaded"""
+        if not self.error_rate:
+            return False
+        with self._stats_lock:
+            return self._random.random() < self.error_rate
+
+    def record(self, endpoint, sent, status=200):
+        with self._stats_lock:
+            stats = self.stats.setdefault(
+                endpoint, {"requests": 0, "bytes": 0, "not_modified": 0}
+            )
+            stats["requests"] += 1
+            stats["bytes"] += sent
+            if status == 304:
+                stats["not_modified"] += 1
+
+    def reset(self):
+        with self._stats_lock:
+            self.stats = {}
+
+    def snapshot(self):
+        with self._stats_lock:
+            endpoints = dict((key, dict(value)) for key, value in self.stats.items())
+        return {
+            "requests": sum(value["requests"] for value in endpoints.values()),
+            "bytes": sum(value["bytes"] for value in endpoints.values()),
+            "not_modified": sum(value["not_modified"] for value in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+
+def start_simulator(
+    host="127.0.0.1",
+    port=0,
+    latency=0.0,
+    jitter=0.0,
+    error_rate=0.0,
+    compression=True,
+    **fleet
+):
+    """Start a simulator in a background thread and return the server
+
+    Keyword arguments not listed are passed to Fleet. Call shutdown() and
+    server_close() on the returned server when done.
+    """
+    server = SimulatorServer(
+        (host, port),
+        Fleet(**fleet),
+        latency,
+        jitter,
+        error_rate=error_rate,
+        compression=compression,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def write_private_key(path):
+    """Write an unencrypted RSA key the Pure1 client can sign ID tokens with"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with open(path, "wb") as key_file:
+        key_file.write(
+            key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.TraditionalOpenSSL,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--arrays", type=int, default=10)
+    parser.add_argument("--volumes", type=int, default=1000)
+    parser.add_argument("--drives-per-array", type=int, default=20)
+    parser.add_argument("--ports-per-array", type=int, default=8)
+    parser.add_argument("--nics-per-array", type=int, default=6)
+    parser.add_argument("--pods-per-array", type=int, default=2)
+    parser.add_argument("--alerts-per-array", type=int, default=6)
+    parser.add_argument("--tags-per-array", type=int, default=2)
+    parser.add_argument("--subscriptions", type=int)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="milliseconds added per request"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="up to this many random milliseconds added per request",
+    )
+    parser.add_argument(
+        "--write-key",
+        metavar="PATH",
+        help="write a private key for PURE1_PRIVATE_KEY_FILE",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="fraction of API requests rejected with 503 Server is busy",
+    )
+    parser.add_argument(
+        "--no-compression",
+        action="store_true",
+        help="ignore Accept-Encoding and always send uncompressed responses",
+    )
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if args.write_key:
+        write_private_key(args.write_key)
+    fleet = Fleet(
+        arrays=args.arrays,
+        volumes=args.volumes,
+        drives_per_array=args.drives_per_array,
+        ports_per_array=args.ports_per_array,
+        nics_per_array=args.nics_per_array,
+        pods_per_array=args.pods_per_array,
+        alerts_per_array=args.alerts_per_array,
+        tags_per_array=args.tags_per_array,
+        subscriptions=args.subscriptions,
+    )
+    server = SimulatorServer(
+        (args.host, args.port),
+        fleet,
+        args.latency,
+        args.jitter,
+        args.verbose,
+        args.error_rate,
+        compression=not args.no_compression,
+    )
+    print("Pure1 simulator listening on %s" % server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
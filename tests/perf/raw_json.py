@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Per record cost of the raw JSON item path against pypureclient models
+
+Consumes the record generators of pure1_volumes, pure1_drives and
+pure1_alerts against the Pure1 simulator twice per scenario, once with the
+items parsed from the raw JSON pages and once with PURE1_RAW_JSON=0, which
+builds the pypureclient models, and reports the time per record of each.
+Every run is a fresh interpreter, so neither path profits from warm
+caches of the other.
+
+    python tests/perf/raw_json.py --tier small --tier medium
+
+Times include the requests to the simulator, which are the same for both
+paths, so the speed-up of the deserialisation alone is larger still.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from benchmark import (  # noqa: E402
+    TIERS,
+    BenchmarkModule,
+    ModuleExit,
+    collections_path,
+)
+from pure1_simulator import start_simulator, write_private_key  # noqa: E402
+
+# (scenario, module, record generator, module parameters)
+SCENARIOS = [
+    ("volumes_fleet", "pure1_volumes", "generate_volume_records", {}),
+    ("drives_fleet", "pure1_drives", "generate_drive_records", {}),
+    (
+        "alerts_fleet",
+        "pure1_alerts",
+        "generate_alert_records",
+        {"severity": "warning", "state": "open"},
+    ),
+]
+PATHS = [("model", "0"), ("raw", "1")]
+
+
+def run_records(module_name, function, params, api_url, key_file):
+    """Consume one record generator in this interpreter and time it"""
+    os.environ["PURE1_API_URL"] = api_url
+    utils = importlib.import_module(
+        "ansible_collections.purestorage.pure1.plugins.module_utils.pure1"
+    )
+    plugin = importlib.import_module(
+        "ansible_collections.purestorage.pure1.plugins.modules." + module_name
+    )
+    pure_1 = utils.pure1_client(
+        app_id="pure1:apikey:benchmark", private_key_file=key_file
+    )
+    module = BenchmarkModule(plugin, params)
+    records = 0
+    start = time.time()
+    try:
+        for dummy in getattr(plugin, function)(module, pure_1):
+            records += 1
+    except ModuleExit:
+        pass
+    return {"wall_s": round(time.time() - start, 4), "records": records}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tier", choices=sorted(TIERS), action="append")
+    parser.add_argument(
+        "--scenario", action="append", help="only run the named scenarios"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest run")
+    parser.add_argument("--collections-path")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--child", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        module_name, function, params, api_url, key_file = args.child
+        measurements = run_records(
+            module_name, function, json.loads(params), api_url, key_file
+        )
+        print(json.dumps(measurements))
+        return
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [collections_path(args.collections_path)]
+        + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    # The client caches its access token in the working directory
+    workdir = tempfile.mkdtemp(prefix="pure1_raw_json_")
+    key_file = os.path.join(workdir, "key.pem")
+    write_private_key(key_file)
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if not args.scenario or scenario[0] in args.scenario
+    ]
+
+    results = {}
+    for tier in args.tier or ["small"]:
+        server = start_simulator(**TIERS[tier])
+        try:
+            for scenario, module_name, function, params in scenarios:
+                name = "%s/%s" % (tier, scenario)
+                results[name] = {}
+                for path, raw_json in PATHS:
+                    env["PURE1_RAW_JSON"] = raw_json
+                    runs = []
+                    for dummy in range(max(args.repeat, 1)):
+                        output = subprocess.check_output(
+                            [
+                                sys.executable,
+                                os.path.abspath(__file__),
+                                "--child",
+                                module_name,
+                                function,
+                                json.dumps(params),
+                                server.url,
+                                key_file,
+                            ],
+                            env=env,
+                            cwd=workdir,
+                        )
+                        runs.append(json.loads(output.decode("utf-8").splitlines()[-1]))
+                    best = min(runs, key=lambda run: run["wall_s"])
+                    best["us_per_record"] = round(
+                        best["wall_s"] * 1e6 / max(best["records"], 1), 2
+                    )
+                    results[name][path] = best
+                model, raw = results[name]["model"], results[name]["raw"]
+                results[name]["speedup"] = round(
+                    model["wall_s"] / max(raw["wall_s"], 1e-6), 2
+                )
+                print(
+                    "%-28s %9d records %9.2f us model %9.2f us raw %6.2fx"
+                    % (
+                        name,
+                        raw["records"],
+                        model["us_per_record"],
+                        raw["us_per_record"],
+                        results[name]["speedup"],
+                    )
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        try:
+            import orjson  # noqa: F401
+
+            parser_name = "orjson"
+        except ImportError:
+            parser_name = "json"
+        with open(args.output, "w") as output_file:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "json_parser": parser_name,
+                    "results": results,
+                },
+                output_file,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""Per task startup benchmarks for the Pure1 collection modules
+
+Every Ansible task starts a new interpreter, imports the module and sets up
+a Pure1 client before doing any work. For each module this measures, in
+fresh interpreters:
+
+    process_ms  python -c "import <module>" from start to exit
+    import_ms   importing the module once ansible.module_utils.basic is loaded
+    modules     modules that import adds to sys.modules
+    client_ms   get_pure1() against the simulator, token exchange included
+
+    python tests/perf/startup.py
+    python tests/perf/startup.py --save-baseline
+    python tests/perf/startup.py --baseline tests/perf/startup_baseline.json
+
+With --baseline the exit status is 1 when any module regresses.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import glob
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "startup_baseline.json")
+PACKAGE = "ansible_collections.purestorage.pure1.plugins.modules."
+
+
+def run_child(module_name, api_url, key_file):
+    """Measure the startup of one module in this interpreter"""
+    import ansible.module_utils.basic  # noqa: F401
+
+    before = set(sys.modules)
+    start = time.time()
+    plugin = importlib.import_module(PACKAGE + module_name)
+    imported = time.time()
+    modules = len(set(sys.modules) - before)
+    utils = importlib.import_module(
+        "ansible_collections.purestorage.pure1.plugins.module_utils.pure1"
+    )
+    # Imported after the measurement so it does not count as module startup
+    sys.path.insert(0, HERE)
+    from benchmark import BenchmarkModule
+
+    os.environ["PURE1_API_URL"] = api_url
+    module = BenchmarkModule(
+        plugin,
+        {
+            "app_id": "pure1:apikey:startup",
+            "key_file": key_file,
+            "password": None,
+            "debug_metrics": False,
+        },
+    )
+    client_start = time.time()
+    utils.get_pure1(module)
+    finished = time.time()
+    return {
+        "import_ms": round((imported - start) * 1000, 1),
+        "modules": modules,
+        "client_ms": round((finished - client_start) * 1000, 1),
+    }
+
+
+def process_ms(module_name, env, cwd):
+    start = time.time()
+    subprocess.check_call(
+        [sys.executable, "-c", "import " + PACKAGE + module_name], env=env, cwd=cwd
+    )
+    return round((time.time() - start) * 1000, 1)
+
+
+def compare(results, baseline, time_tolerance, min_time_delta):
+    """Return a list of regressions of results against a baseline
+
+    Time increases below min_time_delta milliseconds are treated as noise,
+    any new module imported at load time is a regression. So is a module
+    missing from the baseline, which would otherwise go unchecked.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            regressions.append("%s: no baseline, run with --save-baseline" % name)
+            continue
+        for metric in ["process_ms", "import_ms", "client_ms", "modules"]:
+            if metric == "modules":
+                limit = previous[metric]
+            elif current[metric] - previous[metric] < min_time_delta:
+                continue
+            else:
+                limit = previous[metric] * (1 + time_tolerance)
+            if current[metric] > limit:
+                regressions.append(
+                    "%s: %s %s > baseline %s"
+                    % (name, metric, current[metric], previous[metric])
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--module", action="append", help="only measure the named modules"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="keep the fastest run")
+    parser.add_argument("--collections-path")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help="write the results as the new baseline",
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.5)
+    parser.add_argument(
+        "--min-time-delta", type=float, default=50.0, help="milliseconds"
+    )
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child)))
+        return
+
+    sys.path.insert(0, HERE)
+    from benchmark import collections_path
+    from pure1_simulator import start_simulator, write_private_key
+
+    env = dict(os.environ)
+    env.pop("PURE1_API_URL", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [collections_path(args.collections_path)]
+        + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    workdir = tempfile.mkdtemp(prefix="pure1_startup_")
+    key_file = os.path.join(workdir, "key.pem")
+    write_private_key(key_file)
+    modules = args.module or sorted(
+        os.path.basename(path)[:-3]
+        for path in glob.glob(
+            os.path.join(HERE, "..", "..", "plugins", "modules", "*.py")
+        )
+        if not path.endswith("__init__.py")
+    )
+
+    results = {}
+    runs = dict((module_name, []) for module_name in modules)
+    server = start_simulator(arrays=10, volumes=100)
+    try:
+        # Modules take turns so a noisy spell on the host hits all of them
+        for run in range(max(args.repeat, 1)):
+            for module_name in modules:
+                # Each task runs in a new directory, so the token cache is cold
+                cwd = os.path.join(workdir, "%s-%d" % (module_name, run))
+                os.mkdir(cwd)
+                measurement = json.loads(
+                    subprocess.check_output(
+                        [
+                            sys.executable,
+                            os.path.abspath(__file__),
+                            "--child",
+                            module_name,
+                            server.url,
+                            key_file,
+                        ],
+                        env=env,
+                        cwd=cwd,
+                    )
+                    .decode("utf-8")
+                    .splitlines()[-1]
+                )
+                measurement["process_ms"] = process_ms(module_name, env, cwd)
+                runs[module_name].append(measurement)
+        for module_name in modules:
+            best = dict(
+                (metric, min(run[metric] for run in runs[module_name]))
+                for metric in runs[module_name][0]
+            )
+            results[module_name] = best
+            print(
+                "%-28s %8.1f ms process %7.1f ms import %4d modules %8.1f ms client"
+                % (
+                    module_name,
+                    best["process_ms"],
+                    best["import_ms"],
+                    best["modules"],
+                    best["client_ms"],
+                )
+            )
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        baseline = {"results": {}}
+        if os.path.exists(args.save_baseline):
+            with open(args.save_baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline["python"] = sys.version.split()[0]
+        baseline["results"].update(results)
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(
+            results, baseline, args.time_tolerance, args.min_time_delta
+        )
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against %s" % args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import shutil
+
+import pytest
+
+
+class FailJson(Exception):
+    """Raised by FakeModule.fail_json, with its msg as the message"""
+
+    def __init__(self, **kwargs):
+        super(FailJson, self).__init__(kwargs["msg"])
+        self.result = kwargs
+
+
+class ExitJson(Exception):
+    """Raised by FakeModule.exit_json, with the module result"""
+
+    def __init__(self, **kwargs):
+        super(ExitJson, self).__init__(kwargs)
+        self.result = kwargs
+
+
+class FakeModule(object):
+    """The parts of AnsibleModule the collection uses
+
+    params are the defaults updated with the keyword arguments, warnings
+    are recorded and fail_json and exit_json raise FailJson and ExitJson.
+    """
+
+    FailJson = FailJson
+    ExitJson = ExitJson
+
+    def __init__(self, defaults=None, check_mode=False, **params):
+        self.params = dict(defaults or {})
+        self.params.update(params)
+        self.check_mode = check_mode
+        self.warnings = []
+
+    def fail_json(self, **kwargs):
+        raise FailJson(**kwargs)
+
+    def exit_json(self, **kwargs):
+        raise ExitJson(**kwargs)
+
+    def warn(self, warning):
+        self.warnings.append(warning)
+
+    def add_cleanup_file(self, path):
+        pass
+
+    def atomic_move(self, source, destination):
+        shutil.move(source, destination)
+
+
+@pytest.fixture
+def fake_module():
+    """Return the FakeModule class, call it with the params of a test"""
+    return FakeModule
+
+
+@pytest.fixture
+def run_module(monkeypatch):
+    """Return a function running the main() of a module against a client
+
+    The module gets the defaults of its argument_spec updated with params
+    and the client in place of get_pure1(). The result of exit_json is
+    returned, fail_json raises FailJson.
+    """
+
+    def run(plugin, client, check_mode=False, **params):
+        def ansible_module(argument_spec, **kwargs):
+            defaults = dict(
+                (name, spec.get("default")) for name, spec in argument_spec.items()
+            )
+            return FakeModule(defaults, check_mode=check_mode, **params)
+
+        monkeypatch.setattr(plugin, "AnsibleModule", ansible_module)
+        monkeypatch.setattr(plugin, "get_pure1", lambda module: client)
+        with pytest.raises(ExitJson) as result:
+            plugin.main()
+        return result.value.result
+
+    return run
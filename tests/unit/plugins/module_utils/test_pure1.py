@@ -0,0 +1,796 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import csv
+import gzip
+import json
+import os
+import stat
+import sys
+import time
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.module_utils import pure1
+
+ITEMS = [
+    {"id": "volume-{0}".format(index), "name": "v{0}".format(index)}
+    for index in range(5)
+]
+
+
+class Model(object):
+    def __init__(self, item):
+        self.item = item
+
+    def to_dict(self):
+        return dict(self.item)
+
+
+class ModelResponse(object):
+    status_code = 200
+
+    def __init__(self, items):
+        self.total_item_count = len(items)
+        self.items = iter(Model(item) for item in items)
+
+
+class ErrorResponse(object):
+    status_code = 400
+
+    def __init__(self, message):
+        self.errors = [type("Error", (object,), {"message": message})()]
+
+
+class RawPage(object):
+    def __init__(self, body):
+        self.raw_data = body if isinstance(body, bytes) else json.dumps(body).encode()
+
+
+class Client(object):
+    """A client serving ITEMS in pages of two, raw and as models
+
+    raw_error is raised by the raw request of the page with that
+    continuation token, None for the first page.
+    """
+
+    _timeout = None
+
+    def __init__(self, raw=True, raw_error=(), model_error=None, raw_body=None):
+        self.raw = raw
+        self.raw_error = raw_error
+        self.model_error = model_error
+        self.raw_body = raw_body
+        self.model_requests = 0
+        self.raw_requests = []
+
+    def _Client__get_api_instance(self, api_class):
+        if not self.raw:
+            raise KeyError(api_class)
+        assert api_class == "VolumesApi"
+        return self
+
+    def api16_volumes_get_with_http_info(self, continuation_token=None, **params):
+        self.raw_requests.append(continuation_token)
+        if self.raw_error and self.raw_error[0] == continuation_token:
+            raise self.raw_error[1]
+        if self.raw_body is not None:
+            return RawPage(self.raw_body)
+        start = int(continuation_token or 0)
+        body = {"total_item_count": len(ITEMS), "items": ITEMS[start : start + 2]}
+        if start + 2 < len(ITEMS):
+            body["continuation_token"] = str(start + 2)
+        return RawPage(body)
+
+    def _call_with_retries(self, api_function, **kwargs):
+        assert kwargs.pop("_preload_content") is False
+        kwargs.pop("_request_timeout")
+        return api_function(**kwargs)
+
+    def get_volumes(self, **params):
+        self.model_requests += 1
+        if self.model_error:
+            return ErrorResponse(self.model_error)
+        return ModelResponse(ITEMS)
+
+
+def api_exception(message):
+    from pypureclient._transport.exceptions import ApiException
+
+    err = ApiException(status=400, reason="Bad Request")
+    err.body = json.dumps({"errors": [{"message": message}]}).encode()
+    return err
+
+
+def test_get_collection_pages_raw_items(fake_module):
+    client = Client()
+    res = pure1.get_collection(fake_module(), client, "volumes")
+    assert res.status_code == 200
+    assert res.total_item_count == len(ITEMS)
+    assert list(res.items) == ITEMS
+    assert client.raw_requests == [None, "2", "4"]
+    assert client.model_requests == 0
+
+
+def test_get_collection_limit_counts_items(fake_module):
+    res = pure1.get_collection(fake_module(), Client(), "volumes", limit=3)
+    assert list(res.items) == ITEMS[:3]
+
+
+@pytest.mark.parametrize(
+    "client",
+    [
+        Client(raw=False),
+        Client(raw_error=(None, TypeError("unexpected keyword argument"))),
+        Client(raw_error=(None, AttributeError("raw_data"))),
+        Client(raw_body=b"not json"),
+        Client(raw_body=[]),
+    ],
+)
+def test_get_collection_falls_back_to_models(client, fake_module):
+    res = pure1.get_collection(fake_module(), client, "volumes")
+    assert list(res.items) == ITEMS
+    assert client.model_requests == 1
+
+
+def test_get_collection_raw_json_disabled(monkeypatch, fake_module):
+    monkeypatch.setenv("PURE1_RAW_JSON", "0")
+    client = Client()
+    assert list(pure1.get_collection(fake_module(), client, "volumes").items) == ITEMS
+    assert client.raw_requests == []
+
+
+def test_get_collection_first_page_error_returns_error_response(fake_module):
+    pytest.importorskip("pypureclient")
+    client = Client(
+        raw_error=(None, api_exception("bad filter")), model_error="bad filter"
+    )
+    res = pure1.get_collection(fake_module(), client, "volumes", filter="x")
+    assert res.status_code == 400
+    assert res.errors[0].message == "bad filter"
+
+
+def test_get_collection_later_page_error_fails(fake_module):
+    pytest.importorskip("pypureclient")
+    client = Client(raw_error=("2", api_exception("token expired")))
+    res = pure1.get_collection(fake_module(), client, "volumes")
+    with pytest.raises(
+        fake_module.FailJson, match="Failed to get volumes. Error: token expired"
+    ):
+        list(res.items)
+
+
+class CredentialClient(object):
+    """A client recording the credentials it was created with"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self._api_client = self
+        self.headers = {}
+
+    def set_default_header(self, name, value):
+        self.headers[name] = value
+
+    def get_arrays(self, **params):
+        return ModelResponse([])
+
+
+@pytest.mark.parametrize("password", [None, "secret"])
+def test_get_pure1_environment_credentials(monkeypatch, password, fake_module):
+    monkeypatch.setattr(pure1, "HAS_PYPURECLIENT", True)
+    monkeypatch.setattr(pure1, "pure1_client", CredentialClient)
+    monkeypatch.delenv("PURE1_PROFILE", raising=False)
+    monkeypatch.setenv("PURE1_APP_ID", "pure1:apikey:environment")
+    monkeypatch.setenv("PURE1_PRIVATE_KEY_FILE", "/environment.pem")
+    monkeypatch.setenv("PURE1_PRIVATE_PASSWORD", "secret")
+    module = fake_module(app_id=None, key_file=None, password=password)
+    kwargs = pure1.get_pure1(module).kwargs
+    assert kwargs["app_id"] == "pure1:apikey:environment"
+    assert kwargs["private_key_file"] == "/environment.pem"
+
+
+def volume_record(index, serial=None, **attributes):
+    attributes = dict(attributes, name="v{0}".format(index))
+    return {
+        "id": "volume-{0}".format(index),
+        "name": "v{0}".format(index),
+        "array": "array-1",
+        "serial": serial or "5117ab00{0:016x}".format(index),
+        "pod": None,
+        "attributes": attributes,
+    }
+
+
+def test_fleet_index_serials_ignore_case(fake_module):
+    index = pure1.FleetIndex(fake_module(), ":memory:")
+    index.sync("volumes", [volume_record(10)], 1)
+    for serial in ["5117AB00000000000000000A", "5117ab00000000000000000a"]:
+        objects = index.lookup(serial=serial)
+        assert [record["id"] for record in objects] == ["volume-10"]
+        assert objects[0]["serial"] == "5117AB00000000000000000A"
+
+
+def test_fleet_index_sync_streams_batches(monkeypatch, fake_module):
+    monkeypatch.setattr(pure1, "INDEX_BATCH_SIZE", 3)
+    index = pure1.FleetIndex(fake_module(), ":memory:")
+    consumed = []
+
+    def records(indexes, **attributes):
+        for position in indexes:
+            consumed.append(position)
+            yield volume_record(position, **attributes)
+
+    changes, objects = index.sync("volumes", records(range(8)), 1)
+    assert objects == 8
+    assert len(changes["added"]) == 8
+    assert changes["changed"] == changes["removed"] == []
+    assert index.synced() == {"volumes": {"synced": 1, "objects": 8}}
+
+    # Objects 0 and 1 are removed, 2 changes and 8 is added
+    def second_sync():
+        for record in records(range(3, 9)):
+            yield record
+        yield volume_record(2, destroyed=True)
+
+    del consumed[:]
+    changes, objects = index.sync("volumes", second_sync(), 2)
+    assert consumed == list(range(3, 9))
+    assert objects == 7
+    assert changes == {
+        "added": ["volume-8"],
+        "changed": ["volume-2"],
+        "removed": ["volume-0", "volume-1"],
+    }
+    assert len(index.lookup(kind="volumes")) == 7
+
+    changes, objects = index.sync("volumes", second_sync(), 3)
+    assert changes == {"added": [], "changed": [], "removed": []}
+
+
+@pytest.mark.parametrize(
+    "fields, expected",
+    [
+        (None, {"name": "v1", "size": 1}),
+        ([], {"name": "v1", "size": 1}),
+        (["size", "serial"], {"size": 1}),
+    ],
+)
+def test_project_fields(fields, expected, fake_module):
+    module = fake_module(fields=fields)
+    assert pure1.project_fields(module, {"name": "v1", "size": 1}) == expected
+    assert pure1.field_wanted(module, "size")
+    assert pure1.field_wanted(module, "name") == ("name" in expected)
+
+
+def test_output_file_csv_fallback_without_pyarrow(monkeypatch, tmp_path, fake_module):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    path = str(tmp_path / "volumes.parquet")
+    module = fake_module(output_file=path, output_format="parquet")
+    output = pure1.OutputFile(module, [("name", "string"), ("size", "int64")])
+    output.write({"name": "v1", "size": 1})
+    result = output.close()
+    assert result == {
+        "output_file": str(tmp_path / "volumes.csv.gz"),
+        "output_format": "csv",
+        "records": 1,
+    }
+    assert not os.path.exists(path)
+    with gzip.open(result["output_file"], "rt") as handle:
+        assert list(csv.reader(handle)) == [["name", "size"], ["v1", "1"]]
+    assert "volumes.csv.gz" in module.warnings[0]
+
+
+@pytest.mark.parametrize(
+    "name, written", [("volumes.csv", "volumes.csv.gz"), ("volumes", "volumes.csv.gz")]
+)
+def test_output_file_csv_is_named_csv_gz(tmp_path, name, written, fake_module):
+    module = fake_module(output_file=str(tmp_path / name), output_format="csv")
+    output = pure1.OutputFile(module, [("name", "string")])
+    output.write({"name": "v1"})
+    assert output.close()["output_file"] == str(tmp_path / written)
+    assert not os.path.exists(str(tmp_path / name))
+    with gzip.open(str(tmp_path / written), "rt") as handle:
+        assert list(csv.reader(handle)) == [["name"], ["v1"]]
+    assert written in module.warnings[0]
+
+
+def test_output_file_csv_gz_kept(tmp_path, fake_module):
+    path = str(tmp_path / "volumes.csv.gz")
+    module = fake_module(output_file=path, output_format="csv")
+    output = pure1.OutputFile(module, [("name", "string")])
+    assert output.close()["output_file"] == path
+    assert module.warnings == []
+
+
+@pytest.mark.parametrize(
+    "timestamp_format, expected",
+    [
+        ("epoch_ms", 1700000000123),
+        ("iso8601_utc", "2023-11-14T22:13:20.123Z"),
+        ("legacy", "2023-11-14 22:13:20 UTC"),
+        (None, "2023-11-14 22:13:20 UTC"),
+    ],
+)
+def test_format_timestamp(timestamp_format, expected, fake_module):
+    module = fake_module(timestamp_format=timestamp_format)
+    assert pure1.format_timestamp(module, 1700000000123) == expected
+    assert pure1.format_timestamp(module, None) is None
+
+
+def test_format_timestamp_legacy_localtime(monkeypatch, fake_module):
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    try:
+        module = fake_module(timestamp_format="legacy")
+        assert (
+            pure1.format_timestamp(
+                module,
+                1700000000123,
+                legacy_format="%Y-%m-%d %H:%M",
+                legacy_localtime=True,
+            )
+            == "2023-11-14 17:13"
+        )
+        # Other formats are always UTC
+        module = fake_module(timestamp_format="iso8601_utc")
+        assert (
+            pure1.format_timestamp(module, 1700000000123, legacy_localtime=True)
+            == "2023-11-14T22:13:20.123Z"
+        )
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def statistics(request, monkeypatch):
+    """Run a test with NumPy, when installed, and with pure Python"""
+    if request.param == "numpy":
+        monkeypatch.setattr(pure1, "_NUMPY", pytest.importorskip("numpy"))
+    else:
+        monkeypatch.setattr(pure1, "_NUMPY", False)
+    return request.param
+
+
+DAY = 86400000
+
+
+def test_summarize_series(statistics):
+    data = [[1700000000000 + day * DAY, 10.0 * (day + 1)] for day in range(4)]
+    # Samples without a value are skipped
+    data.insert(2, [1700000000000 + DAY + 1, None])
+    summary = pure1.summarize_series(data)
+    assert sorted(summary) == sorted(pure1.SUMMARY_STATISTICS)
+    assert summary["avg"] == pytest.approx(25.0)
+    assert summary["p95"] == pytest.approx(38.5)
+    assert summary["p99"] == pytest.approx(39.7)
+    assert summary["max"] == pytest.approx(40.0)
+    assert summary["rate"] == pytest.approx(10.0)
+
+
+def test_summarize_series_single_sample(statistics):
+    summary = pure1.summarize_series([[1700000000000, 5]])
+    assert summary == {"avg": 5.0, "p95": 5.0, "p99": 5.0, "max": 5.0, "rate": 0.0}
+
+
+@pytest.mark.parametrize("data", [[], [[1700000000000, None]]])
+def test_summarize_series_without_values(statistics, data):
+    assert pure1.summarize_series(data) is None
+
+
+SERIES = ("array_effective_used_space", "array-1", 300000, "avg")
+
+
+class Series(object):
+    def __init__(self, name, resource, data):
+        self.name = name
+        self.resources = [type("Resource", (object,), {"name": resource})()]
+        self.unit = "B"
+        self.data = data
+
+
+class MetricsClient(object):
+    """A client answering each series with one sample at its window start
+
+    error is raised by, or returned as the response of, the request for
+    the resource of that name.
+    """
+
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = []
+
+    def get_metrics_history(self, names, resource_names, start_time, **kwargs):
+        self.requests.append(resource_names)
+        if self.error in resource_names:
+            raise ValueError("{0} is unavailable".format(self.error))
+        items = [
+            Series(name, resource, [[start_time, 1]])
+            for name in names
+            for resource in resource_names
+        ]
+        response = ModelResponse([])
+        response.items = iter(items)
+        return response
+
+
+def metric_history(module, client, resources, end_time=0):
+    return pure1.get_metric_history(
+        module, client, ["load"], resources, 0, end_time, 1000, "avg"
+    )
+
+
+def test_get_metric_history_merges_windows(monkeypatch, fake_module):
+    monkeypatch.setattr(pure1, "METRIC_MAX_POINTS", 2)
+    client = MetricsClient()
+    assert list(metric_history(fake_module(), client, ["a", "b"], 4000)) == [
+        ("load", "a", "B", [[0, 1], [1001, 1], [2002, 1], [3003, 1]]),
+        ("load", "b", "B", [[0, 1], [1001, 1], [2002, 1], [3003, 1]]),
+    ]
+    assert len(client.requests) == 4
+
+
+def test_get_metric_history_submits_bounded_batches(monkeypatch, fake_module):
+    monkeypatch.setattr(pure1, "METRIC_MAX_SERIES", 1)
+    monkeypatch.setattr(pure1, "MAX_WORKERS", 2)
+    client = MetricsClient()
+    series = metric_history(fake_module(), client, ["a", "b", "c", "d", "e"])
+    assert next(series)[1] == "a"
+    # Only the first batch of requests has been sent
+    assert sorted(client.requests) == [["a"], ["b"]]
+    assert [item[1] for item in series] == ["b", "c", "d", "e"]
+
+
+def test_get_metric_history_client_error_fails(monkeypatch, fake_module):
+    monkeypatch.setattr(pure1, "METRIC_MAX_SERIES", 1)
+    series = metric_history(fake_module(), MetricsClient(error="b"), ["a", "b"])
+    with pytest.raises(
+        fake_module.FailJson,
+        match="^Failed to get metrics load for b. Error: b is unavailable$",
+    ):
+        list(series)
+
+
+def test_metric_cache_missing_windows(tmp_path, fake_module):
+    cache = pure1.MetricCache(fake_module(), str(tmp_path / "metrics.db"))
+    assert cache.missing(SERIES, 1000, 5000) == [(1000, 5000)]
+    cache.store(SERIES, "B", 2000, [[2000, 1.0], [3000, 2.0]])
+    # Before and after the cached range, the last sample is fetched again
+    assert cache.missing(SERIES, 1000, 5000) == [(1000, 1999), (3000, 5000)]
+    assert cache.missing(SERIES, 2000, 2500) == []
+    # Other resolutions are other series
+    assert cache.missing(SERIES[:2] + (30000, "avg"), 2000, 2500) == [(2000, 2500)]
+
+
+def test_metric_cache_store_and_load(tmp_path, fake_module):
+    path = str(tmp_path / "metrics.db")
+    cache = pure1.MetricCache(fake_module(), path)
+    assert cache.load(SERIES, 0, 5000) == (None, [])
+    cache.store(SERIES, "B", 1000, [[1000, 1.0], [2000, 2.0]])
+    # A refetched sample replaces the cached one and a missing unit is kept
+    cache.store(SERIES, None, 2000, [[2000, 2.5], [3000, None]])
+    cache.close()
+
+    cache = pure1.MetricCache(fake_module(), path)
+    assert cache.load(SERIES, 0, 5000) == (
+        "B",
+        [[1000, 1.0], [2000, 2.5], [3000, None]],
+    )
+    assert cache.load(SERIES, 1500, 2500) == ("B", [[2000, 2.5]])
+    assert cache.missing(SERIES, 1000, 5000) == [(3000, 5000)]
+
+
+def test_metric_cache_expire(tmp_path, fake_module):
+    cache = pure1.MetricCache(fake_module(), str(tmp_path / "metrics.db"))
+    cache.store(SERIES, "B", 1000, [[1000, 1.0], [2000, 2.0], [3000, 3.0]])
+    cache.expire(2500)
+    assert cache.load(SERIES, 0, 5000) == ("B", [[3000, 3.0]])
+    # Expired samples are fetched again if requested
+    assert cache.missing(SERIES, 1000, 3000) == [(1000, 2499), (3000, 3000)]
+
+
+def test_metric_cache_retention(tmp_path, fake_module):
+    path = str(tmp_path / "metrics.db")
+    now = int(time.time() * 1000)
+    cache = pure1.MetricCache(fake_module(), path)
+    cache.store(SERIES, "B", now - 10 * DAY, [[now - 10 * DAY, 1.0], [now, 2.0]])
+    cache.close()
+    cache = pure1.MetricCache(fake_module(), path, retention_days=5)
+    assert cache.load(SERIES, 0, now) == ("B", [[now, 2.0]])
+
+
+def test_metric_cache_file_is_private(tmp_path, fake_module):
+    path = str(tmp_path / "metrics.db")
+    pure1.MetricCache(fake_module(), path).close()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_metric_cache_check_mode_keeps_file(tmp_path, fake_module):
+    path = str(tmp_path / "metrics.db")
+    pure1.MetricCache(fake_module(check_mode=True), path).close()
+    assert not os.path.exists(path)
+
+    cache = pure1.MetricCache(fake_module(), path)
+    cache.store(SERIES, "B", 1000, [[1000, 1.0]])
+    cache.close()
+    with open(path, "rb") as handle:
+        content = handle.read()
+    # Cached samples are used, but new ones and expiry are not written
+    cache = pure1.MetricCache(fake_module(check_mode=True), path)
+    assert cache.load(SERIES, 0, 5000) == ("B", [[1000, 1.0]])
+    cache.store(SERIES, "B", 2000, [[2000, 2.0]])
+    cache.close()
+    pure1.MetricCache(fake_module(check_mode=True), path, retention_days=1).close()
+    with open(path, "rb") as handle:
+        assert handle.read() == content
+    cache = pure1.MetricCache(fake_module(), path)
+    assert cache.load(SERIES, 0, 5000) == ("B", [[1000, 1.0]])
+
+
+def test_metric_cache_open_error_fails(tmp_path, fake_module):
+    with pytest.raises(fake_module.FailJson, match="^Failed to open metric cache "):
+        pure1.MetricCache(fake_module(), str(tmp_path / "missing" / "metrics.db"))
+
+
+def daily(*values):
+    return [[1700000000000 + day * DAY, value] for day, value in enumerate(values)]
+
+
+def test_forecast_capacity(statistics):
+    series = [
+        # Growing by 10 a day, 30 below 80% of capacity
+        daily(100, 110, None, 130),
+        # Already past the threshold
+        daily(170),
+        # Shrinking
+        daily(100, 90),
+        # Without samples
+        [],
+        daily(None),
+        # Unknown capacity
+        daily(10, 20),
+    ]
+    capacities = [200, 200, 200, 200, 200, None]
+    forecasts = pure1.forecast_capacity(series, capacities, 80)
+    assert len(forecasts) == len(series)
+    used, growth, days = forecasts[0]
+    assert used == 130.0
+    assert growth == pytest.approx(10.0)
+    assert days == pytest.approx(3.0)
+    assert forecasts[1] == (170.0, 0.0, 0.0)
+    assert forecasts[2][:2] == (90.0, pytest.approx(-10.0))
+    assert forecasts[2][2] is None
+    assert forecasts[3] == forecasts[4] == (None, None, None)
+    assert forecasts[5][:2] == (20.0, pytest.approx(10.0))
+    assert forecasts[5][2] is None
+
+
+def test_forecast_capacity_without_samples(statistics):
+    assert pure1.forecast_capacity([[], []], [100, 100], 80) == [
+        (None, None, None),
+        (None, None, None),
+    ]
+
+
+def delta_run(module, path, records):
+    state = pure1.DeltaState(module, path)
+    for key, record in records.items():
+        state.add(key, record)
+    return state.close()
+
+
+def test_delta_state(tmp_path, fake_module):
+    path = str(tmp_path / "state.json")
+    records = {"array-1": {"load": 1}, "array-2": {"load": 2}, "array-3": {}}
+    assert delta_run(fake_module(), path, records) == {
+        "state_file": path,
+        "added": ["array-1", "array-2", "array-3"],
+        "modified": [],
+        "removed": [],
+    }
+    # Only digests are kept in the state file
+    with open(path) as state:
+        assert sorted(json.load(state)) == ["array-1", "array-2", "array-3"]
+
+    records = {"array-1": {"load": 1}, "array-2": {"load": 3}, "array-4": {}}
+    assert delta_run(fake_module(), path, records) == {
+        "state_file": path,
+        "added": ["array-4"],
+        "modified": ["array-2"],
+        "removed": ["array-3"],
+    }
+    assert delta_run(fake_module(), path, records)["added"] == []
+
+
+def test_delta_state_check_mode_keeps_state(tmp_path, fake_module):
+    path = str(tmp_path / "state.json")
+    delta_run(fake_module(), path, {"array-1": {"load": 1}})
+    changes = delta_run(fake_module(check_mode=True), path, {"array-2": {}})
+    assert changes["added"] == ["array-2"]
+    assert changes["removed"] == ["array-1"]
+    assert delta_run(fake_module(), path, {"array-1": {"load": 1}})["added"] == []
+
+
+def test_delta_state_invalid_file_fails(tmp_path, fake_module):
+    path = tmp_path / "state.json"
+    path.write_text("not json")
+    with pytest.raises(fake_module.FailJson, match="^Failed to read state file "):
+        pure1.DeltaState(fake_module(), str(path))
+
+
+class Server(object):
+    """An API client request answering conditional GETs like Pure1"""
+
+    def __init__(self, body, etag='"1"'):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def request(self, method, url, query_params=None, headers=None, **kwargs):
+        from pypureclient._transport.exceptions import ApiException
+        from pypureclient._transport.rest import RESTResponse
+        from urllib3 import HTTPResponse
+
+        self.requests.append((method, url, dict(headers or {})))
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            raise ApiException(status=304, reason="Not Modified")
+        response_headers = {"Content-Type": "application/json", "Content-Length": "9"}
+        if self.etag:
+            response_headers["ETag"] = self.etag
+        return RESTResponse(
+            HTTPResponse(
+                body=self.body,
+                headers=response_headers,
+                status=200,
+                reason="OK",
+                preload_content=True,
+            )
+        )
+
+
+class CachedClient(object):
+    def __init__(self, server):
+        self._api_client = server
+
+
+URL = "https://api.pure1.purestorage.com/api/1.6/arrays"
+
+
+def test_response_cache_revalidates(tmp_path):
+    pytest.importorskip("pypureclient")
+    server = Server(b'{"a": 1}')
+    client = CachedClient(server)
+    cache = pure1.ResponseCache.attach(str(tmp_path / "responses.db"), client)
+    request = client._api_client.request
+
+    response = request("GET", URL)
+    assert response.status == 200
+    assert not getattr(response, "not_modified", False)
+    assert "If-None-Match" not in server.requests[-1][2]
+
+    # An unchanged response is answered from the cache
+    response = request("GET", URL, headers={"Accept": "application/json"})
+    assert server.requests[-1][2] == {
+        "Accept": "application/json",
+        "If-None-Match": '"1"',
+    }
+    assert response.status == 200
+    assert response.not_modified
+    assert response.data == b'{"a": 1}'
+    assert response.getheader("ETag") == '"1"'
+    # Headers of the encoded body are not replayed
+    assert response.getheader("Content-Length") is None
+
+    # A changed response replaces the cached one
+    server.body, server.etag = b'{"a": 2}', '"2"'
+    assert request("GET", URL).data == b'{"a": 2}'
+    response = request("GET", URL)
+    assert response.not_modified
+    assert response.data == b'{"a": 2}'
+    cache.close()
+
+
+def test_response_cache_skips_unvalidated_and_other_methods(tmp_path):
+    pytest.importorskip("pypureclient")
+    server = Server(b"{}", etag=None)
+    client = CachedClient(server)
+    pure1.ResponseCache.attach(str(tmp_path / "responses.db"), client)
+    request = client._api_client.request
+    request("GET", URL)
+    request("GET", URL)
+    assert server.requests[-1][2] == {}
+
+    server.etag = '"1"'
+    request("PUT", URL)
+    request("PUT", URL)
+    assert server.requests[-1][2] == {}
+
+
+def test_response_cache_open_error_skipped(tmp_path):
+    server = Server(b"{}")
+    client = CachedClient(server)
+    path = str(tmp_path / "missing" / "responses.db")
+    assert pure1.ResponseCache.attach(path, client) is None
+    assert client._api_client.request == server.request
+
+
+def test_response_cache_file_is_private(tmp_path):
+    path = str(tmp_path / "responses.db")
+    pure1.ResponseCache.attach(path, CachedClient(Server(b"{}"))).close()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_response_cache_check_mode_keeps_file(tmp_path):
+    pytest.importorskip("pypureclient")
+    path = str(tmp_path / "responses.db")
+    pure1.ResponseCache.attach(path, CachedClient(Server(b"{}")), True).close()
+    assert not os.path.exists(path)
+
+    client = CachedClient(Server(b'{"a": 1}'))
+    cache = pure1.ResponseCache.attach(path, client)
+    client._api_client.request("GET", URL)
+    cache.close()
+    with open(path, "rb") as handle:
+        content = handle.read()
+    server = Server(b'{"a": 2}', etag='"2"')
+    client = CachedClient(server)
+    cache = pure1.ResponseCache.attach(path, client, True)
+    # Stored responses are revalidated, but new ones are not stored
+    client._api_client.request("GET", URL)
+    assert server.requests[-1][2] == {"If-None-Match": '"1"'}
+    cache.close()
+    with open(path, "rb") as handle:
+        assert handle.read() == content
+
+
+def test_api_metrics_summary():
+    metrics = pure1.ApiMetrics()
+    volumes = URL.replace("arrays", "volumes")
+    metrics.record("GET", URL + "?limit=2", 503, 0.0, 0.1, 10)
+    # The same URL again is a retry, a continuation_token a further page
+    metrics.record("GET", URL + "?limit=2", 200, 0.1, 0.25, 100, retries=1)
+    metrics.record("GET", URL + "?continuation_token=x", 200, 0.25, 0.5, 50)
+    metrics.record("GET", volumes, 200, 0.0, 0.4, 5)
+    summary = metrics.summary()
+    assert summary["requests"] == 4
+    assert summary["bytes"] == 165
+    assert summary["client_setup_ms"] is None
+    arrays = summary["endpoints"]["GET /arrays"]
+    assert arrays["calls"] == 1
+    assert arrays["requests"] == 3
+    assert arrays["pages"] == 2
+    assert arrays["errors"] == 1
+    assert arrays["retries"] == 2
+    assert arrays["statuses"] == {"503": 1, "200": 2}
+    assert arrays["bytes"] == 160
+    assert arrays["total_ms"] == 500.0
+    assert arrays["max_ms"] == 250.0
+    assert summary["endpoints"]["GET /volumes"]["calls"] == 1
+
+
+def test_api_metrics_instrument():
+    pytest.importorskip("pypureclient")
+    from pypureclient._transport.exceptions import ApiException
+
+    class FailingServer(object):
+        def request(self, method, url, **kwargs):
+            raise ApiException(status=500, reason="Internal Server Error")
+
+    metrics = pure1.ApiMetrics()
+    client = CachedClient(Server(b'{"a": 1}'))
+    failing_client = CachedClient(FailingServer())
+    metrics.instrument(client)
+    metrics.instrument(failing_client)
+    client._api_client.request("GET", URL)
+    with pytest.raises(ApiException):
+        failing_client._api_client.request("GET", URL)
+    assert [
+        (request["endpoint"], request["status"], request["bytes"])
+        for request in metrics.requests
+    ] == [("GET /arrays", 200, 8), ("GET /arrays", 500, 0)]
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.module_utils import pure1
+from ansible_collections.purestorage.pure1.plugins.module_utils import pure1_cassette
+from ansible_collections.purestorage.pure1.plugins.module_utils.pure1_cassette import (
+    Cassette,
+)
+
+pytest.importorskip("pypureclient")
+
+
+def api_url(path):
+    """Return the Pure1 URL of path for the most recent versioned client"""
+    # pypureclient.pure1.Pure1_1_6 serves /api/1.6
+    version = pure1._pure1_versioned().__name__.rsplit("_", 2)[1:]
+    return "https://api.pure1.purestorage.com/api/{0}/{1}".format(
+        ".".join(version), path
+    )
+
+
+def arrays(*names):
+    return json.dumps(
+        {
+            "continuation_token": None,
+            "total_item_count": len(names),
+            "items": [{"id": name, "name": name} for name in names],
+        }
+    )
+
+
+class Server(object):
+    """An API client request answering with the queued bodies"""
+
+    def __init__(self, *bodies):
+        self.bodies = list(bodies)
+
+    def request(self, method, url, query_params=None, headers=None, **kwargs):
+        from pypureclient._transport.rest import RESTResponse
+        from urllib3 import HTTPResponse
+
+        return RESTResponse(
+            HTTPResponse(
+                body=self.bodies.pop(0).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                status=200,
+                reason="OK",
+                preload_content=True,
+            )
+        )
+
+
+class RecordedClient(object):
+    def __init__(self, server):
+        self._api_client = server
+
+
+def record(path, url, *bodies):
+    cassette = Cassette(path, mode="record")
+    client = RecordedClient(Server(*bodies))
+    cassette.record(client)
+    for dummy in bodies:
+        client._api_client.request("GET", url)
+    cassette.close()
+
+
+def replay_client(path):
+    return Cassette(path, latency_scale=0).replay_client(
+        pure1._pure1_configuration(None)
+    )
+
+
+def test_cassette_replays_recorded_responses(tmp_path):
+    path = str(tmp_path / "cassette.gz")
+    url = api_url("arrays?limit=1")
+    record(path, url, arrays("array-1"), arrays("array-2"))
+    client = replay_client(path)
+    names = [
+        [array.name for array in client.get_arrays(limit=1).items] for dummy in range(3)
+    ]
+    # Responses are served in recorded order, the last one once they run out
+    assert names == [["array-1"], ["array-2"], ["array-2"]]
+
+
+def test_cassette_ignores_volatile_params(tmp_path):
+    path = str(tmp_path / "cassette.gz")
+    record(path, api_url("metrics/history?start_time=1&end_time=2"), "{}")
+    request = replay_client(path)._api_client.request
+    response = request("GET", api_url("metrics/history?start_time=3&end_time=4"))
+    assert response.status == 200
+    with pytest.raises(Exception, match="No response recorded in "):
+        request("GET", api_url("metrics/history?start_time=3&resolution=60000"))
+
+
+def test_cassette_requires_known_client(tmp_path, monkeypatch):
+    class Client(object):
+        def __init__(self):
+            self._api_client = None
+            self._session = None
+
+    class Versioned(object):
+        pass
+
+    Versioned.Client = Client
+    monkeypatch.setattr(pure1_cassette, "_pure1_versioned", lambda: Versioned)
+    path = str(tmp_path / "cassette.gz")
+    record(path, api_url("arrays"), arrays())
+    with pytest.raises(
+        pure1.CassetteError,
+        match="not supported by this version of py-pure-client, its Client"
+        " sets _api_client, _session instead of ",
+    ):
+        replay_client(path)
+
+
+def test_cassette_errors(tmp_path):
+    with pytest.raises(pure1.CassetteError, match="^Failed to read cassette "):
+        replay_client(str(tmp_path / "missing.gz"))
+    with pytest.raises(pure1.CassetteError, match="^PURE1_CASSETTE_MODE must be "):
+        Cassette(str(tmp_path / "cassette.gz"), mode="rewind")
+
+
+def test_get_pure1_reports_cassette_error(tmp_path, monkeypatch, fake_module):
+    monkeypatch.setenv("PURE1_CASSETTE", str(tmp_path / "missing.gz"))
+    module = fake_module(app_id="app", key_file="key.pem", password=None)
+    with pytest.raises(fake_module.FailJson, match="^Failed to read cassette "):
+        pure1.get_pure1(module)
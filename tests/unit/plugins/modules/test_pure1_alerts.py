@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_alerts
+
+pure1_models = pytest.importorskip("pypureclient.pure1")
+
+ALERTS = [
+    {
+        "id": "alert-1",
+        "name": "alert-1",
+        "code": 1,
+        "summary": "all timestamps",
+        "severity": "warning",
+        "state": "closed",
+        "created": 1700000000000,
+        "updated": 1700000060000,
+        "notified": 1700000120000,
+        "closed": 1700000180000,
+        "arrays": [{"id": "array-1", "name": "array-1"}],
+    },
+    {
+        "id": "alert-2",
+        "name": "alert-2",
+        "code": 2,
+        "summary": "only created",
+        "severity": "warning",
+        "state": "closed",
+        "created": 1700000000000,
+        "arrays": [{"id": "array-2", "name": "array-2"}],
+    },
+    {
+        "id": "alert-3",
+        "name": "alert-3",
+        "code": 3,
+        "summary": "null and zero timestamps",
+        "severity": "warning",
+        "state": "closed",
+        "created": 1700000000000,
+        "updated": None,
+        "notified": 0,
+        "closed": None,
+        "arrays": [{"id": "array-3", "name": "array-3"}],
+    },
+]
+
+
+PARAMS = dict(
+    name=None, severity="warning", state="closed", timestamp_format="epoch_ms"
+)
+
+
+class ModelResponse(object):
+    status_code = 200
+
+    def __init__(self, items):
+        self.total_item_count = len(items)
+        self.items = iter(items)
+
+
+class ModelClient(object):
+    """A client returning pypureclient models, as without PURE1_RAW_JSON"""
+
+    def get_alerts(self, **params):
+        return ModelResponse(
+            [
+                pure1_models.Alert(
+                    **dict(
+                        (key, value)
+                        for key, value in alert.items()
+                        if value is not None
+                    )
+                )
+                for alert in ALERTS
+            ]
+        )
+
+
+class RawPage(object):
+    def __init__(self, body):
+        self.raw_data = json.dumps(body).encode("utf-8")
+
+
+class RawApi(object):
+    def api16_alerts_get_with_http_info(self, **params):
+        return RawPage({"total_item_count": len(ALERTS), "items": ALERTS})
+
+
+class RawClient(object):
+    """A client exposing the generated endpoint functions get_collection uses"""
+
+    _timeout = None
+
+    def _Client__get_api_instance(self, api_class):
+        return RawApi()
+
+    def _call_with_retries(self, api_function, **kwargs):
+        kwargs.pop("_preload_content")
+        kwargs.pop("_request_timeout")
+        return api_function(**kwargs)
+
+
+def test_raw_alerts_match_models_without_timestamps(fake_module):
+    module = fake_module(PARAMS)
+    model_records = list(pure1_alerts.generate_alert_records(module, ModelClient()))
+    raw_records = list(pure1_alerts.generate_alert_records(module, RawClient()))
+    assert raw_records == model_records
+    assert raw_records[1] == {
+        "component_type": None,
+        "component_name": None,
+        "code": 2,
+        "category": None,
+        "summary": "only created",
+        "created": 1700000000000,
+        "appliance_name": "array-2",
+    }
+    assert "updated" not in raw_records[2]
+    assert "notified" not in raw_records[2]
+    assert "closed" not in raw_records[2]
+
+
+def test_no_alerts_fails(fake_module):
+    class EmptyClient(object):
+        def get_alerts(self, **params):
+            return ModelResponse([])
+
+    with pytest.raises(fake_module.FailJson, match="Failed to get any closed alerts"):
+        list(pure1_alerts.generate_alert_records(fake_module(PARAMS), EmptyClient()))
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import re
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_array_tags
+
+PARAMS = dict(name=None, filter=None, state="present", purge=False)
+
+
+class Array(object):
+    def __init__(self, name):
+        self.name = name
+
+
+class Response(object):
+    def __init__(self, items=None, message=None):
+        self.status_code = 400 if message else 200
+        self.items = iter(items or [])
+        self.errors = [type("Error", (object,), {"message": message})()]
+
+
+class ArraysClient(object):
+    """A client rejecting names batches with an unknown array, like Pure1"""
+
+    def __init__(self, arrays, filter_error=None):
+        self.arrays = arrays
+        self.filter_error = filter_error
+        self.requests = []
+
+    def get_arrays(self, names=None, filter=None):
+        self.requests.append("names" if names else "filter")
+        if names:
+            unknown = [name for name in names if name not in self.arrays]
+            if unknown:
+                return Response(message="Array {0} not found".format(unknown[0]))
+            return Response([Array(name) for name in names])
+        if self.filter_error:
+            return Response(message=self.filter_error)
+        wanted = re.findall(r"name='([^']*)'", filter)
+        return Response([Array(name) for name in self.arrays if name in wanted])
+
+
+def test_array_names_found(fake_module):
+    client = ArraysClient(["array-1", "array-2"])
+    module = fake_module(PARAMS, name=["array-2", "array-1", "array-2"])
+    assert pure1_array_tags.get_array_names(module, client) == ["array-1", "array-2"]
+    assert client.requests == ["names"]
+
+
+def test_unknown_array_names_reported(fake_module):
+    client = ArraysClient(["array-1", "array-2"])
+    module = fake_module(PARAMS, name=["array-1", "array-9", "array-2", "array-8"])
+    with pytest.raises(
+        fake_module.FailJson, match="^Array array-8, array-9 does not exist.$"
+    ):
+        pure1_array_tags.get_array_names(module, client)
+    assert client.requests == ["names", "filter"]
+
+
+def test_rejected_names_and_filter_fail_with_error(fake_module):
+    client = ArraysClient(["array-1"], filter_error="Service unavailable")
+    module = fake_module(PARAMS, name=["array-1", "array-9"])
+    with pytest.raises(fake_module.FailJson, match="Error: Array array-9 not found"):
+        pure1_array_tags.get_array_names(module, client)
+
+
+@pytest.mark.parametrize(
+    "state, purge, tags, expected",
+    [
+        (
+            "present",
+            False,
+            {"owner": "db", "site": "east", "tier": "1"},
+            {"add": {"tier": "1"}, "update": {"owner": "db"}, "delete": {}},
+        ),
+        (
+            "present",
+            True,
+            {"owner": "storage"},
+            {"add": {}, "update": {}, "delete": {"site": "east"}},
+        ),
+        (
+            "absent",
+            False,
+            {"owner": None, "site": "west", "tier": None},
+            {"add": {}, "update": {}, "delete": {"owner": "storage"}},
+        ),
+    ],
+)
+def test_plan_changes(state, purge, tags, expected, fake_module):
+    module = fake_module(PARAMS, state=state, purge=purge)
+    current = {"owner": "storage", "site": "east"}
+    assert pure1_array_tags.plan_changes(module, tags, current) == expected
+
+
+class TagsClient(object):
+    """A client recording the tag requests it was sent"""
+
+    def __init__(self, message=None):
+        self.message = message
+        self.requests = []
+
+    def put_arrays_tags(self, resource_names, tag_put):
+        tags = tuple((tag["key"], tag["value"]) for tag in tag_put)
+        self.requests.append(("set", tuple(resource_names), tags))
+        return Response(message=self.message)
+
+    def delete_arrays_tags(self, resource_names, keys):
+        self.requests.append(("remove", tuple(resource_names), tuple(keys)))
+        return Response(message=self.message)
+
+
+def plan(add=None, update=None, delete=None):
+    return {"add": add or {}, "update": update or {}, "delete": delete or {}}
+
+
+def test_apply_plans_groups_identical_changes(fake_module):
+    client = TagsClient()
+    plans = {
+        "array-1": plan(add={"owner": "db"}, delete={"site": "east"}),
+        # Adding and updating the same value is the same change
+        "array-2": plan(update={"owner": "db"}, delete={"site": "west"}),
+        "array-3": plan(add={"owner": "db"}),
+        "array-4": plan(),
+    }
+    pure1_array_tags.apply_plans(fake_module(PARAMS), client, plans)
+    owner = (("owner", "db"),)
+    assert sorted(client.requests) == [
+        ("remove", ("array-1", "array-2"), ("site",)),
+        ("set", ("array-1", "array-2"), owner),
+        ("set", ("array-3",), owner),
+    ]
+
+
+def test_apply_plans_batches_arrays(monkeypatch, fake_module):
+    monkeypatch.setattr(
+        pure1_array_tags,
+        "chunks",
+        lambda items: [
+            list(items)[start : start + 2] for start in range(0, len(items), 2)
+        ],
+    )
+    client = TagsClient()
+    names = ["array-{0}".format(index) for index in range(5)]
+    plans = dict((name, plan(delete={"site": "east"})) for name in names)
+    pure1_array_tags.apply_plans(fake_module(PARAMS), client, plans)
+    assert sorted(request[1] for request in client.requests) == [
+        ("array-0", "array-1"),
+        ("array-2", "array-3"),
+        ("array-4",),
+    ]
+
+
+def test_apply_plans_error_fails(fake_module):
+    client = TagsClient(message="Tag limit exceeded")
+    with pytest.raises(
+        fake_module.FailJson,
+        match="^Failed to set tags owner on arrays array-1. Error: Tag limit exceeded$",
+    ):
+        pure1_array_tags.apply_plans(
+            fake_module(PARAMS), client, {"array-1": plan(add={"owner": "db"})}
+        )
+
+
+def test_plan_diff():
+    current = {"owner": "storage", "site": "east"}
+    diff = pure1_array_tags.plan_diff(
+        "array-1",
+        current,
+        plan(add={"tier": "1"}, update={"owner": "db"}, delete={"site": "east"}),
+    )
+    assert diff == {
+        "before_header": "array-1",
+        "after_header": "array-1",
+        "before": {"owner": "storage", "site": "east"},
+        "after": {"owner": "db", "tier": "1"},
+    }
+    # The current tags are left untouched
+    assert current == {"owner": "storage", "site": "east"}
+
+
+def test_plan_diff_no_changes():
+    current = {"owner": "storage"}
+    diff = pure1_array_tags.plan_diff("array-1", current, plan())
+    assert diff["before"] == diff["after"] == current
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_drives
+
+PARAMS = dict(array=None, fields=None, timestamp_format="epoch_ms")
+
+
+class ErrorResponse(object):
+    status_code = 400
+
+    def __init__(self, message):
+        self.errors = [type("Error", (object,), {"message": message})()]
+
+
+class DrivesResponse(object):
+    status_code = 200
+
+    def __init__(self, items):
+        self.items = iter(items)
+
+
+DRIVE = {
+    "name": "CH0.BAY1",
+    "arrays": [{"name": "array-1"}],
+    "capacity": 1024,
+    "protocol": "NVMe",
+    "status": "healthy",
+    "type": "SSD",
+}
+
+
+class FailingClient(object):
+    """A client whose listings are all rejected by Pure1"""
+
+    def get_drives(self, **params):
+        return ErrorResponse("drives unavailable")
+
+
+def test_fleet_drives_error_fails(fake_module):
+    with pytest.raises(
+        fake_module.FailJson, match="Failed to get drives. Error: drives"
+    ):
+        list(pure1_drives.generate_drive_records(fake_module(PARAMS), FailingClient()))
+
+
+def test_drive_fields_projected(monkeypatch, fake_module):
+    monkeypatch.setattr(
+        pure1_drives, "get_collection", lambda *args: DrivesResponse([DRIVE])
+    )
+    module = fake_module(PARAMS, fields=["status", "serial"])
+    assert list(pure1_drives.generate_drive_records(module, None)) == [
+        ("array-1", "CH0.BAY1", {"status": "healthy"})
+    ]
+    assert pure1_drives.drive_columns(module) == [
+        ("array", "string"),
+        ("name", "string"),
+        ("status", "string"),
+    ]
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_info
+
+models = pytest.importorskip("pypureclient.pure1")
+
+DAY = 86400000
+START = 1700000000000
+
+
+PARAMS = dict(
+    fields=None,
+    timestamp_format="epoch_ms",
+    summarize=False,
+    top_n=None,
+    top_by=["load [%]"],
+    top_only=False,
+)
+
+
+class Response(object):
+    status_code = 200
+
+    def __init__(self, items):
+        self.total_item_count = len(items)
+        self.items = iter(items)
+
+
+class FakeClient(object):
+    """A client returning the given pypureclient models for each listing"""
+
+    def __init__(self, **listings):
+        self.listings = listings
+
+    def __getattr__(self, name):
+        if name.startswith("get_") and name[4:] in self.listings:
+            return lambda **params: Response(self.listings[name[4:]])
+        raise AttributeError(name)
+
+
+def test_invoice_dates(fake_module):
+    invoice = models.Invoice(
+        id="invoice-1",
+        var_date=START,
+        due_date=START + 30 * DAY,
+        end_user_name="Example Corp",
+        subscription={"id": "subscription-1", "name": "subscription-1"},
+        lines=[{"item": "capacity", "start_date": START, "end_date": START + 90 * DAY}],
+    )
+    invoices = pure1_info.generate_invoices_dict(
+        fake_module(PARAMS), FakeClient(invoices=[invoice])
+    )
+    # An invoice without a ship date keeps its date
+    assert invoices["invoice-1"]["date"] == START
+    assert invoices["invoice-1"]["due_date"] == START + 30 * DAY
+    assert invoices["invoice-1"]["ship_date"] is None
+    assert invoices["invoice-1"]["end_user_name"] == "Example Corp"
+    line = invoices["invoice-1"]["lines"][0]
+    assert line["start_date"] == START
+    assert line["end_date"] == START + 90 * DAY
+    # A line without tax or components
+    assert line["tax_percentage"] == 0
+    assert line["tax_exemption_statement"] is None
+    assert line["components"] == []
+
+
+def test_invoices_and_lines(fake_module):
+    invoices = [
+        models.Invoice(
+            id="invoice-{0}".format(index),
+            subscription={"id": "subscription-1", "name": "subscription-1"},
+            lines=[
+                {
+                    "item": "item-{0}".format(line),
+                    "quantity": line,
+                    "components": [{"item": "component-{0}".format(line)}],
+                }
+                for line in range(2)
+            ],
+        )
+        for index in range(3)
+    ]
+    info = pure1_info.generate_invoices_dict(
+        fake_module(PARAMS), FakeClient(invoices=invoices)
+    )
+    assert sorted(info) == ["invoice-0", "invoice-1", "invoice-2"]
+    for invoice in info.values():
+        assert [line["item"] for line in invoice["lines"]] == ["item-0", "item-1"]
+        assert invoice["lines"][1]["components"] == [{"item": "component-1"}]
+
+
+def current_metric(data):
+    return {"data": data, "unit": "GiB", "metric": {"name": "effective_used"}}
+
+
+def test_subscription_license_resources(fake_module):
+    license = models.SubscriptionLicense(
+        name="license-1",
+        start_date=START,
+        expiration_date=START + 365 * DAY,
+        last_updated_date=START,
+        marketplace_partner={"name": "partner"},
+        service_tier="//Premium",
+        subscription={"id": "subscription-1", "name": "subscription-1"},
+        average_on_demand=current_metric(1),
+        reservation=current_metric(2),
+        usage=current_metric(3),
+        quarter_on_demand=current_metric(4),
+        resources=[
+            {
+                "name": "array-{0}".format(index),
+                "fqdn": "array-{0}.example.com".format(index),
+                "resource_type": "arrays",
+                "activation_time": START,
+                "usage": current_metric(index),
+            }
+            for index in range(2)
+        ],
+    )
+    info = pure1_info.generate_subscription_licenses_dict(
+        fake_module(PARAMS), FakeClient(subscription_licenses=[license])
+    )
+    resources = info["license-1"]["resources"]
+    assert sorted(resources) == ["array-0", "array-1"]
+    assert resources["array-1"]["fqdn"] == "array-1.example.com"
+    assert resources["array-1"]["usage"]["data"] == 1
+    # Attributes missing from the API 1.6 license are returned as None
+    assert info["license-1"]["location"] is None
+    assert info["license-1"]["pre_ratio"] is None
+    assert info["license-1"]["energy_usage"] is None
+
+
+def test_unknown_appliance_os_warns(fake_module):
+    arrays = [
+        models.Array(name="array-1", os="Purity//XX", version="1.0", model="X"),
+        models.Array(name="engine-1", os="Elasticity", version="1.0", model="OE"),
+    ]
+    module = fake_module(PARAMS, fields=["model"])
+    info = pure1_info.generate_appliances_dict(module, FakeClient(arrays=arrays))
+    assert module.warnings == ["Unknown operating system detected: Purity//XX."]
+    assert info == {
+        "FlashArray": {},
+        "FlashBlade": {},
+        "ObjectEngine": {"engine-1": {"model": "OE"}},
+    }
+
+
+def test_appliance_tags(fake_module):
+    arrays = [models.Array(name="array-1", os="Purity//FA", version="6.5", model="X")]
+    tags = [
+        models.Tag(
+            key="owner", value="storage", tag_organization_id=1, namespace="default"
+        )
+    ]
+    info = pure1_info.generate_appliances_dict(
+        fake_module(PARAMS, fields=["tags"]),
+        FakeClient(arrays=arrays, arrays_tags=tags),
+    )
+    assert info["FlashArray"]["array-1"] == {
+        "tags": [
+            {"key": "owner", "value": "storage", "org_id": 1, "namespace": "default"}
+        ]
+    }
+
+
+class Series(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class MetricsClient(FakeClient):
+    """A FakeClient whose arrays have the given latest value of each metric"""
+
+    def __init__(self, values, **listings):
+        super(MetricsClient, self).__init__(**listings)
+        self.values = values
+        self.metrics = set()
+
+    def get_metrics_history(self, names, resource_names, end_time, **params):
+        self.metrics.update(names)
+        value = self.values[resource_names[0]].get(names[0])
+        return Response([] if value is None else [Series([[end_time, value]])])
+
+
+def test_top_n_rankings(fake_module):
+    loads = [0.3, 0.9, 0.1, 0.9, 0.5]
+    values = dict(
+        (
+            "array-{0}".format(index),
+            {"array_total_load": load, "array_read_iops": index * 10},
+        )
+        for index, load in enumerate(loads)
+    )
+    # An array without samples is not ranked
+    values["array-5"] = {}
+    arrays = [
+        models.Array(name=name, os="Purity//FA", version="6.5", model="X")
+        for name in sorted(values)
+    ]
+    client = MetricsClient(values, arrays=arrays)
+    module = fake_module(
+        PARAMS, top_n=3, top_by=["load [%]", "array_read_iops"], top_only=True
+    )
+    info = pure1_info.generate_appliances_dict(module, client)
+    # Ties are ranked by name, only the ranked metrics are requested
+    assert info == {
+        "top": {
+            "load [%]": [
+                {"name": "array-1", "type": "FlashArray", "value": 90.0},
+                {"name": "array-3", "type": "FlashArray", "value": 90.0},
+                {"name": "array-4", "type": "FlashArray", "value": 50.0},
+            ],
+            "iops (read)": [
+                {"name": "array-4", "type": "FlashArray", "value": 40},
+                {"name": "array-3", "type": "FlashArray", "value": 30},
+                {"name": "array-2", "type": "FlashArray", "value": 20},
+            ],
+        }
+    }
+    assert client.metrics == set(["array_total_load", "array_read_iops"])
+
+
+def test_top_n_with_appliances(fake_module):
+    values = {"array-1": {"array_total_load": 0.2}, "array-2": {}}
+    arrays = [
+        models.Array(name=name, os="Purity//FA", version="6.5", model="X")
+        for name in sorted(values)
+    ]
+    module = fake_module(PARAMS, top_n=5, fields=["model"])
+    info = pure1_info.generate_appliances_dict(
+        module, MetricsClient(values, arrays=arrays)
+    )
+    assert info["FlashArray"] == {
+        "array-1": {"model": "X"},
+        "array-2": {"model": "X"},
+    }
+    assert info["top"] == {
+        "load [%]": [{"name": "array-1", "type": "FlashArray", "value": 20.0}]
+    }
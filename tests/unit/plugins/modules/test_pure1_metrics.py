@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_metrics
+
+NOW = 1769850900000
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("now", NOW),
+        (" now ", NOW),
+        ("1700000000000", 1700000000000),
+        ("-90m", NOW - 90 * 60000),
+        ("-12h", NOW - 12 * 3600000),
+        ("-30d", NOW - 30 * 86400000),
+        ("2026-01-31T09:15:00Z", 1769850900000),
+        ("2026-01-31T09:15:00", 1769850900000),
+        ("2026-01-31", 1769817600000),
+    ],
+)
+def test_parse_time(value, expected, fake_module):
+    module = fake_module(start_time=value)
+    assert pure1_metrics.parse_time(module, "start_time", NOW) == expected
+
+
+@pytest.mark.parametrize(
+    "value", ["yesterday", "-30w", "-d", "30d", "2026-01-31 09:15", "-1.5h"]
+)
+def test_parse_time_invalid_fails(value, fake_module):
+    module = fake_module(end_time=value)
+    with pytest.raises(fake_module.FailJson, match="^Invalid end_time "):
+        pure1_metrics.parse_time(module, "end_time", NOW)
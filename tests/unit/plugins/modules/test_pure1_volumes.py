@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# (c) 2026, Simon Dodsley (simon@purestorage.com)
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import re
+
+import pytest
+
+from ansible_collections.purestorage.pure1.plugins.modules import pure1_volumes
+
+PARAMS = dict(array=None, serials=None, fields=None, timestamp_format="epoch_ms")
+
+
+SERIALS = ["5117AB000000000000000001", "5117AB000000000000000002"]
+VOLUMES = [
+    {
+        "name": "v{0}".format(index),
+        "serial": serial,
+        "created": 1700000000000,
+        "eradicated": False,
+        "destroyed": False,
+        "provisioned": 1024,
+        "source": None,
+        "pod": {"name": "pod-1"} if index else None,
+        "arrays": [{"name": "array-1", "fqdn": "array-1.example.com"}],
+    }
+    for index, serial in enumerate(SERIALS)
+] + [
+    {
+        "name": "v2",
+        "serial": "5117AB000000000000000003",
+        "arrays": [{"name": "array-2", "fqdn": "array-2.example.com"}],
+    }
+]
+
+
+class Model(object):
+    def __init__(self, item):
+        self.item = item
+
+    def to_dict(self):
+        return dict(self.item)
+
+
+class VolumesResponse(object):
+    status_code = 200
+
+    def __init__(self, items):
+        self.total_item_count = len(items)
+        self.items = iter(Model(item) for item in items)
+
+
+class VolumesClient(object):
+    """A client serving VOLUMES, filtered by the serials of a filter"""
+
+    def __init__(self):
+        self.filters = []
+
+    def get_volumes(self, filter=None, **params):
+        self.filters.append(filter)
+        serials = re.findall(r"serial='(\w+)'", filter or "")
+        return VolumesResponse(
+            [volume for volume in VOLUMES if not serials or volume["serial"] in serials]
+        )
+
+
+class ErrorResponse(object):
+    status_code = 400
+
+    def __init__(self, message):
+        self.errors = [type("Error", (object,), {"message": message})()]
+
+
+class FailingClient(object):
+    """A client whose listings are all rejected by Pure1"""
+
+    def get_volumes(self, **params):
+        return ErrorResponse("volumes unavailable")
+
+
+@pytest.mark.parametrize("array", [None, "array-1"])
+def test_volumes_error_fails(array, fake_module):
+    module = fake_module(PARAMS, array=array)
+    with pytest.raises(
+        fake_module.FailJson, match="Failed to get volumes. Error: volumes"
+    ):
+        list(pure1_volumes.generate_volume_records(module, FailingClient()))
+
+
+def test_volumes_serials(run_module):
+    client = VolumesClient()
+    result = run_module(
+        pure1_volumes,
+        client,
+        serials=[SERIALS[1].lower(), "5117ab000000000000000009"],
+        fields=["array"],
+        timestamp_format="epoch_ms",
+    )
+    assert result["pure1_volumes"] == {
+        "serial_numbers": {
+            SERIALS[1]: {"array": {"name": "array-1", "fqdn": "array-1.example.com"}}
+        },
+        "missing_serials": ["5117AB000000000000000009"],
+    }
+    assert len(client.filters) == 1
+
+
+def test_volumes_serials_output_file(run_module, tmp_path):
+    path = str(tmp_path / "volumes.ndjson")
+    result = run_module(
+        pure1_volumes,
+        VolumesClient(),
+        serials=SERIALS + ["5117AB000000000000000009"],
+        fields=["name"],
+        output_file=path,
+        timestamp_format="epoch_ms",
+    )
+    assert result["pure1_volumes"] == {
+        "output_file": path,
+        "output_format": "ndjson",
+        "records": 2,
+        "missing_serials": ["5117AB000000000000000009"],
+    }
+    with open(path) as handle:
+        assert [json.loads(line) for line in handle] == [
+            {"serial": SERIALS[0], "name": "v0"},
+            {"serial": SERIALS[1], "name": "v1"},
+        ]
+
+
+def test_volumes_compact(run_module):
+    result = run_module(
+        pure1_volumes, VolumesClient(), compact=True, timestamp_format="epoch_ms"
+    )
+    volumes = result["pure1_volumes"]
+    # Each array is listed once and referenced by index
+    assert volumes["arrays"] == [
+        {"name": "array-1", "fqdn": "array-1.example.com"},
+        {"name": "array-2", "fqdn": "array-2.example.com"},
+    ]
+    assert volumes["serial_numbers"][SERIALS[0]] == {
+        "name": "v0",
+        "created": 1700000000000,
+        "eradicated": False,
+        "destroyed": False,
+        "provisioned": 1024,
+        "source": None,
+        "pod": None,
+        "array": 0,
+    }
+    assert volumes["serial_numbers"][SERIALS[1]]["pod"] == "pod-1"
+    assert volumes["serial_numbers"]["5117AB000000000000000003"]["array"] == 1